@@ -3,7 +3,7 @@
 
 import click
 
-from grade.cli import run, report
+from grade.cli import batch, record, run, report
 
 
 @click.group(name="grade")
@@ -13,6 +13,8 @@ def cli():
 
 cli.add_command(run.run)
 cli.add_command(report.report)
+cli.add_command(batch.batch)
+cli.add_command(record.record)
 
 if __name__ == "__main__":
     cli(prog_name="grade")
@@ -0,0 +1,270 @@
+""" Aggregate: Reports on the results of a whole cohort.
+
+Parsing hundreds of results files one after another is slow, and keeping
+every one of them around to summarize is wasteful. Instead, the files are
+parsed on a pool of worker processes, which send back only the fields that
+are summarized. These are kept in columns, an array of floats per test,
+with NaN wherever a submission has no value, and every statistic is then
+computed from those columns.
+
+Results files can be either .grade files, or journals written by grade run.
+"""
+import json
+import math
+import os
+from array import array
+from multiprocessing import Pool
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from grade.journal import load
+
+# Number of bins in the histogram of scores.
+BINS = 10
+# Number of entries listed in rankings.
+TOP = 10
+
+NAN = float("nan")
+
+
+class Row(NamedTuple):
+    """ The fields of a single results file that are aggregated. """
+
+    submission: str
+    tests: Tuple[str, ...]
+    scores: Tuple[float, ...]
+    max_scores: Tuple[float, ...]
+    durations: Tuple[float, ...]
+    # Name, value and order of each leaderboard entry.
+    leaderboard: Tuple[Tuple[str, float, str], ...]
+
+
+def read(filepath: str) -> Row:
+    """ Returns the fields of the results in filepath that are aggregated. """
+    if filepath.endswith(".jsonl"):
+        data = load(filepath)
+    else:
+        with open(filepath, "r") as f:
+            data = json.load(f)
+
+    tests = data.get("tests", [])
+    durations = data.get("extra_data", {}).get("durations", [])
+    durations = durations + [None] * (len(tests) - len(durations))
+    return Row(
+        name(filepath),
+        tuple(test["name"] for test in tests),
+        tuple(_number(test.get("score")) for test in tests),
+        tuple(_number(test.get("max_score")) for test in tests),
+        tuple(_number(duration) for duration in durations[: len(tests)]),
+        tuple(
+            (entry["name"], _number(entry.get("value")), entry.get("order", "desc"))
+            for entry in data.get("leaderboard", [])
+        ),
+    )
+
+
+def name(filepath: str) -> str:
+    """ Returns the name of the submission filepath holds the results of.
+
+    That is the name of the file, or of its directory if the file is only
+    an extension, such as .grade.
+    """
+    base = os.path.basename(filepath)
+    for extension in (".jsonl", ".grade"):
+        if base.endswith(extension):
+            base = base[: -len(extension)]
+    return base or os.path.basename(os.path.dirname(os.path.abspath(filepath)))
+
+
+class Cohort:
+    """ The results of many submissions, in columns.
+
+    >>> Cohort.load(glob('results/*.grade')).summary()['tests'][0]
+    {'name': 'Test.test_add', 'max_score': 10.0, 'pass_rate': 0.92, ...}
+    """
+
+    def __init__(self):
+        self.submissions: List[str] = []
+        # Total score, and maximum score, of each submission.
+        self.totals = array("d")
+        self.maximums = array("d")
+        # Name and maximum score of each test, and a column of each per test field.
+        self.tests: List[str] = []
+        self.max_scores: List[float] = []
+        self.scores: List[array] = []
+        self.durations: List[array] = []
+        # A column of values, and the order they are ranked in, of each leaderboard.
+        self.boards: Dict[str, array] = {}
+        self.orders: Dict[str, str] = {}
+        self._columns: Dict[str, int] = {}
+
+    @classmethod
+    def load(cls, filepaths: Iterable[str], jobs: Optional[int] = None) -> "Cohort":
+        """ Returns the Cohort of every results file, parsed on jobs processes. """
+        cohort = cls()
+        filepaths = list(filepaths)
+        jobs = jobs or os.cpu_count() or 1
+        if jobs == 1 or len(filepaths) < 2:
+            for row in map(read, filepaths):
+                cohort.add(row)
+            return cohort
+
+        with Pool(jobs) as pool:
+            # Sending files in chunks keeps the workers busy, without waiting on each other.
+            chunksize = max(1, len(filepaths) // (4 * jobs))
+            for row in pool.imap(read, filepaths, chunksize):
+                cohort.add(row)
+        return cohort
+
+    def __len__(self) -> int:
+        return len(self.submissions)
+
+    def add(self, row: Row) -> None:
+        """ Adds a submission's results to the end of every column. """
+        index = len(self.submissions)
+        self.submissions.append(row.submission)
+        for column in (*self.scores, *self.durations, *self.boards.values()):
+            column.append(NAN)
+
+        total, maximum = 0.0, 0.0
+        for test, score, max_score, duration in zip(
+            row.tests, row.scores, row.max_scores, row.durations
+        ):
+            column = self._columns.get(test)
+            if column is None:
+                column = self._columns[test] = len(self.tests)
+                self.tests.append(test)
+                self.max_scores.append(0.0)
+                self.scores.append(array("d", [NAN] * (index + 1)))
+                self.durations.append(array("d", [NAN] * (index + 1)))
+            self.scores[column][index] = score
+            self.durations[column][index] = duration
+            if max_score > self.max_scores[column]:
+                self.max_scores[column] = max_score
+            total += 0.0 if math.isnan(score) else score
+            maximum += 0.0 if math.isnan(max_score) else max_score
+        self.totals.append(total)
+        self.maximums.append(maximum)
+
+        for board, value, order in row.leaderboard:
+            if board not in self.boards:
+                self.boards[board] = array("d", [NAN] * (index + 1))
+                self.orders[board] = order
+            self.boards[board][index] = value
+
+    def histogram(self, bins: int = BINS) -> List[int]:
+        """ Returns the number of submissions in each bin of equal width, from 0% to 100%. """
+        counts = [0] * bins
+        for total, maximum in zip(self.totals, self.maximums):
+            if maximum > 0:
+                counts[min(bins - 1, max(0, int(total / maximum * bins)))] += 1
+        return counts
+
+    def pass_rate(self, column: int) -> Optional[float]:
+        """ Returns the fraction of submissions given full marks for a test.
+
+        Tests worth nothing can't be told apart from failures, so have no pass rate.
+        """
+        max_score = self.max_scores[column]
+        scores = _present(self.scores[column])
+        if max_score <= 0 or not scores:
+            return None
+        return sum(score >= max_score for score in scores) / len(scores)
+
+    def leaderboard(self, board: str, top: int = TOP) -> List[Tuple[str, float]]:
+        """ Returns the best submissions on a leaderboard, and their values. """
+        entries = [
+            (submission, value)
+            for submission, value in zip(self.submissions, self.boards[board])
+            if not math.isnan(value)
+        ]
+        entries.sort(key=lambda entry: entry[1], reverse=self.orders[board] != "asc")
+        return entries[:top]
+
+    def summary(self, top: int = TOP) -> dict:
+        """ Returns the statistics of the cohort, ready to be dumped as JSON. """
+        tests = [
+            {
+                "name": test,
+                "max_score": self.max_scores[column],
+                "submissions": len(_present(self.scores[column])),
+                "pass_rate": self.pass_rate(column),
+                "mean_score": _mean(self.scores[column]),
+                "mean_duration": _mean(self.durations[column]),
+            }
+            for column, test in enumerate(self.tests)
+        ]
+        timed = [t for t in tests if t["mean_duration"] is not None]
+        return {
+            "submissions": len(self),
+            "max_score": sum(self.max_scores),
+            "mean_score": _mean(self.totals),
+            "histogram": self.histogram(),
+            "tests": tests,
+            "slowest": sorted(timed, key=lambda t: t["mean_duration"], reverse=True)[:top],
+            "leaderboards": {
+                board: [{"name": s, "value": v} for s, v in self.leaderboard(board, top)]
+                for board in self.boards
+            },
+        }
+
+
+def markdown(summary: dict) -> str:
+    """ Returns a summary of a Cohort as Markdown. """
+    lines = [
+        "# Cohort Results",
+        "",
+        f"## {summary['submissions']} Submissions, "
+        f"Mean Score: {_format(summary['mean_score'])}/{_format(summary['max_score'])}",
+        "",
+        "### Scores",
+        "",
+        "| Score | Submissions | |",
+        "| --- | --- | --- |",
+    ]
+    bins = len(summary["histogram"])
+    most = max(summary["histogram"], default=0) or 1
+    for i, count in enumerate(summary["histogram"]):
+        bar = "#" * round(count / most * 40)
+        lines.append(f"| {100 * i // bins}-{100 * (i + 1) // bins}% | {count} | {bar} |")
+
+    lines += ["", "### Tests", "", "| Test | Pass Rate | Mean Score | Mean Duration (s) |"]
+    lines.append("| --- | --- | --- | --- |")
+    for test in summary["tests"]:
+        rate = "-" if test["pass_rate"] is None else f"{test['pass_rate']:.0%}"
+        score = f"{_format(test['mean_score'])}/{_format(test['max_score'])}"
+        lines.append(f"| {test['name']} | {rate} | {score} | {_format(test['mean_duration'])} |")
+
+    if summary["slowest"]:
+        lines += ["", "### Slowest Tests", "", "| Test | Mean Duration (s) |", "| --- | --- |"]
+        for test in summary["slowest"]:
+            lines.append(f"| {test['name']} | {_format(test['mean_duration'])} |")
+
+    for board, entries in summary["leaderboards"].items():
+        lines += ["", f"### Leaderboard: {board}", "", "| Rank | Submission | Value |"]
+        lines.append("| --- | --- | --- |")
+        for rank, entry in enumerate(entries, 1):
+            lines.append(f"| {rank} | {entry['name']} | {_format(entry['value'])} |")
+    return "\n".join(lines)
+
+
+def _number(value) -> float:
+    """ Returns value as a float, or NaN if it isn't a number. """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def _present(column: Iterable[float]) -> List[float]:
+    return [value for value in column if not math.isnan(value)]
+
+
+def _mean(column: Iterable[float]) -> Optional[float]:
+    values = _present(column)
+    return sum(values) / len(values) if values else None
+
+
+def _format(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    return f"{value:g}" if value == int(value) else f"{value:.3g}"
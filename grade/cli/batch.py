@@ -0,0 +1,114 @@
+""" Batch.
+
+Grades every submission in a directory, in parallel.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Tuple
+
+import click
+
+from grade.runners import GradedRunner
+
+
+def _copy(source: str, destination: str) -> None:
+    """ Copies the contents of source into destination, overwriting files. """
+    for entry in os.scandir(source):
+        target = os.path.join(destination, entry.name)
+        if entry.is_dir():
+            shutil.rmtree(target, ignore_errors=True)
+            shutil.copytree(entry.path, target)
+        else:
+            shutil.copy2(entry.path, target)
+
+
+def _grade(work: Tuple[str, str, str]) -> Tuple[str, dict]:
+    """ Grades one submission in its own working directory. """
+    submission, tests, pattern = work
+    name = os.path.basename(submission)
+    workdir = tempfile.mkdtemp(prefix="grade-")
+    try:
+        _copy(submission, workdir)
+        _copy(tests, workdir)
+        os.chdir(workdir)
+        suite = unittest.defaultTestLoader.discover(workdir, pattern=pattern)
+        return name, GradedRunner(visibility="visible").run(suite).data
+    except Exception as e:
+        return name, _failed(f"{e!r}")
+    finally:
+        os.chdir(tempfile.gettempdir())
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _isolate(work: Tuple[str, str, str]) -> Tuple[str, dict]:
+    """ Grades one submission in a fresh process, which keeps imported modules apart.
+
+    A submission that kills its process, such as by exiting or crashing the
+    interpreter, is recorded as failed rather than taking down the batch.
+    """
+    with ProcessPoolExecutor(1) as pool:
+        try:
+            return pool.submit(_grade, work).result()
+        except BrokenProcessPool:
+            return os.path.basename(work[0]), _failed("the grading process exited abruptly")
+
+
+def _failed(reason: str) -> dict:
+    return {"tests": [], "leaderboard": [], "output": f"Grading failed: {reason}"}
+
+
+@click.command(short_help="grades every submission in a directory")
+@click.argument("submissions", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "--tests",
+    required=True,
+    type=click.Path(exists=True, file_okay=False),
+    help="directory containing the test suite",
+)
+@click.option("-p", "--pattern", default="test*", help="pattern to find files with")
+@click.option("-j", "--jobs", default=os.cpu_count(), help="number of submissions to grade at once")
+@click.option("--output", default="results", help="directory to write results to")
+def batch(submissions, tests, pattern, jobs, output):
+    """ Grade each directory in SUBMISSIONS with the tests in TESTS.
+
+    Each submission is copied, along with the tests, into its own temporary
+    working directory, and graded in a fresh process. Results are written to
+    OUTPUT/<submission>.grade, with a summary of every submission in
+    OUTPUT/index.json.
+    """
+    submissions, tests = os.path.abspath(submissions), os.path.abspath(tests)
+    names = sorted(e.name for e in os.scandir(submissions) if e.is_dir())
+    os.makedirs(output, exist_ok=True)
+
+    index = {}
+    start = time.time()
+    # Each submission is graded in a process of its own, threads only wait on them.
+    with ThreadPoolExecutor(jobs) as pool:
+        work = [(os.path.join(submissions, name), tests, pattern) for name in names]
+        futures = [pool.submit(_isolate, w) for w in work]
+        for done, future in enumerate(as_completed(futures), 1):
+            name, data = future.result()
+            with open(os.path.join(output, f"{name}.grade"), "w") as f:
+                json.dump(data, f, indent=4)
+
+            score = sum(float(t["score"]) for t in data["tests"])
+            max_score = sum(float(t["max_score"]) for t in data["tests"])
+            index[name] = {"score": score, "max_score": max_score}
+            if "output" in data:
+                index[name]["output"] = data["output"]
+
+            rate = done / max(time.time() - start, 1e-9)
+            click.echo(
+                f"[{done}/{len(names)}] {name}: {score}/{max_score} ({rate:.2f} submissions/s)",
+                err=True,
+            )
+
+    with open(os.path.join(output, "index.json"), "w") as f:
+        json.dump(dict(sorted(index.items())), f, indent=4)
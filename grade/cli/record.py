@@ -0,0 +1,109 @@
+""" Record.
+
+Records the expected outputs of testcases, by running a reference solution.
+"""
+
+import glob
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import click
+
+from grade.pipeline import Pipeline, Run, WriteOutputs
+from grade.pipeline.cache import hash_file, hash_json
+from grade.pipeline.write import write_atomic
+
+MANIFEST = ".record.json"
+
+
+def _command(command: Tuple[str, ...], case: str, stdin: bool) -> List[str]:
+    """ Returns the command to run for case, with {} replaced by the case, or appended. """
+    if stdin:
+        return list(command)
+    if "{}" in command:
+        return [case if arg == "{}" else arg for arg in command]
+    return [*command, case]
+
+
+def _stamp(run: Run, case: str) -> str:
+    """ Returns a hash of the command, the case, and every file the command uses. """
+    files = sorted(run.files() | {case})
+    return hash_json({"command": run.command, "files": {f: hash_file(f) for f in files}})
+
+
+def _recorded(case: str) -> bool:
+    return all(os.path.exists(f"{case}.{stream}") for stream in ("stdout", "stderr"))
+
+
+def _record(run: Run, case: str) -> Optional[int]:
+    """ Runs the reference solution on case, and writes its outputs, returning the exit code. """
+    results = Pipeline(run, WriteOutputs(case))()
+    return results.returncode
+
+
+@click.command(short_help="records the expected outputs of testcases")
+@click.argument("command", nargs=-1, required=True)
+@click.option("--cases", required=True, help="glob of testcases to record outputs for")
+@click.option("--stdin", is_flag=True, help="pass each testcase as stdin, rather than an argument")
+@click.option("-j", "--jobs", default=os.cpu_count(), help="number of testcases to run at once")
+@click.option("--timeout", type=float, default=None, help="seconds each testcase may run for")
+@click.option("--manifest", default=MANIFEST, help="file to keep hashes of recorded testcases in")
+@click.option("-f", "--force", is_flag=True, help="record every testcase, even if unchanged")
+def record(command, cases, stdin, jobs, timeout, manifest, force):
+    """ Record the outputs of COMMAND for each testcase matching CASES.
+
+    Each testcase is given to COMMAND as its last argument, or in place of
+    a {} argument, or as stdin with --stdin. The outputs are written to
+    testcase.stdout and testcase.stderr, where AssertStdoutMatches and
+    AssertStderrMatches will find them.
+
+    Testcases are skipped if neither they, COMMAND, nor any file COMMAND
+    refers to, has changed since they were last recorded.
+    """
+    try:
+        with open(manifest) as f:
+            stamps = json.load(f)
+    except FileNotFoundError:
+        stamps = {}
+
+    options = {} if timeout is None else {"timeout": timeout}
+    work = []
+    testcases = [
+        case
+        for case in sorted(glob.glob(cases))
+        if os.path.isfile(case) and not case.endswith((".stdout", ".stderr"))
+    ]
+    for case in testcases:
+        # Outputs are kept as bytes, so they are recorded exactly as they were written.
+        run = Run(
+            _command(command, case, stdin),
+            input=Path(case) if stdin else None,
+            text=False,
+            **options,
+        )
+        stamp = _stamp(run, case)
+        if force or stamps.get(case) != stamp or not _recorded(case):
+            work.append((case, run, stamp))
+
+    click.echo(f"Recording {len(work)} testcases, {len(testcases) - len(work)} unchanged", err=True)
+    start = time.time()
+    # Each testcase is run in a subprocess, so threads are enough to run them in parallel.
+    with ThreadPoolExecutor(jobs) as pool:
+        futures = [(case, stamp, pool.submit(_record, run, case)) for case, run, stamp in work]
+        for done, (case, stamp, future) in enumerate(futures, 1):
+            try:
+                returncode = future.result()
+            except Exception as e:
+                click.echo(f"[{done}/{len(work)}] {case}: failed, {e!r}", err=True)
+                stamps.pop(case, None)
+                continue
+            stamps[case] = stamp
+            rate = done / max(time.time() - start, 1e-9)
+            status = "" if returncode == 0 else f", exited with {returncode}"
+            click.echo(f"[{done}/{len(work)}] {case}{status} ({rate:.2f} testcases/s)", err=True)
+
+    write_atomic(manifest, json.dumps(dict(sorted(stamps.items())), indent=4))
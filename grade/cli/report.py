@@ -4,7 +4,12 @@ This handles the CLI interface for reporting results.
 """
 
 import click
+import glob
 import json
+import os
+
+from grade.aggregate import Cohort, markdown
+from grade.journal import JOURNAL, load
 
 
 @click.command(short_help="writes results to either stdout or an output file")
@@ -17,36 +22,47 @@ import json
 @click.option(
     "--output", type=click.File("w"), default="-", help="optional file to write output to"
 )
-def report(format, output):
-    """ Report in the default format to stdout. """
-    with open(".grade", "r") as fp:
-        grades = json.load(fp)
+@click.option("--aggregate", metavar="GLOB", help="report on every results file matching GLOB")
+@click.option("-j", "--jobs", default=os.cpu_count(), help="number of files to read at once")
+def report(format, output, aggregate, jobs):
+    """ Report in the default format to stdout.
+
+    Results are read from the journal written by grade run, or from .grade
+    if there is no journal.
+
+    With --aggregate, pass rates, score distributions, the slowest tests
+    and leaderboards are reported for every results file matching GLOB,
+    such as the .grade files written by grade batch.
+    """
+    if aggregate is not None:
+        if format == "gradescope":
+            raise click.UsageError("Aggregate reports can't be written in gradescope format.")
+        filepaths = sorted(glob.glob(aggregate, recursive=True))
+        summary = Cohort.load(filepaths, jobs).summary()
+        output.write(markdown(summary) if format == "markdown" else json.dumps(summary, indent=4))
+        return
 
+    grades = _load()
     if format == "markdown":
-        score, max_score = (
-            sum((t["score"] for t in grades["tests"])),
-            sum((t["max_score"] for t in grades["tests"])),
-        )
-        output.write(
-            "\n\n".join(
-                [
-                    f"# Grade Results",
-                    f"## Autograder Score: {score}/{max_score}",
-                    *[
-                        "\n".join(
-                            [
-                                f"### {test['name']} {test['score']}/{test['max_score']}",
-                                "",
-                                f"{test['output'] if 'output' in test else ''}",
-                            ]
-                        )
-                        for test in grades["tests"]
-                    ],
-                ]
+        score, max_score = 0, 0
+        for test in grades["tests"]:
+            score += test["score"]
+            max_score += test["max_score"]
+        output.write(f"# Grade Results\n\n## Autograder Score: {score}/{max_score}")
+        for test in grades["tests"]:
+            output.write(
+                "\n\n"
+                + "\n".join(
+                    [
+                        f"### {test['name']} {test['score']}/{test['max_score']}",
+                        "",
+                        f"{test['output'] if 'output' in test else ''}",
+                    ]
+                )
             )
-        )
+        return
 
-    elif format == "gradescope":
+    if format == "gradescope":
         output.write(json.dumps(grades))
 
     elif format == "json":
@@ -54,3 +70,11 @@ def report(format, output):
 
     else:
         print(str(grades))
+
+
+def _load() -> dict:
+    """ Returns every result, from the journal if there is one. """
+    if os.path.exists(JOURNAL):
+        return load(JOURNAL)
+    with open(".grade", "r") as fp:
+        return json.load(fp)
@@ -8,15 +8,33 @@ import unittest
 
 import click
 
+from grade.journal import JOURNAL, SYNC
 from grade.runners import GradedRunner
 
 
 @click.command(short_help="runs the test suite")
 @click.option("--context", default=".", help="context to run tests from")
 @click.option("-p", "--pattern", default="test*", help="pattern to find files with")
-def run(context, pattern):
-    """ Run the autograder. """
+@click.option("-j", "--jobs", default=1, help="number of processes to run tests with")
+@click.option("--budget", type=float, help="seconds the whole suite may take")
+@click.option("--sidecars", help="directory to write mismatched outputs to in full")
+@click.option("--resume", is_flag=True, help="skip tests already recorded by an interrupted run")
+@click.option("--fsync", default=SYNC, help="seconds between syncs of results to disk")
+def run(context, pattern, jobs, budget, sidecars, resume, fsync):
+    """ Run the autograder.
+
+    Results are written to .grade once every test has run, and to
+    .grade.jsonl as each test finishes.
+    """
     suite = unittest.defaultTestLoader.discover(context, pattern=pattern)
-    results = GradedRunner(visibility="visible").run(suite)
+    results = GradedRunner(
+        visibility="visible",
+        jobs=jobs,
+        budget=budget,
+        sidecars=sidecars,
+        journal=JOURNAL,
+        resume=resume,
+        sync=fsync,
+    ).run(suite)
     with open(".grade", "w") as f:
         json.dump(results.data, f, indent=4)
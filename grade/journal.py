@@ -0,0 +1,119 @@
+""" Journal: Results written as each test finishes.
+
+grade run only writes .grade once every test has run, so a grader that is
+killed part way through would lose every result. Instead, each test's
+results are also appended to a journal as soon as it finishes, one JSON
+document per line, so the tests that did finish can still be reported, and
+skipped when the suite is run again with --resume.
+"""
+import json
+import os
+import time
+from typing import Iterator, Optional
+
+# Journal written by grade run, alongside .grade.
+JOURNAL = ".grade.jsonl"
+# Seconds between syncs of the journal to disk.
+SYNC = 1.0
+
+
+class Journal:
+    """ Appends records to a JSON lines file.
+
+    Each record is written with a single call to write, so records from
+    several processes appending to the same journal are not interleaved.
+    Records are synced to disk at most every sync seconds, and when the
+    journal is closed; a sync of zero syncs every record.
+
+    A record left partially written by a crash is removed when the journal
+    is opened again.
+    """
+
+    def __init__(self, filepath: str, sync: float = SYNC):
+        self.filepath = filepath
+        self.sync = sync
+        _repair(filepath)
+        self._fd: Optional[int] = os.open(filepath, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._synced = time.monotonic()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def append(self, record: dict) -> None:
+        """ Writes record to the end of the journal. """
+        os.write(self._fd, (json.dumps(record) + "\n").encode())
+        now = time.monotonic()
+        if now - self._synced >= self.sync:
+            os.fsync(self._fd)
+            self._synced = now
+
+    def close(self) -> None:
+        """ Syncs and closes the journal. """
+        if self._fd is not None:
+            os.fsync(self._fd)
+            os.close(self._fd)
+            self._fd = None
+
+
+def records(filepath: str) -> Iterator[dict]:
+    """ Yields each record in the journal, a line at a time.
+
+    A last record left partially written by a crash is skipped.
+    """
+    with open(filepath, "r") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                return
+            yield json.loads(line)
+
+
+def load(filepath: str) -> dict:
+    """ Returns the results in the journal, in the same format as Result.data.
+
+    Tests run in parallel are journaled as they finish, so tests are ordered
+    by id, and their durations are taken from their own records rather than
+    the summary.
+    """
+    tests, summary = [], {}
+    for record in records(filepath):
+        if "test" in record:
+            tests.append(record)
+        else:
+            summary.update(record.get("summary", {}))
+    tests.sort(key=lambda record: record.get("id", ""))
+
+    data = {
+        "tests": [record["test"] for record in tests],
+        "leaderboard": [entry for record in tests for entry in record.get("leaderboard", [])],
+    }
+    data.update(summary)
+    data["extra_data"] = {
+        **data.get("extra_data", {}),
+        "durations": [record.get("duration") for record in tests],
+    }
+    return data
+
+
+def _repair(filepath: str) -> None:
+    """ Truncates the journal after its last complete record. """
+    try:
+        f = open(filepath, "rb+")
+    except FileNotFoundError:
+        return
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        # Search backwards, a block at a time, for the end of the last complete record.
+        while position > 0:
+            start = max(0, position - (1 << 16))
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position != end:
+            f.truncate(position)
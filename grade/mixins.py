@@ -1,17 +1,15 @@
 """ Mixins.
 """
-import os
-from glob import glob
-from inspect import stack
+import sys
 from typing import List, Callable, Union, Tuple
 
+from grade.pipeline import files
+
 
 class ScoringMixin:
     """ Provides scoring utility functions.
     """
 
-    methods: List[tuple] = None
-
     def __str__(self) -> str:
         return type(self).__name__
 
@@ -19,13 +17,27 @@ class ScoringMixin:
         return [(key, getattr(self, key)) for key in dir(self) if key.startswith("test")]
 
     def getTest(self) -> Callable:
-        """ Returns the topmost test method on the stack. """
-        if not self.methods:
-            self.methods = self.getTests()
+        """ Returns the test method currently running.
 
-        caller = [frame for frame in stack() if frame.function.startswith("test")][0]
-        caller = [func for name, func in self.methods if name == caller.function][0]
-        return caller
+        unittest creates a TestCase for each test method it runs, and records
+        the method's name on it, so this is a plain attribute lookup. That is
+        safe whichever thread or process runs the test. Outside of a TestCase,
+        the innermost test method on the stack is used instead.
+        """
+        name = getattr(self, "_testMethodName", "")
+        if not name.startswith("test"):
+            name = self._caller()
+        return getattr(self, name)
+
+    def _caller(self) -> str:
+        """ Returns the name of the innermost test method of self on the stack. """
+        frame = sys._getframe(2)
+        while frame is not None:
+            name = frame.f_code.co_name
+            if name.startswith("test") and hasattr(self, name):
+                return name
+            frame = frame.f_back
+        raise LookupError(f"No test method of {self} is running.")
 
     def setattr(self, attribute, value) -> None:
         """ Updates the dictionary of the most recently called test method. """
@@ -33,20 +45,23 @@ class ScoringMixin:
 
     # noinspection PyUnresolvedReferences
     @staticmethod
-    def require(*files) -> None:
+    def require(*paths) -> None:
         """ Asserts all provided files exist.
+
+        Each file is looked up in the cached listing of its directory.
         """
-        assert files, "Nothing to require."
-        for f in files:
-            assert os.path.exists(f), f"{f} does not exist!"
+        assert paths, "Nothing to require."
+        for f in paths:
+            assert files.exists(f), f"{f} does not exist!"
 
     @staticmethod
     def find(pattern, recursive=True) -> List[str]:
         """ Returns all files matching pattern, case insensitive.
+
+        Files are found in the index of the working directory, which skips
+        directories matching files.IGNORE, such as node_modules.
         """
-        # Make it case insensitive
-        pattern = "".join(p if not p.isalpha() else f"[{p.lower()}{p.upper()}]" for p in pattern)
-        return glob(pattern, recursive=recursive)
+        return files.index().find(pattern, recursive)
 
     @property
     def weight(self) -> int:
@@ -12,10 +12,17 @@ from .asserts import (
     AssertStdoutRegex,
     AssertStderrRegex,
     AssertValgrindSuccess,
+    AssertWithinLimits,
     AssertFaster,
 )
-from .completedprocess import CompletedProcess
+from .cache import Store
+from .capture import Capture
+from .completedprocess import CompletedProcess, Measurement
+from .limits import Limits
+from .matcher import StreamMatcher
+from .patterns import PatternSet
 from .partialcredit import PartialCredit
-from .pipeline import Pipeline, Lambda
-from .run import Run
+from .persistent import Persistent, Feed
+from .pipeline import Pipeline, Lambda, gather
+from .run import Run, AsyncRun, CachedRun, Pipe
 from .write import WriteOutputs, WriteStderr, WriteStdout
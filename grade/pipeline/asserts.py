@@ -1,8 +1,12 @@
 import logging
 import re
-from os import path
-from typing import List, Pattern
+import statistics
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Pattern, Tuple, Union
 
+from . import fixtures, valgrind
+from .diff import LIMIT, common_prefix, report, truncate
+from .patterns import Matches, PatternSet
 from .completedprocess import CompletedProcess
 from .pipeline import Callback
 from .run import Run
@@ -10,6 +14,105 @@ from .run import Run
 log = logging.getLogger(__file__)
 
 
+# Whitespace stripped from bytes, as by bytes.strip().
+WHITESPACE = frozenset(b" \t\n\r\x0b\x0c")
+
+
+@contextmanager
+def _raw(results: CompletedProcess, stream: str):
+    """ Provides the bytes of stream without copying them, mapping spilled output. """
+    capture = results.capture(stream)
+    if capture is None:
+        output = getattr(results, stream)
+        yield output if isinstance(output, (bytes, bytearray)) else output.encode()
+        return
+    with capture.mmap() as data:
+        yield data
+
+
+def _binary(results: CompletedProcess, *values) -> bool:
+    """ Whether output should be compared as bytes, rather than decoded text. """
+    return not results.text or any(isinstance(v, (bytes, bytearray)) for v in values)
+
+
+def _encode(results: CompletedProcess, stream: str, value) -> bytes:
+    if isinstance(value, str):
+        capture = results.capture(stream)
+        return value.encode(capture.encoding if capture else "utf-8")
+    return value
+
+
+def _strip(view: memoryview) -> Tuple[int, int]:
+    """ Returns the bounds of view without leading and trailing whitespace. """
+    start, end = 0, len(view)
+    while start < end and view[start] in WHITESPACE:
+        start += 1
+    while end > start and view[end - 1] in WHITESPACE:
+        end -= 1
+    return start, end
+
+
+def _compare(results: CompletedProcess, stream: str, expected) -> Optional[str]:
+    """ Compares stream to expected, ignoring surrounding whitespace.
+
+    Returns None if they match, otherwise a description of how they differ.
+    Bytes, and spilled output, are compared through a memoryview, so output
+    is neither decoded nor copied.
+    """
+    capture = results.capture(stream)
+    spilled = capture is not None and capture.spilled
+    if not _binary(results, expected) and not spilled:
+        actual = getattr(results, stream).strip()
+        if actual == expected.strip():
+            return None
+        return report(stream, expected.strip(), actual)
+
+    expected = _encode(results, stream, expected).strip()
+    with _raw(results, stream) as data, memoryview(data) as view:
+        start, end = _strip(view)
+        if view[start:end] == expected:
+            return None
+        offset = common_prefix(view[start:end], expected)
+        return (
+            f"Expected {len(expected)} bytes, got {end - start} bytes, "
+            f"differing from byte {start + offset}."
+        )
+
+
+def _matches(results: CompletedProcess, stream: str, patterns: PatternSet) -> Matches:
+    """ Searches stream for patterns, mapping spilled output instead of reading it. """
+    capture = results.capture(stream)
+    binary = _binary(results, *patterns.strings, *patterns.patterns)
+    if binary or (capture is not None and capture.spilled):
+        with _raw(results, stream) as data:
+            return patterns.search(data, capture.encoding if capture else "utf-8")
+    return patterns.search(getattr(results, stream))
+
+
+def _search(results: CompletedProcess, stream: str, pattern: Pattern) -> bool:
+    """ Whether pattern is found in stream, mapping spilled output instead of reading it. """
+    capture = results.capture(stream)
+    binary = _binary(results, pattern.pattern)
+    if binary or (capture is not None and capture.spilled):
+        with _raw(results, stream) as data:
+            # Bytes patterns take the same flags, other than the implicit re.UNICODE.
+            flags = pattern.flags & ~re.UNICODE
+            return re.search(_encode(results, stream, pattern.pattern), data, flags) is not None
+    return pattern.search(getattr(results, stream)) is not None
+
+
+def _excerpt(results: CompletedProcess, stream: str) -> str:
+    """ Returns stream for use in messages, only the start of it if it was spilled. """
+    capture = results.capture(stream)
+    if capture is not None and not results.text:
+        return f"{bytes(capture.head[:LIMIT])!r} ({len(capture)} bytes total)"
+    if capture is not None and capture.spilled:
+        head = bytes(capture.head).decode(capture.encoding, errors=capture.errors)
+        return f"{head}... ({len(capture)} bytes total)"
+    output = getattr(results, stream)
+    return output if isinstance(output, str) else repr(output)
+
+
 class Check:
     """ Prevents raising exceptions, alters returncode instead.
 
@@ -75,16 +178,78 @@ class Or:
 
 class AssertFaster:
     """ Asserts that the most recent call to Run() was faster than duration.
+
+    By default wall time is compared, set cpu to compare CPU time instead,
+    which is less affected by other processes on a busy machine. CPU time
+    isn't measured for AsyncRun(), or where os.wait4 is unavailable.
+
+    Setting repeat turns on benchmarking: the most recent Run() is executed
+    warmup more times, then repeat more times while being measured. The
+    chosen statistic ("median", "mean" or "min") of those measurements is
+    compared instead, after subtracting confidence standard deviations, so
+    only runs that are slower beyond the noise fail. The measurements are kept
+    in CompletedProcess.samples, for use in leaderboards.
     """
 
-    def __init__(self, duration):
+    def __init__(
+        self,
+        duration,
+        cpu: bool = False,
+        repeat: int = None,
+        warmup: int = 0,
+        statistic: str = "median",
+        confidence: float = 0.0,
+    ):
+        if statistic not in {"median", "mean", "min"}:
+            raise ValueError(f"Unknown statistic {statistic}.")
         self.duration = duration
+        self.cpu = cpu
+        self.repeat = repeat
+        self.warmup = warmup
+        self.statistic = statistic
+        self.confidence = confidence
 
     def __call__(self, results: CompletedProcess) -> CompletedProcess:
-        if results.duration > self.duration:
-            raise AssertionError(f"{results.args} took longer than {self.duration}")
+        if not self.repeat:
+            elapsed = results.cpu_time if self.cpu else results.duration
+            if elapsed is None:
+                raise AssertionError(f"{results.args} has no CPU time to compare.")
+            if elapsed > self.duration:
+                raise AssertionError(f"{results.args} took longer than {self.duration}")
+            return results
+
+        if results.rerun is None:
+            raise ValueError(f"Cannot benchmark {results.args}, it cannot be re-run.")
+        for _ in range(self.warmup):
+            results.rerun().close()
+        results.samples = []
+        for _ in range(self.repeat):
+            with results.rerun() as sample:
+                results.samples.append(sample.measurements[-1])
+
+        summary = self.summarize(results)
+        if summary[self.statistic] - self.confidence * summary["stdev"] > self.duration:
+            raise AssertionError(
+                f"{results.args} took longer than {self.duration}, "
+                + ", ".join(f"{k}: {v:.6f}" for k, v in summary.items())
+            )
         return results
 
+    def summarize(self, results: CompletedProcess) -> Dict[str, float]:
+        """ Returns statistics of the benchmark samples, in seconds. """
+        if self.cpu:
+            times = [sample.cpu for sample in results.samples]
+            if None in times:
+                raise AssertionError(f"{results.args} has no CPU time to compare.")
+        else:
+            times = [sample.wall / 1e9 for sample in results.samples]
+        return {
+            "median": statistics.median(times),
+            "mean": statistics.mean(times),
+            "min": min(times),
+            "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        }
+
 
 class AssertExitSuccess:
     """ Asserts that the CompletedProcess exited successfully. """
@@ -96,8 +261,8 @@ class AssertExitSuccess:
                     [
                         f"{results.args} should have exited successfully.",
                         f"{results.returncode} != 0",
-                        results.stdout,
-                        results.stderr,
+                        truncate(_excerpt(results, "stdout")),
+                        truncate(_excerpt(results, "stderr")),
                     ]
                 )
             )
@@ -127,18 +292,50 @@ class AssertExitStatus:
         return results
 
 
+class AssertWithinLimits:
+    """ Asserts that the CompletedProcess did not exceed any of its limits.
+
+    Limits are the resource limits given to Run(), and its max_output.
+    """
+
+    def __call__(self, results: CompletedProcess) -> CompletedProcess:
+        if results.exceeded is not None:
+            raise AssertionError(f"{results.args} exceeded its {results.exceeded} limit.")
+        return results
+
+
 class AssertValgrindSuccess:
-    """ Asserts that there are no valgrind errors reported. """
+    """ Asserts that there are no valgrind errors reported.
+
+    If the command was run with Run(..., under_valgrind=True), the errors from
+    that run are checked. Otherwise, the command is run again under valgrind,
+    with the same input and options, unless a verdict for the same binary and
+    input has already been reached.
+    """
 
     def __call__(self, results: CompletedProcess) -> CompletedProcess:
-        if type(results.args) is list:
-            # TODO: Add --exit-on-first-error=yes back in when valgrind > 3.13 is available
-            results = Run(["valgrind", "-q", "--error-exitcode=1", *results.args])()
-        elif type(results.args) is str:
-            results = Run(f"valgrind -q --error-exitcode=1 {results.args}", shell=True)()
-        results = AssertExitSuccess()(results)
+        errors = results.valgrind
+        if errors is None:
+            errors = self.check(results)
+        if errors:
+            raise AssertionError(
+                "\n".join([f"{results.args} has valgrind errors:", *(str(e) for e in errors)])
+            )
         return results
 
+    @staticmethod
+    def check(results: CompletedProcess) -> List[valgrind.ValgrindError]:
+        """ Returns the valgrind errors for results, running valgrind if necessary. """
+        origin = results.origin
+        input = origin.input if origin is not None else None
+        key = valgrind.key(results.args, input)
+        if key not in valgrind.verdicts:
+            kwargs = origin.kwargs if origin is not None else {}
+            if type(results.args) is str:
+                kwargs = {**kwargs, "shell": True}
+            Run(results.args, input=input, under_valgrind=True, **kwargs)().close()
+        return valgrind.verdicts[key]
+
 
 class AssertStdoutMatches:
     """ Asserts that the program's stdout matches expected.
@@ -149,37 +346,33 @@ class AssertStdoutMatches:
         - Specify neither, and it will look through the files contained in
           CompletedProcess.args for a file that has a counterpart named
           file.stdout, which it will take and use as stdout.
+
+    Fixtures are found and read through the fixtures module, which caches
+    them. Instances hold no state between calls, so one can be shared by
+    many pipelines, even across threads.
+
+    If stdout is bytes, or the results came from Run(text=False), output is
+    compared as bytes, and fixtures are read as bytes.
     """
 
-    def __init__(self, stdout: str = None, filepath: str = None):
+    def __init__(self, stdout: Union[str, bytes] = None, filepath: str = None):
         if stdout and filepath:
             raise ValueError("Can only pass one of stdout or filepath.")
-        elif filepath:
-            with open(filepath, "r") as f:
-                self.stdout = f.read()
-        else:
-            self.stdout = stdout
+        self.stdout = stdout
+        self.filepath = filepath
 
     def __call__(self, results: CompletedProcess) -> CompletedProcess:
-        if self.stdout is not None:
-            pass
-        elif type(results.args) is list:
-            self.stdout = list(filter(lambda f: path.exists(f + ".stdout"), results.args))
-            assert len(self.stdout) == 1
-            with open(self.stdout[0] + ".stdout", "r") as f:
-                self.stdout = f.read()
-        else:
-            raise ValueError(f"Cannot infer stdout file for {results.args}")
-
-        if results.stdout.strip() != self.stdout.strip():
+        binary = _binary(results, self.stdout)
+        expected = fixtures.expected(results, "stdout", self.stdout, self.filepath, binary)
+        difference = _compare(results, "stdout", expected)
+        if difference is not None:
+            diverged = (
+                f" It diverged at byte {results.divergence}."
+                if results.divergence is not None
+                else ""
+            )
             raise AssertionError(
-                "\n".join(
-                    [
-                        f"{results.args} stdout does not match expected.",
-                        f"{self.stdout.strip()} !=",
-                        f"{results.stdout.strip()}",
-                    ]
-                )
+                "\n".join([f"{results.args} stdout does not match expected.{diverged}", difference])
             )
         return results
 
@@ -193,90 +386,97 @@ class AssertStderrMatches:
         - Specify neither, and it will look through the files contained in
           CompletedProcess.args for a file that has a counterpart named
           file.stderr, which it will take an use as stderr.
+
+    Like AssertStdoutMatches, instances hold no state between calls, and
+    compare bytes when given bytes.
     """
 
-    def __init__(self, stderr: str = None, filepath: str = None):
+    def __init__(self, stderr: Union[str, bytes] = None, filepath: str = None):
         if stderr and filepath:
             raise ValueError("Can only pass one of stderr and filepath.")
-        elif filepath:
-            with open(filepath, "r") as f:
-                self.stderr = f.read()
-        else:
-            self.stderr = stderr
+        self.stderr = stderr
+        self.filepath = filepath
 
     def __call__(self, results: CompletedProcess) -> CompletedProcess:
-        if self.stderr is not None:
-            pass
-
-        elif type(results.args) is list:
-            self.stderr = list(filter(lambda f: path.exists(f + ".stderr"), results.args))
-            assert len(self.stderr) == 1
-            with open(self.stderr[0] + ".stderr", "r") as f:
-                self.stderr = f.read()
-
-        else:
-            raise ValueError(f"Cannot infer stderr file of {results.args}")
-
-        if results.stderr.strip() != self.stderr.strip():
+        binary = _binary(results, self.stderr)
+        expected = fixtures.expected(results, "stderr", self.stderr, self.filepath, binary)
+        difference = _compare(results, "stderr", expected)
+        if difference is not None:
             raise AssertionError(
-                "\n".join(
-                    [
-                        f"{results.args} stderr does not match expected.",
-                        f"{self.stderr.strip()} !=",
-                        f"{results.stderr.strip()}",
-                    ]
-                )
+                "\n".join([f"{results.args} stderr does not match expected.", difference])
             )
         return results
 
 
 class AssertStdoutRegex:
     """ Asserts programs' stdout contains the regex pattern provided.
+
+    If stdout was spilled to disk, it is searched as bytes. Bytes patterns
+    are searched for in the raw bytes of stdout.
     """
 
-    def __init__(self, pattern: str):
+    def __init__(self, pattern: Union[str, bytes]):
         self.pattern: Pattern = re.compile(pattern)
 
     def __call__(self, results: CompletedProcess) -> CompletedProcess:
-        if not self.pattern.search(results.stdout):
-            raise AssertionError(f"{self.pattern.pattern} not found in {results.stdout}")
+        if not _search(results, "stdout", self.pattern):
+            raise AssertionError(
+                f"{self.pattern.pattern} not found in {_excerpt(results, 'stdout')}"
+            )
         return results
 
 
 class AssertStderrRegex:
     """ Asserts programs' stderr contains the regex pattern provided.
+
+    If stderr was spilled to disk, it is searched as bytes. Bytes patterns
+    are searched for in the raw bytes of stderr.
     """
 
-    def __init__(self, pattern: str):
+    def __init__(self, pattern: Union[str, bytes]):
         self.pattern: Pattern = re.compile(pattern)
 
     def __call__(self, results: CompletedProcess) -> CompletedProcess:
-        if not self.pattern.search(results.stderr):
-            raise AssertionError(f"{self.pattern.pattern} not found in {results.stderr}")
+        if not _search(results, "stderr", self.pattern):
+            raise AssertionError(
+                f"{self.pattern.pattern} not found in {_excerpt(results, 'stderr')}"
+            )
         return results
 
 
 class AssertStdoutContains:
     """ Asserts programs' stdout contains all of the string(s) provided.
+
+    Regex patterns can be checked at the same time with patterns, which
+    is much faster than stacking AssertStdoutRegex for many of them.
+    Which strings and patterns were found is kept in CompletedProcess.matches.
     """
 
-    def __init__(self, strings: List[str]):
+    def __init__(self, strings: List[str] = (), patterns: List[str] = ()):
         self.strings = strings
+        self.patterns = PatternSet(strings, patterns)
 
     def __call__(self, results: CompletedProcess) -> CompletedProcess:
-        if not all(s in results.stdout for s in self.strings):
-            raise AssertionError(f"One or more of {self.strings} not in {results.stdout}")
+        results.matches = _matches(results, "stdout", self.patterns)
+        missing = self.patterns.missing(results.matches)
+        if missing:
+            raise AssertionError(f"{missing} not in {_excerpt(results, 'stdout')}")
         return results
 
 
 class AssertStderrContains:
     """ Assert programs' stderr contains all of the string(s) provided.
+
+    Like AssertStdoutContains, regex patterns can be checked at the same time.
     """
 
-    def __init__(self, strings: List[str]):
+    def __init__(self, strings: List[str] = (), patterns: List[str] = ()):
         self.strings = strings
+        self.patterns = PatternSet(strings, patterns)
 
     def __call__(self, results: CompletedProcess) -> CompletedProcess:
-        if not all(s in results.stderr for s in self.strings):
-            raise AssertionError(f"One or more of {self.strings} not in {results.stderr}")
+        results.matches = _matches(results, "stderr", self.patterns)
+        missing = self.patterns.missing(results.matches)
+        if missing:
+            raise AssertionError(f"{missing} not in {_excerpt(results, 'stderr')}")
         return results
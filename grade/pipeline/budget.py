@@ -0,0 +1,59 @@
+""" Budget: A time budget shared by every test in a suite.
+
+Without a budget, each Run() may take up to its own timeout, so a suite
+full of hanging programs can take hours. With one, every submission is
+graded in bounded time: each test is given a share of the remaining time
+in proportion to its weight, and Run() never waits past the end of it.
+"""
+import time
+from typing import Optional
+
+
+class Budget:
+    """ Divides seconds between tests with a total weight of weight.
+
+    Tests without a weight are counted as weighing 1. Time a test doesn't
+    use is left for the tests after it.
+    """
+
+    def __init__(self, seconds: float, weight: float = 0):
+        self.deadline = time.monotonic() + seconds
+        self.weight = weight
+        # Deadline of the test currently running, if any.
+        self.test: Optional[float] = None
+
+    @property
+    def remaining(self) -> float:
+        """ Returns the seconds left in the budget. """
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """ Whether or not the budget has run out. """
+        return self.remaining == 0
+
+    def start(self, weight: float) -> float:
+        """ Gives the next test its share of the remaining time, returns that share. """
+        weight = share(weight)
+        allowance = self.remaining * min(1.0, weight / max(self.weight, weight))
+        self.weight = max(0.0, self.weight - weight)
+        self.test = time.monotonic() + allowance
+        return allowance
+
+    def timeout(self, timeout: Optional[float]) -> float:
+        """ Returns timeout, cut short so it ends within the current test's share.
+
+        A timeout of None, no timeout at all, is the rest of the share.
+        """
+        deadline = self.test if self.test is not None else self.deadline
+        remaining = max(0.0, deadline - time.monotonic())
+        return remaining if timeout is None else min(timeout, remaining)
+
+
+def share(weight) -> float:
+    """ Returns the weight a test counts as when dividing the budget. """
+    return max(weight or 0, 1)
+
+
+# Budget of the suite currently running, set by GradedRunner.
+suite: Optional[Budget] = None
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import tempfile
+from collections import Counter
+from functools import lru_cache
+from subprocess import run, PIPE, DEVNULL, CompletedProcess as Subprocess
+from typing import Dict, List, Optional, Tuple
+
+from .capture import Capture
+from .completedprocess import CompletedProcess, Measurement
+
+CACHE = os.environ.get("GRADE_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "grade"))
+
+
+def hash_file(filepath: str) -> str:
+    """ Returns the sha256 of a file's contents. """
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_json(value) -> str:
+    """ Returns the sha256 of any JSON serializable value.
+
+    Bytes are hashed as hex, and paths as strings.
+    """
+    encoded = json.dumps(value, sort_keys=True, default=_serializable)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _serializable(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if isinstance(value, os.PathLike):
+        return os.fspath(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+@lru_cache(maxsize=None)
+def _version(executable: str, mtime: float) -> str:
+    try:
+        process = run([executable, "--version"], stdout=PIPE, stderr=DEVNULL, timeout=60)
+    except OSError:
+        return ""
+    return process.stdout.decode("utf-8", errors="ignore")
+
+
+def version(command) -> str:
+    """ Returns the output of --version for the program that command runs. """
+    program = shlex.split(command)[0] if isinstance(command, str) else command[0]
+    executable = shutil.which(program)
+    if executable is None:
+        return ""
+    return _version(executable, os.path.getmtime(executable))
+
+
+class Store:
+    """ An on-disk store of cache entries.
+
+    Each entry is a directory holding a metadata file plus any number of
+    files. Entries are evicted, least recently used first, once the store
+    grows beyond max_size bytes. Entries are written atomically, so a store
+    can be shared by several grading processes.
+
+    The store defaults to ~/.cache/grade, or $GRADE_CACHE if it is set.
+
+    Store.statistics counts hits and misses across every store in the process.
+    """
+
+    statistics = Counter()
+
+    def __init__(self, directory: str = CACHE, max_size: int = 1 << 30):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str) -> Optional[dict]:
+        """ Returns the metadata stored under key, or None. """
+        entry = os.path.join(self.directory, key)
+        try:
+            with open(os.path.join(entry, "meta.json"), "r") as f:
+                metadata = json.load(f)
+            os.utime(entry)
+        except (OSError, ValueError):
+            self.misses += 1
+            self.statistics["misses"] += 1
+            return None
+        self.hits += 1
+        self.statistics["hits"] += 1
+        return metadata
+
+    def file(self, key: str, name) -> str:
+        """ Returns the path of a file stored under key, files are named by index. """
+        return os.path.join(self.directory, key, str(name))
+
+    def read(self, key: str, name: str) -> bytes:
+        """ Returns the contents of a blob stored under key. """
+        with open(self.file(key, name), "rb") as f:
+            return f.read()
+
+    def put(
+        self, key: str, metadata: dict, files: List[str] = (), blobs: Dict[str, bytes] = None
+    ) -> None:
+        """ Stores metadata, copies of files and named blobs of bytes under key. """
+        temp = tempfile.mkdtemp(dir=self.directory, prefix=".")
+        try:
+            for index, filepath in enumerate(files):
+                shutil.copy2(filepath, os.path.join(temp, str(index)))
+            for name, data in (blobs or {}).items():
+                with open(os.path.join(temp, name), "wb") as f:
+                    f.write(data)
+            with open(os.path.join(temp, "meta.json"), "w") as f:
+                json.dump(metadata, f)
+        except BaseException:
+            shutil.rmtree(temp, ignore_errors=True)
+            raise
+        try:
+            os.rename(temp, os.path.join(self.directory, key))
+        except OSError:
+            # Another process stored the same entry first.
+            shutil.rmtree(temp, ignore_errors=True)
+        self.evict()
+
+    def evict(self) -> None:
+        """ Removes the least recently used entries until the store fits in max_size. """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(entry.path))
+            entries.append((entry.stat().st_mtime, size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+def dump(results: CompletedProcess) -> Tuple[dict, Dict[str, bytes]]:
+    """ Splits results into JSON metadata and blobs of output, for a Store. """
+    args = results.args
+    metadata = {
+        "args": args if isinstance(args, str) else [os.fspath(arg) for arg in args],
+        "returncode": results.returncode,
+        "exceeded": results.exceeded,
+        "text": results.text,
+        "measurement": results.measurements[-1],
+    }
+    blobs = {}
+    for stream in ("stdout", "stderr"):
+        capture = results.capture(stream)
+        if capture is not None:
+            blobs[stream] = capture.getvalue()
+        else:
+            output = getattr(results, stream)
+            blobs[stream] = output if isinstance(output, bytes) else output.encode()
+    return metadata, blobs
+
+
+def load(metadata: dict, stdout: bytes, stderr: bytes) -> CompletedProcess:
+    """ Recreates a CompletedProcess from its metadata and output. """
+    process = Subprocess(
+        metadata["args"], metadata["returncode"], Capture.of(stdout), Capture.of(stderr)
+    )
+    results = CompletedProcess(process, metadata.get("text", True))
+    results.exceeded = metadata["exceeded"]
+    results.measurements = [Measurement(*metadata["measurement"])]
+    results.duration = results.measurements[-1].wall / 1e9
+    return results
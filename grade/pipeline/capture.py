@@ -0,0 +1,111 @@
+import mmap
+from contextlib import contextmanager
+from tempfile import TemporaryFile
+from typing import Optional
+
+
+class Capture:
+    """ Collects the output of a stream, such as a process' stdout.
+
+    The first `memory` bytes are always kept in memory. Once the output grows
+    past that, all of it is written to a temporary file instead, which can be
+    mapped with Capture.mmap() rather than read. If memory is None, the output
+    is never spilled to disk.
+
+    If limit is given, any bytes after the first `limit` are discarded, and
+    Capture.exceeded is set.
+
+    Output is stored as raw bytes, and only decoded when Capture.text is used.
+    Closing a Capture removes its temporary file, it can also be used as a
+    context manager.
+    """
+
+    def __init__(
+        self,
+        memory: Optional[int] = None,
+        limit: Optional[int] = None,
+        encoding: str = "utf-8",
+        errors: str = "ignore",
+    ):
+        self.memory = memory
+        self.limit = limit
+        self.encoding = encoding
+        self.errors = errors
+        self.head = bytearray()
+        self.file = None
+        self.size = 0
+        self.exceeded = False
+        self._text = None
+
+    @classmethod
+    def of(cls, data: bytes, **kwargs) -> "Capture":
+        """ Returns a Capture already holding data. """
+        capture = cls(**kwargs)
+        capture.write(data)
+        return capture
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __enter__(self) -> "Capture":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """ Closes the temporary file spilled output was written to, if any. """
+        if self.file is not None:
+            self.file.close()
+
+    @property
+    def spilled(self) -> bool:
+        """ Whether or not output has been written to disk. """
+        return self.file is not None
+
+    def write(self, data: bytes) -> bool:
+        """ Stores data, returns False once the limit has been exceeded. """
+        if self.limit is not None and self.size + len(data) > self.limit:
+            data = data[: self.limit - self.size]
+            self.exceeded = True
+        self.size += len(data)
+
+        if self.file is None and (self.memory is None or self.size <= self.memory):
+            self.head += data
+            return not self.exceeded
+
+        if self.file is None:
+            self.file = TemporaryFile()
+            self.file.write(self.head)
+            self.head += data[: self.memory - len(self.head)]
+        self.file.write(data)
+        return not self.exceeded
+
+    def getvalue(self) -> bytes:
+        """ Returns all of the captured bytes, reading them from disk if necessary. """
+        if self.file is None:
+            return bytes(self.head)
+        self.file.flush()
+        self.file.seek(0)
+        return self.file.read()
+
+    @property
+    def text(self) -> str:
+        """ Returns the decoded output, decoding it on first use. """
+        if self._text is None:
+            self._text = self.getvalue().decode(self.encoding, errors=self.errors)
+        return self._text
+
+    @contextmanager
+    def mmap(self):
+        """ Provides the captured bytes without loading spilled output into memory.
+
+        The object provided supports find() and can be searched by compiled
+        bytes patterns from the re module.
+        """
+        if self.file is None:
+            yield self.head
+            return
+        self.file.flush()
+        with mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
@@ -1,20 +1,91 @@
 from subprocess import CompletedProcess as Subprocess
-from typing import Union
+from typing import Callable, List, NamedTuple, Union, Optional
+
+from .capture import Capture
+
+
+class Measurement(NamedTuple):
+    """ Resources used by a single call to Run().
+
+    Wall time is in nanoseconds, user and system CPU time are in seconds,
+    and peak resident set size is in kilobytes. Anything that could not be
+    measured on the current platform is None.
+    """
+
+    wall: int
+    user: Optional[float]
+    system: Optional[float]
+    rss: Optional[int]
+
+    @property
+    def cpu(self) -> Optional[float]:
+        """ Returns the total CPU time, in seconds. """
+        if self.user is None or self.system is None:
+            return None
+        return self.user + self.system
 
 
 class CompletedProcess:
-    def __init__(self, process: Subprocess):
+    def __init__(self, process: Subprocess, text: bool = True):
         self.process: Subprocess = process
-        # TODO: Duration should be a stack of durations for each run call.
+        # Whether stdout and stderr are decoded, or returned as bytes.
+        self.text = text
+        # Wall time of the most recent run, in seconds.
         self.duration: Union[float, None] = None
+        # One measurement per call to Run() in the pipeline, most recent last.
+        self.measurements: List[Measurement] = []
+        # Measurements of repeated runs, collected by AssertFaster when benchmarking.
+        self.samples: List[Measurement] = []
+        # Executes the same command again, returning a new CompletedProcess.
+        self.rerun: Optional[Callable[[], "CompletedProcess"]] = None
+        # The Run() these results came from, if any.
+        self.origin = None
+        # Errors reported by valgrind, if the command was run under valgrind.
+        self.valgrind: Optional[list] = None
+        # Name of the limit the process was killed for exceeding, if any.
+        self.exceeded: Optional[str] = None
+        # Outcome of matching stdout while the process ran, see StreamMatcher.
+        self.verdict: Optional[str] = None
+        # Offset into stdout where it stopped matching, if it did.
+        self.divergence: Optional[int] = None
+        # Strings and patterns found by the most recent Assert*Contains.
+        self.matches = None
+
+    def __enter__(self) -> "CompletedProcess":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """ Closes the Captures of stdout and stderr, removing any spilled output. """
+        for stream in ("stdout", "stderr"):
+            capture = self.capture(stream)
+            if capture is not None:
+                capture.close()
+
+    @property
+    def cpu_time(self) -> Optional[float]:
+        """ Returns the CPU time of the most recent run, in seconds. """
+        return self.measurements[-1].cpu if self.measurements else None
 
     @property
     def stderr(self):
-        return self.process.stderr
+        return self._text(self.process.stderr)
 
     @property
     def stdout(self):
-        return self.process.stdout
+        return self._text(self.process.stdout)
+
+    def _text(self, output):
+        if not isinstance(output, Capture):
+            return output
+        return output.text if self.text else output.getvalue()
+
+    def capture(self, stream: str) -> Optional[Capture]:
+        """ Returns the Capture behind stream ("stdout" or "stderr"), if there is one. """
+        output = getattr(self.process, stream)
+        return output if isinstance(output, Capture) else None
 
     @property
     def args(self):
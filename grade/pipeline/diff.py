@@ -0,0 +1,113 @@
+""" Diff: Bounded reports of how output differs from what was expected.
+
+Putting both outputs in full into an AssertionError lets a single test
+produce a multi-megabyte results file. Instead, diff() finds the first
+region where the outputs differ, and renders it as a unified diff with a
+few lines of context, capped at a fixed number of characters.
+
+Set sidecars to a directory to also write both outputs to files there,
+so they can still be inspected in full.
+"""
+import os
+from difflib import SequenceMatcher
+from typing import List, Optional, Sequence
+
+from .cache import hash_json
+
+# Characters of diff put in a message.
+LIMIT = 1 << 12
+# Lines of context shown around each change.
+CONTEXT = 3
+# Lines, from the first difference on, that are compared.
+WINDOW = 200
+
+# Directory full outputs are written to, if any.
+sidecars: Optional[str] = None
+
+
+def common_prefix(a: Sequence, b: Sequence) -> int:
+    """ Returns the length of the longest common prefix of a and b. """
+    low, high = 0, min(len(a), len(b))
+    # Binary search on slice equality, which compares in C rather than an item at a time.
+    while low < high:
+        middle = (low + high) // 2
+        if a[low : middle + 1] == b[low : middle + 1]:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def common_suffix(a: Sequence, b: Sequence) -> int:
+    """ Returns the length of the longest common suffix of a and b. """
+    return common_prefix(a[::-1], b[::-1])
+
+
+def truncate(text: str, limit: int = LIMIT) -> str:
+    """ Returns text, cut down to limit characters. """
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}\n... ({len(text) - limit} more characters)"
+
+
+def diff(
+    expected: str, actual: str, context: int = CONTEXT, limit: int = LIMIT, window: int = WINDOW
+) -> str:
+    """ Returns a unified diff of the first region where expected and actual differ.
+
+    Common lines at the start and end are skipped without being diffed, and
+    at most window lines after the first difference are compared, so the
+    time taken doesn't grow with the size of the outputs.
+    """
+    a = expected.splitlines()
+    b = actual.splitlines()
+    start = common_prefix(a, b)
+    end = common_suffix(a[start:], b[start:])
+    a_stop = min(len(a) - end, start + window)
+    b_stop = min(len(b) - end, start + window)
+    # Include the context around the region, from the lines that were skipped.
+    first = max(0, start - context)
+    a_last = min(len(a), a_stop + context)
+    b_last = min(len(b), b_stop + context)
+
+    lines = ["--- expected", "+++ actual"]
+    matcher = SequenceMatcher(None, a[first:a_last], b[first:b_last], autojunk=False)
+    for group in matcher.get_grouped_opcodes(context):
+        lines.append(_hunk(group, first))
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                lines += [f" {line}" for line in a[first + i1 : first + i2]]
+                continue
+            lines += [f"-{line}" for line in a[first + i1 : first + i2]]
+            lines += [f"+{line}" for line in b[first + j1 : first + j2]]
+    if a_stop < len(a) - end or b_stop < len(b) - end:
+        lines.append(f"... only the first {window} differing lines were compared")
+    return truncate("\n".join(lines), limit)
+
+
+def _hunk(group: List[tuple], offset: int) -> str:
+    """ Returns the header of a hunk, with line numbers counted from offset. """
+    a = (group[0][1], group[-1][2])
+    b = (group[0][3], group[-1][4])
+    return "@@ -{} +{} @@".format(*(_range(o + offset, n - o) for o, n in (a, b)))
+
+
+def _range(start: int, length: int) -> str:
+    if length == 1:
+        return f"{start + 1}"
+    # Empty ranges are numbered by the line before them.
+    return f"{start + 1 if length else start},{length}"
+
+
+def report(name: str, expected: str, actual: str) -> str:
+    """ Returns a diff of expected and actual, writing them to sidecars if it is set. """
+    message = diff(expected, actual)
+    if sidecars is None:
+        return message
+
+    os.makedirs(sidecars, exist_ok=True)
+    prefix = os.path.join(sidecars, hash_json([name, expected, actual])[:16])
+    for suffix, text in [("expected", expected), ("actual", actual)]:
+        with open(f"{prefix}.{name}.{suffix}", "w") as f:
+            f.write(text)
+    return f"{message}\nFull {name} written to {prefix}.{name}.{{expected,actual}}"
@@ -0,0 +1,202 @@
+""" Files: A cached index of the files in a submission.
+
+Globbing the submission with every call to ScoringMixin.find walks the
+whole tree again, including dependencies such as node_modules. Instead,
+each directory is listed once, and listed again only when its modification
+time changes, which is whenever a file is added to, removed from, or
+renamed within it. A FileIndex walks the listings under its root, skipping
+directories that match its ignore patterns, and only walks them again when
+one of them has changed.
+
+The same listings are used to find fixtures, and to check that files exist.
+"""
+import fnmatch
+import glob
+import os
+from threading import Lock
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Directories that are never indexed, as they hold dependencies rather than submissions.
+IGNORE = (".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv")
+
+
+class Listing(NamedTuple):
+    """ The contents of a directory, as of its modification time.
+
+    Symbolic links to directories are listed as files, so that walks
+    through listings never follow them.
+    """
+
+    mtime: Optional[int]
+    files: Tuple[str, ...]
+    directories: Tuple[str, ...]
+    names: FrozenSet[str]
+
+
+EMPTY = Listing(None, (), (), frozenset())
+
+_listings: Dict[str, Listing] = {}
+_indexes: Dict[Tuple[str, Tuple[str, ...]], "FileIndex"] = {}
+_lock = Lock()
+
+
+def listing(directory: str) -> Listing:
+    """ Returns the contents of directory, listing it again only if it has changed. """
+    directory = os.path.abspath(directory)
+    try:
+        mtime = os.stat(directory).st_mtime_ns
+    except OSError:
+        return EMPTY
+
+    with _lock:
+        cached = _listings.get(directory)
+    if cached is not None and cached.mtime == mtime:
+        return cached
+
+    files, directories = [], []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                real = entry.is_dir(follow_symlinks=False)
+                (directories if real else files).append(entry.name)
+    except OSError:
+        return EMPTY
+    files.sort()
+    directories.sort()
+    result = Listing(mtime, tuple(files), tuple(directories), frozenset(files + directories))
+    with _lock:
+        _listings[directory] = result
+    return result
+
+
+def exists(path: str) -> bool:
+    """ Returns whether path exists, using the listing of its directory. """
+    directory, name = os.path.split(os.path.normpath(path))
+    if name in ("", ".", ".."):
+        return os.path.exists(path)
+    return name in listing(directory or ".").names
+
+
+def index(root: str = ".", ignore: Optional[Iterable[str]] = None) -> "FileIndex":
+    """ Returns the FileIndex of root, which is shared by everything that uses it. """
+    key = (os.path.abspath(root), tuple(IGNORE if ignore is None else ignore))
+    with _lock:
+        if key not in _indexes:
+            _indexes[key] = FileIndex(*key)
+        return _indexes[key]
+
+
+def clear() -> None:
+    """ Forgets every listing and index, forcing directories to be listed again. """
+    with _lock:
+        _listings.clear()
+        _indexes.clear()
+
+
+class FileIndex:
+    """ Every file and directory under root, except those that are ignored.
+
+    Paths are relative to root, and ignore is a list of glob patterns for
+    the names of directories that are skipped.
+
+    >>> FileIndex('submission').find('**/*.py')
+    ['main.py', 'utils/Parser.py']
+    """
+
+    def __init__(self, root: str = ".", ignore: Iterable[str] = IGNORE):
+        self.root = os.path.abspath(root)
+        self.ignore = tuple(ignore)
+        self._listings: Dict[str, Listing] = {}
+        self._paths: List[Tuple[str, Tuple[str, ...], bool]] = []
+        self._lock = Lock()
+
+    def ignored(self, name: str) -> bool:
+        """ Returns whether directories named name are skipped. """
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.ignore)
+
+    def paths(self) -> List[Tuple[str, Tuple[str, ...], bool]]:
+        """ Returns every path, its case folded parts, and whether it is a directory.
+
+        Only the directories that have changed since the last call are listed again.
+        """
+        with self._lock:
+            if self._listings and all(
+                listing(os.path.join(self.root, directory)) is cached
+                for directory, cached in self._listings.items()
+            ):
+                return self._paths
+
+            listings, paths = {}, []
+            pending = [""]
+            while pending:
+                directory = pending.pop()
+                current = listings[directory] = listing(os.path.join(self.root, directory))
+                for name in current.files:
+                    path = os.path.join(directory, name)
+                    paths.append((path, _parts(path), False))
+                for name in current.directories:
+                    if not self.ignored(name):
+                        path = os.path.join(directory, name)
+                        paths.append((path, _parts(path), True))
+                        pending.append(path)
+            paths.sort()
+            self._listings, self._paths = listings, paths
+            return paths
+
+    def find(self, pattern: str, recursive: bool = True) -> List[str]:
+        """ Returns every path matching the glob pattern, ignoring case.
+
+        Like glob, ** matches any number of directories if recursive is set,
+        and wildcards don't match names that start with a dot. Patterns that
+        reach outside of root, or into an ignored directory, are globbed.
+        """
+        prefix = "./" if pattern.startswith("./") else ""
+        parts = _parts(os.path.normpath(pattern))
+        literal = parts[: _wildcard(parts)]
+        if os.path.isabs(pattern) or ".." in parts or any(self.ignored(p) for p in literal):
+            return _glob(pattern, recursive)
+        if not recursive:
+            parts = tuple("*" if part == "**" else part for part in parts)
+
+        directories = pattern.endswith("/")
+        return [
+            prefix + path
+            for path, folded, directory in self.paths()
+            if (directory or not directories) and _match(parts, folded)
+        ]
+
+
+def _parts(path: str) -> Tuple[str, ...]:
+    """ Returns the case folded components of path. """
+    return tuple(path.casefold().split(os.sep))
+
+
+def _wildcard(parts: Sequence[str]) -> int:
+    """ Returns the index of the first part with a wildcard in it. """
+    for i, part in enumerate(parts):
+        if glob.has_magic(part):
+            return i
+    return len(parts)
+
+
+def _match(pattern: Sequence[str], path: Sequence[str]) -> bool:
+    """ Returns whether the parts of path match the parts of pattern. """
+    if not pattern:
+        return not path
+    head, rest = pattern[0], pattern[1:]
+    if head == "**":
+        for i in range(len(path) + 1):
+            if _match(rest, path[i:]):
+                return True
+            if i < len(path) and path[i].startswith("."):
+                return False
+        return False
+    if not path or (path[0].startswith(".") and not head.startswith(".")):
+        return False
+    return fnmatch.fnmatchcase(path[0], head) and _match(rest, path[1:])
+
+
+def _glob(pattern: str, recursive: bool) -> List[str]:
+    """ Returns every path matching pattern, ignoring case, without an index. """
+    pattern = "".join(p if not p.isalpha() else f"[{p.lower()}{p.upper()}]" for p in pattern)
+    return glob.glob(pattern, recursive=recursive)
@@ -0,0 +1,95 @@
+""" Fixtures: Finding and reading the expected outputs of testcases.
+
+A testcase's expected outputs are kept next to it, as testcase.stdout and
+testcase.stderr. Rather than checking every argument of every command for
+fixtures, they are looked up in the cached listing of each directory, see
+files.listing(). Fixture contents are kept in a process-wide LRU cache,
+keyed by path and modification time, so a fixture shared by many pipelines
+is only read once.
+"""
+import os
+from functools import lru_cache
+from threading import Lock
+from typing import Dict, List, Optional, Tuple, Union
+
+from . import files
+
+STREAMS = ("stdout", "stderr")
+
+_indexes: Dict[str, Tuple[files.Listing, Dict[str, Dict[str, str]]]] = {}
+_lock = Lock()
+
+
+def index(directory: str) -> Dict[str, Dict[str, str]]:
+    """ Returns a mapping of stream, to testcase name, to fixture path, for directory. """
+    directory = os.path.abspath(directory)
+    current = files.listing(directory)
+    with _lock:
+        cached = _indexes.get(directory)
+        if cached is not None and cached[0] is current:
+            return cached[1]
+
+    fixtures: Dict[str, Dict[str, str]] = {stream: {} for stream in STREAMS}
+    for filename in current.files:
+        name, extension = os.path.splitext(filename)
+        stream = extension[1:]
+        if stream in fixtures:
+            fixtures[stream][name] = os.path.join(directory, filename)
+    with _lock:
+        _indexes[directory] = (current, fixtures)
+    return fixtures
+
+
+def infer(args, stream: str) -> List[str]:
+    """ Returns the fixtures for stream of every argument in args that has one. """
+    found = []
+    for arg in args:
+        if not isinstance(arg, str):
+            continue
+        directory, name = os.path.split(arg)
+        fixture = index(directory or ".")[stream].get(name)
+        if fixture is not None:
+            found.append(fixture)
+    return found
+
+
+def read(filepath: str, binary: bool = False) -> Union[str, bytes]:
+    """ Returns the contents of a fixture, from the cache if it hasn't changed. """
+    stat = os.stat(filepath)
+    return _read(os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size, binary)
+
+
+@lru_cache(maxsize=256)
+def _read(filepath: str, mtime: int, size: int, binary: bool) -> Union[str, bytes]:
+    with open(filepath, "rb" if binary else "r") as f:
+        return f.read()
+
+
+def clear() -> None:
+    """ Forgets every directory listing and fixture, forcing them to be read again. """
+    with _lock:
+        _indexes.clear()
+    files.clear()
+    _read.cache_clear()
+
+
+def expected(
+    results,
+    stream: str,
+    given: Union[str, bytes, None] = None,
+    filepath: Optional[str] = None,
+    binary: bool = False,
+) -> Union[str, bytes]:
+    """ Returns the expected output for stream, as given, read from filepath, or inferred.
+
+    Fixtures are read as bytes if binary is set.
+    """
+    if given is not None:
+        return given
+    if filepath is not None:
+        return read(filepath, binary)
+    if type(results.args) is not list:
+        raise ValueError(f"Cannot infer {stream} file for {results.args}")
+    found = infer(results.args, stream)
+    assert len(found) == 1, f"Expected one {stream} file for {results.args}, found {found}"
+    return read(found[0], binary)
@@ -0,0 +1,99 @@
+""" Limits: Resource limits for executed commands.
+
+Limits are applied with setrlimit in the child, just before the command is
+executed, so one runaway submission can't starve every other grading worker
+on the same machine.
+"""
+import os
+import signal
+from typing import NamedTuple, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    # Windows has no resource limits.
+    resource = None
+
+# Messages programs commonly print when a limit stops them, most specific first.
+_MESSAGES = [
+    ("memory", b"MemoryError"),
+    ("memory", b"bad_alloc"),
+    ("memory", b"Cannot allocate memory"),
+    ("memory", b"out of memory"),
+    ("filesize", b"File too large"),
+    ("files", b"Too many open files"),
+    ("processes", b"Resource temporarily unavailable"),
+]
+
+
+class Limits(NamedTuple):
+    """ Resource limits for a single command, None means unlimited.
+
+    cpu is in seconds of CPU time, memory is in bytes of address space,
+    files is the number of open files, processes is the number of processes
+    the user may have, and filesize is the largest file, in bytes, the
+    command may write.
+
+    Note that the process limit counts every process of the current user,
+    and is not enforced at all for root.
+    """
+
+    cpu: Optional[int] = None
+    memory: Optional[int] = None
+    files: Optional[int] = None
+    processes: Optional[int] = None
+    filesize: Optional[int] = None
+
+    def apply(self) -> None:
+        """ Applies the limits to the current process, used as a preexec_fn. """
+        for name, value in self._asdict().items():
+            if value is None:
+                continue
+            if name == "cpu":
+                # SIGXCPU is sent at the soft limit, SIGKILL a second later.
+                resource.setrlimit(resource.RLIMIT_CPU, (value, value + 1))
+            else:
+                limit = getattr(resource, _RESOURCES[name])
+                resource.setrlimit(limit, (value, value))
+
+    def exceeded(self, returncode: int, cpu: Optional[float], stderr: bytes) -> Optional[str]:
+        """ Returns the name of the limit a process was stopped by, if any.
+
+        Limits that send signals are recognized by the signal. Otherwise, the
+        failing call only returns an error, so the process' stderr is checked
+        for the message it likely printed.
+        """
+        if returncode == 0:
+            return None
+        if self.cpu is not None:
+            if _killed(returncode, signal.SIGXCPU):
+                return "cpu"
+            if _killed(returncode, signal.SIGKILL) and cpu is not None and cpu >= self.cpu:
+                return "cpu"
+        if self.filesize is not None and _killed(returncode, signal.SIGXFSZ):
+            return "filesize"
+        for name, message in _MESSAGES:
+            if getattr(self, name) is not None and message in stderr:
+                return name
+        return None
+
+
+def _killed(returncode: int, signum: int) -> bool:
+    """ Whether a process was killed by signum, directly or as the last command of a shell. """
+    return returncode in (-signum, 128 + signum)
+
+
+_RESOURCES = {
+    "memory": "RLIMIT_AS",
+    "files": "RLIMIT_NOFILE",
+    "processes": "RLIMIT_NPROC",
+    "filesize": "RLIMIT_FSIZE",
+}
+
+# Limits for every command that doesn't set its own, set by GradedRunner.
+suite: Optional[Limits] = None
+
+
+def supported() -> bool:
+    """ Whether or not limits can be applied on the current platform. """
+    return resource is not None and os.name == "posix"
@@ -0,0 +1,84 @@
+""" Matcher: Compares output against what is expected while it is produced.
+
+A program that prints the wrong answer, then loops forever, would otherwise
+use its whole timeout before AssertStdoutMatches could fail it. Run() feeds
+each chunk of stdout to a StreamMatcher as it arrives, and kills the
+program as soon as its output can no longer match.
+"""
+from typing import Optional
+
+from .diff import common_prefix
+
+# Whitespace allowed after the expected output, before the program is killed.
+SLACK = 1 << 12
+
+
+class StreamMatcher:
+    """ Matches a stream of output against expected, a chunk at a time.
+
+    Like AssertStdoutMatches, leading and trailing whitespace is ignored.
+    Once finished, verdict is one of:
+        - "match": the output matched expected.
+        - "mismatch": the output differed from expected.
+        - "short": the output ended before all of expected was seen.
+        - "long": the output continued past the end of expected.
+    For anything but a match, divergence is the offset, in bytes of output,
+    at which the output stopped matching.
+    """
+
+    def __init__(self, expected: bytes, slack: int = SLACK):
+        self.expected = expected.strip()
+        self.slack = slack
+        # Bytes of output seen, and bytes of expected matched so far.
+        self.offset = 0
+        self.matched = 0
+        self.started = False
+        self.trailing = 0
+        self.verdict: Optional[str] = None
+        self.divergence: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> bool:
+        """ Matches the next chunk of output, returns False once it has diverged. """
+        if self.verdict is not None:
+            return False
+
+        if not self.started:
+            stripped = chunk.lstrip()
+            self.offset += len(chunk) - len(stripped)
+            if not stripped:
+                return True
+            self.started = True
+            chunk = stripped
+
+        if self.matched < len(self.expected):
+            size = min(len(chunk), len(self.expected) - self.matched)
+            expected = self.expected[self.matched : self.matched + size]
+            if chunk[:size] != expected:
+                return self._diverge("mismatch", self.offset + common_prefix(chunk, expected))
+            self.matched += size
+            self.offset += size
+            chunk = chunk[size:]
+
+        if chunk:
+            content = chunk.lstrip()
+            if content:
+                return self._diverge("long", self.offset + len(chunk) - len(content))
+            self.trailing += len(chunk)
+            self.offset += len(chunk)
+            if self.trailing > self.slack:
+                return self._diverge("long", self.offset)
+        return True
+
+    def finish(self) -> str:
+        """ Decides the verdict once the output has ended, and returns it. """
+        if self.verdict is None:
+            if self.matched == len(self.expected):
+                self.verdict = "match"
+            else:
+                self._diverge("short", self.offset)
+        return self.verdict
+
+    def _diverge(self, verdict: str, offset: int) -> bool:
+        self.verdict = verdict
+        self.divergence = offset
+        return False
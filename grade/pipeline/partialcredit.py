@@ -1,7 +1,7 @@
-from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from itertools import cycle
 import logging
-from typing import Iterator, Union, List, Iterable
+from typing import Iterator, Union, List, Iterable, Optional
 
 from .pipeline import Pipeline
 
@@ -14,6 +14,10 @@ class PartialCredit:
     to the pipelines and, if the length of the list is not equal to the number of
     pipelines, it wraps the values and repeats the first entries in the list.
 
+    If workers is given, the pipelines are run on a pool of that many threads.
+    Each pipeline must then be independent of the others, but the score and
+    any logged failures are the same, and in the same order, as a serial run.
+
     Example:
     A = Pipeline
     B = Pipeline
@@ -24,13 +28,19 @@ class PartialCredit:
     C.max_score == 1
     """
 
-    def __init__(self, pipelines: Iterator[Pipeline], value: Union[int, List[int]]):
+    def __init__(
+        self,
+        pipelines: Iterator[Pipeline],
+        value: Union[int, List[int]],
+        workers: Optional[int] = None,
+    ):
         self.pipelines = list(pipelines)
+        self.workers = workers
 
         if isinstance(value, Iterable):
-            self.value = deque([v for (v, _) in zip(cycle(value), range(len(self.pipelines)))])
+            self.value = [v for (v, _) in zip(cycle(value), range(len(self.pipelines)))]
         else:
-            self.value = deque([value / len(self.pipelines) for _ in range(len(self.pipelines))])
+            self.value = [value / len(self.pipelines) for _ in range(len(self.pipelines))]
 
         self.max_score = sum(self.value)
         self._score = 0
@@ -42,15 +52,30 @@ class PartialCredit:
         assert self._executed
         return min(self.max_score, round(self._score, 2))
 
+    @staticmethod
+    def _execute(pipeline: Pipeline) -> Optional[Exception]:
+        """ Runs a single pipeline, returning the exception it raised, if any. """
+        try:
+            pipeline()
+        except Exception as e:
+            return e
+        return None
+
     def __call__(self):
         self._executed = True
-        for pipeline in self.pipelines:
-            try:
-                pipeline()
-            except Exception as e:
-                logging.exception(e, exc_info=False)
-            else:
-                self._score += self.value[0]
-            finally:
-                self.value.popleft()
+        if self.workers:
+            with ThreadPoolExecutor(self.workers) as pool:
+                outcomes = pool.map(self._execute, self.pipelines)
+                # Logging and scoring happens here, in order, as results arrive.
+                self._collect(outcomes)
+        else:
+            self._collect(map(self._execute, self.pipelines))
         return self
+
+    def _collect(self, outcomes: Iterable[Optional[Exception]]) -> None:
+        """ Logs failures and awards each successful pipeline its value. """
+        for value, error in zip(self.value, outcomes):
+            if error is not None:
+                logging.exception(error, exc_info=False)
+            else:
+                self._score += value
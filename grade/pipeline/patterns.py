@@ -0,0 +1,156 @@
+""" Patterns: Finding many strings and regular expressions at once.
+
+Checking for hundreds of keywords one at a time scans the output once per
+keyword. Once there are enough of them, a PatternSet compiles every literal
+into a single trie, expressed as a regular expression so that it is walked
+by the C regex engine, and scans the output for all of them in one pass,
+stopping as soon as everything has been found. With only a few literals,
+searching for each one separately is faster, so that is done instead.
+
+Matches don't overlap, so a match can hide another literal that lies
+within it, such as "ab" within "abc", or that starts inside it, such as
+"cd" after "abc" in "abcd". Only literals that could be hidden like this
+are checked on their own when the combined pass doesn't find them, any
+other literal it doesn't find is missing.
+
+Regular expressions are each compiled once, and searched separately, since
+combining them into one alternation defeats the regex engine's literal
+prefix optimizations, which makes one combined pass slower than several.
+"""
+import re
+from typing import Dict, Iterable, List, NamedTuple, Pattern, Set, Union
+
+Text = Union[str, bytes, bytearray, memoryview]
+
+# Number of literals from which a single combined pass is faster.
+COMBINE = 64
+
+
+class Matches(NamedTuple):
+    """ The strings and patterns of a PatternSet that were found. """
+
+    strings: Set[str]
+    patterns: Set[str]
+
+
+class PatternSet:
+    """ A set of literal strings and regex patterns, searched for together.
+
+    >>> PatternSet(strings=['error', 'warning'], patterns=[r'line \\d+']).search(log)
+    Matches(strings={'error'}, patterns={'line \\\\d+'})
+    """
+
+    def __init__(self, strings: Iterable[str] = (), patterns: Iterable[str] = ()):
+        self.strings: List[str] = list(dict.fromkeys(strings))
+        self.patterns: List[str] = list(dict.fromkeys(patterns))
+        self._compiled: Dict[type, tuple] = {}
+
+    def search(self, text: Text, encoding: str = "utf-8") -> Matches:
+        """ Returns the strings and patterns found in text.
+
+        Bytes-like text, including memory maps, is searched with strings and
+        patterns encoded with encoding. Strings and patterns given as bytes
+        can only be searched for in bytes-like text.
+        """
+        kind = str if isinstance(text, str) else bytes
+        trie, strings, patterns, recheck = self._compile(kind, encoding)
+        found = Matches(set(), set())
+
+        if trie is not None:
+            for match in trie.finditer(text):
+                found.strings.add(strings[match.group()])
+                if len(found.strings) == len(strings):
+                    break
+        for needle, original in strings.items():
+            if original in found.strings or (trie is not None and needle not in recheck):
+                continue
+            if _find(text, needle):
+                found.strings.add(original)
+        for pattern, original in patterns.items():
+            if pattern.search(text) is not None:
+                found.patterns.add(original)
+        return found
+
+    def missing(self, matches: Matches) -> List[str]:
+        """ Returns every string and pattern that is not in matches, in order. """
+        return [
+            *(s for s in self.strings if s not in matches.strings),
+            *(p for p in self.patterns if p not in matches.patterns),
+        ]
+
+    def _compile(self, kind: type, encoding: str) -> tuple:
+        """ Compiles the set for searching str, or bytes, caching the result. """
+        if kind not in self._compiled:
+
+            def encode(value: Union[str, bytes]):
+                return value.encode(encoding) if kind is bytes and isinstance(value, str) else value
+
+            strings = {encode(s): s for s in self.strings}
+            literals = [s for s in strings if s]
+            trie = re.compile(_trie(literals)) if len(literals) >= COMBINE else None
+            # The empty string is never in the trie, but is always found.
+            recheck = _hidden(literals) | {s for s in strings if not s}
+            patterns: Dict[Pattern, str] = {re.compile(encode(p)): p for p in self.patterns}
+            self._compiled[kind] = (trie, strings, patterns, recheck)
+        return self._compiled[kind]
+
+
+def _find(text: Text, needle) -> bool:
+    if isinstance(text, (str, bytes, bytearray)):
+        return needle in text
+    # Memory maps support find(), but not the in operator.
+    return text.find(needle) != -1
+
+
+def _hidden(literals: List) -> Set:
+    """ Returns the literals a match of another literal could hide.
+
+    Those are the literals within another literal, and those starting with
+    the end of another literal.
+    """
+    if not literals:
+        return set()
+    # A literal is within another if it occurs more than once among them all.
+    separator = b"\0" if isinstance(literals[0], bytes) else "\0"
+    joined = separator.join(literals)
+    ends: Dict = {}
+    for literal in literals:
+        for i in range(1, len(literal)):
+            ends.setdefault(literal[i:], set()).add(literal)
+    return {
+        literal
+        for literal in literals
+        if joined.count(literal) > 1
+        or any(ends.get(literal[:i], set()) - {literal} for i in range(1, len(literal)))
+    }
+
+
+def _trie(literals: List) -> Union[str, bytes]:
+    """ Returns a regex that matches any of literals, structured as a trie. """
+    root: dict = {}
+    for literal in literals:
+        node = root
+        # Iterating bytes gives ints, slicing gives single bytes.
+        for i in range(len(literal)):
+            node = node.setdefault(literal[i : i + 1], {})
+        node[None] = True
+
+    empty = literals[0][:0]
+
+    def text(value: str):
+        return value if isinstance(empty, str) else value.encode("ascii")
+
+    def build(node: dict):
+        children = sorted((c, child) for c, child in node.items() if c is not None)
+        branches = [re.escape(c) + build(child) for c, child in children]
+        if not branches:
+            return empty
+        body = branches[0]
+        if len(branches) > 1:
+            body = text("(?:") + text("|").join(branches) + text(")")
+        if None in node:
+            # A literal ends here, but longer literals continue on.
+            body = text("(?:") + body + text(")?")
+        return body
+
+    return build(root)
@@ -0,0 +1,205 @@
+import os
+import select
+import time
+from queue import Queue, Empty
+from subprocess import Popen, PIPE, CompletedProcess as Subprocess
+from threading import Lock, Thread
+from typing import Optional
+
+from .capture import Capture
+from .completedprocess import CompletedProcess, Measurement
+from .run import CHUNK, TIMEOUT, perf_counter_ns
+
+
+class Persistent:
+    """ Keeps one process running, and feeds it testcases one at a time.
+
+    Starting a new interpreter for every testcase can take far longer than
+    the testcase itself. Instead, Persistent starts the program once, writes
+    each testcase to its stdin followed by the delimiter, and reads its stdout
+    until the program writes the delimiter back. The default delimiter is a
+    newline, which suits programs that answer each line of input with one
+    line of output. Programs must flush their output after every answer,
+    Python programs can be run with -u to do so.
+
+    Each CompletedProcess has the stderr the program wrote while answering
+    that testcase. If the program crashes, it has its returncode and stderr,
+    and the program is started again for the next testcase. A program that
+    exits as soon as it has answered is given the next testcase again once
+    it has been restarted, if the testcase was sent before it exited.
+    If the program takes longer than timeout, it is killed, restarted on the
+    next testcase, and TimeoutError is raised.
+
+    Use Feed() to send testcases from within a Pipeline:
+
+    >>> with Persistent(['python', '-u', 'double.py']) as program:
+            Pipeline(Feed(program, '21'), AssertStdoutMatches('42'))()
+    """
+
+    def __init__(
+        self, command, delimiter: str = "\n", timeout: Optional[float] = TIMEOUT, **kwargs
+    ):
+        self.command = command
+        self.delimiter = delimiter.encode("utf-8")
+        self.timeout = timeout
+        self.kwargs = kwargs
+        self.process: Optional[Popen] = None
+        self._stdout: Optional[Queue] = None
+        self._buffer = bytearray()
+        self._stderr = bytearray()
+        self._collector: Optional[Thread] = None
+        self._lock = Lock()
+
+    def __enter__(self) -> "Persistent":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """ Starts the program, replacing any previous process. """
+        self.close()
+        self.process = Popen(self.command, stdin=PIPE, stdout=PIPE, stderr=PIPE, **self.kwargs)
+        self._stdout = Queue()
+        self._buffer = bytearray()
+        self._stderr = bytearray()
+        Thread(target=self._read, args=(self.process.stdout, self._stdout), daemon=True).start()
+        os.set_blocking(self.process.stderr.fileno(), False)
+        self._collector = Thread(target=self._collect, args=(self.process.stderr,), daemon=True)
+        self._collector.start()
+
+    def close(self) -> None:
+        """ Stops the program, if it is running. """
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        self.process.kill()
+        self.process.wait()
+        # Whatever the program wrote to stderr before it exited is collected first.
+        self._collector.join(timeout=1)
+        self.process.stdout.close()
+        self.process.stderr.close()
+        self.process = None
+
+    def __call__(self, input: str) -> CompletedProcess:
+        """ Sends one testcase to the program, returning its response. """
+        data = input.encode("utf-8") + self.delimiter
+        started = self.process is None or self.process.poll() is not None
+        if started:
+            self.start()
+
+        start = perf_counter_ns()
+        started = self._send(data) or started
+        stdout, returncode = self._response(start)
+        if self.process is None and not stdout and not started:
+            # The program exited after its last answer, before this testcase reached it.
+            self.start()
+            start = perf_counter_ns()
+            self._send(data)
+            stdout, returncode = self._response(start)
+        wall = perf_counter_ns() - start
+
+        with self._lock:
+            if self.process is not None:
+                while self._drain(self.process.stderr):
+                    pass
+            stderr = bytes(self._stderr)
+            self._stderr.clear()
+
+        results = CompletedProcess(
+            Subprocess(self.command, returncode, Capture.of(stdout), Capture.of(stderr))
+        )
+        results.measurements = [Measurement(wall, None, None, None)]
+        results.duration = wall / 1e9
+        return results
+
+    def _send(self, data: bytes) -> bool:
+        """ Writes data to the program, returns whether it had to be started again. """
+        try:
+            self.process.stdin.write(data)
+            self.process.stdin.flush()
+            return False
+        except OSError:
+            # The program exited between testcases.
+            self.start()
+            self.process.stdin.write(data)
+            self.process.stdin.flush()
+            return True
+
+    def _response(self, start: int):
+        """ Reads stdout up to the next delimiter, returns it with the returncode. """
+        deadline = start / 1e9 + self.timeout if self.timeout is not None else None
+        while True:
+            index = self._buffer.find(self.delimiter)
+            if index != -1:
+                response = bytes(self._buffer[:index])
+                del self._buffer[: index + len(self.delimiter)]
+                return response, 0
+
+            try:
+                remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                chunk = self._stdout.get(timeout=remaining)
+            except Empty:
+                self.close()
+                raise TimeoutError(f"{self.command} timed out.")
+
+            if chunk is None:
+                # The program crashed, or exited, before it finished responding.
+                response = bytes(self._buffer)
+                returncode = self.process.wait()
+                self.close()
+                return response, returncode
+            self._buffer += chunk
+
+    @staticmethod
+    def _read(pipe, queue: Queue) -> None:
+        """ Moves stdout onto a queue, ending with None once the pipe closes. """
+        try:
+            for chunk in iter(lambda: pipe.read1(CHUNK), b""):
+                queue.put(chunk)
+        except (OSError, ValueError):
+            pass
+        queue.put(None)
+
+    def _collect(self, pipe) -> None:
+        """ Accumulates stderr until the next response is returned.
+
+        stderr is only read while holding the lock, so once a response has been
+        read, draining the pipe collects everything written before it.
+        """
+        try:
+            while True:
+                select.select([pipe], [], [])
+                with self._lock:
+                    if self._drain(pipe) is None:
+                        return
+        except (OSError, ValueError):
+            pass
+
+    def _drain(self, pipe) -> Optional[bool]:
+        """ Reads a chunk of stderr, if any is waiting, returns None once it closes. """
+        try:
+            chunk = os.read(pipe.fileno(), CHUNK)
+        except BlockingIOError:
+            return False
+        self._stderr += chunk
+        return True if chunk else None
+
+
+class Feed:
+    """ Sends input to a Persistent program, as a stage of a Pipeline.
+
+    Like Run(), input can be a callable, which is given the previous
+    CompletedProcess.
+    """
+
+    def __init__(self, program: Persistent, input):
+        self.program = program
+        self.input = input
+
+    def __call__(self, results: CompletedProcess = None) -> CompletedProcess:
+        input = self.input(results) if callable(self.input) else self.input
+        return self.program(input)
@@ -4,7 +4,9 @@ Pipeline components allow you chain together tests
 for executable files within a few lines, without the
 headaches of typical executable testing.
 """
-from typing import Callable
+import asyncio
+from inspect import isawaitable
+from typing import Callable, List
 
 from .completedprocess import CompletedProcess
 
@@ -36,6 +38,16 @@ class Pipeline:
             results = temp if type(temp) is CompletedProcess else results
         return results
 
+    async def arun(self) -> CompletedProcess:
+        """ Executes the pipeline, awaiting any asynchronous callbacks, such as AsyncRun(). """
+        results = None
+        for callback in self.callbacks:
+            temp = callback(results)
+            if isawaitable(temp):
+                temp = await temp
+            results = temp if type(temp) is CompletedProcess else results
+        return results
+
     def __iter__(self) -> Callback:
         for callback in self.callbacks:
             yield callback
@@ -47,6 +59,26 @@ class Pipeline:
         return len(self.callbacks)
 
 
+async def gather(
+    *pipelines: Pipeline, limit: int = None, return_exceptions: bool = False
+) -> List[CompletedProcess]:
+    """ Runs pipelines concurrently, with at most limit running at once.
+
+    Results are returned in the same order as the pipelines were given.
+    """
+    semaphore = asyncio.Semaphore(limit) if limit else None
+
+    async def arun(pipeline: Pipeline) -> CompletedProcess:
+        if semaphore is None:
+            return await pipeline.arun()
+        async with semaphore:
+            return await pipeline.arun()
+
+    return await asyncio.gather(
+        *(arun(pipeline) for pipeline in pipelines), return_exceptions=return_exceptions
+    )
+
+
 class Lambda:
     """ Execute arbitrary code in a Pipeline. """
 
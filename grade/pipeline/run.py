@@ -1,8 +1,32 @@
+import asyncio
+import os
+import shlex
+import shutil
+import signal
+import sys
+import tempfile
 import time
 from functools import partial
-from subprocess import run, PIPE, TimeoutExpired
+from subprocess import (
+    Popen,
+    PIPE,
+    TimeoutExpired,
+    CalledProcessError,
+    CompletedProcess as Subprocess,
+)
+from threading import Event, Thread, Timer
+from typing import Callable, List, Optional, Set, Tuple, Union
 
-from .completedprocess import CompletedProcess
+from .cache import Store, dump, load, hash_file, hash_json, version
+from .capture import Capture
+from .completedprocess import CompletedProcess, Measurement
+from .files import index
+from .limits import Limits
+from .matcher import StreamMatcher
+from . import budget, limits, valgrind
+
+TIMEOUT = 60 * 10
+CHUNK = 1 << 16
 
 
 class Run:
@@ -24,31 +48,695 @@ class Run:
     )()
 
     This essentially allows you to chain the output of previous calls to future
-    calls in the pipeline.
-    """
+    calls in the pipeline. To stream output from one command to the next
+    instead, without holding it in memory, use Pipe().
+
+    Input can also be a pathlib.Path, or an open file, which is then
+    connected to the command's stdin directly, rather than read into memory.
+
+    Output is collected in memory by default. To protect against programs that
+    print far too much, spill sets how many bytes of each stream are kept in
+    memory before the rest is written to a temporary file, and max_output sets
+    how many bytes of each stream are collected before the process is killed.
+    When that happens, CompletedProcess.exceeded is set to "output".
+
+    Deterministic commands can set cache to True, or to a cache.Store, to
+    replay their results when run again with the same command, input, env,
+    cwd and files. The files are the command's arguments that exist,
+    plus the program itself. Hits and misses are reported in the results of
+    the GradedRunner.
+
+    Setting under_valgrind runs the command under valgrind's memcheck, so a
+    single execution serves both the output asserts and AssertValgrindSuccess.
+    The errors valgrind reports are kept in CompletedProcess.valgrind.
+
+    Commands run in their own process group, which is killed as a whole on
+    timeout, so nothing they start outlives them. Resource limits can be given
+    with limits, or for a whole suite through GradedRunner. A process stopped
+    by a limit has CompletedProcess.exceeded set to the name of that limit.
+    If the GradedRunner has a time budget, the timeout is also cut short to
+    fit within the running test's share of it:
 
-    _run = partial(
-        run, stderr=PIPE, stdout=PIPE, timeout=60 * 10, encoding="utf-8", errors="ignore"
-    )
+    >>> Pipeline(
+        Run(['./a.out'], limits=Limits(cpu=2, memory=256 << 20)),
+        AssertWithinLimits(),
+        AssertExitSuccess(),
+    )()
+
+    If the expected stdout is given as expect, stdout is compared against it
+    while the command runs, and the command is killed as soon as its output
+    stops matching. The outcome is kept in CompletedProcess.verdict, and the
+    offset at which the output diverged in CompletedProcess.divergence:
+
+    >>> Pipeline(Run(['./a.out'], expect='42'), AssertStdoutMatches('42'))()
+
+    Output is kept as raw bytes, and only decoded when CompletedProcess.stdout
+    or CompletedProcess.stderr is used. Passing text=False makes those return
+    the bytes instead, for programs whose output isn't text, such as images.
+    The asserts compare bytes without decoding or copying them:
+
+    >>> Pipeline(Run(['./draw'], text=False), AssertStdoutMatches(filepath='out.png'))()
+    """
 
     def run(self, command, **kwargs):
-        results = self._run(command, **kwargs)
-        return CompletedProcess(results)
+        matcher = self.matcher()
+        if not self.under_valgrind:
+            process, measurement = self._run(command, matcher=matcher, **kwargs)
+            results = CompletedProcess(process, kwargs.get("text", True))
+        else:
+            fd, report = tempfile.mkstemp(suffix=".xml")
+            os.close(fd)
+            try:
+                process, measurement = self._run(
+                    valgrind.wrap(command, report), matcher=matcher, **kwargs
+                )
+                errors = valgrind.parse(report)
+            finally:
+                os.remove(report)
+            process.args = command
+            results = CompletedProcess(process, kwargs.get("text", True))
+            results.valgrind = errors
+            valgrind.verdicts[valgrind.key(command, kwargs.get("input"))] = errors
 
-    def __init__(self, command, input=None, **kwargs):
+        results.measurements = [measurement]
+        applied = self.limits or limits.suite
+        if applied is not None:
+            stderr = results.capture("stderr")
+            results.exceeded = applied.exceeded(
+                results.returncode, measurement.cpu, bytes(stderr.head) if stderr else b""
+            )
+        if matcher is not None:
+            results.verdict = matcher.finish()
+            results.divergence = matcher.divergence
+        return results
+
+    def __init__(
+        self,
+        command,
+        input=None,
+        spill: Optional[int] = None,
+        max_output: Optional[int] = None,
+        cache: Union[bool, Store] = False,
+        under_valgrind: bool = False,
+        limits: Optional[Limits] = None,
+        expect: Union[str, bytes, None] = None,
+        **kwargs,
+    ):
+        if "universal_newlines" in kwargs:
+            # The older name for text, output is always read as bytes.
+            kwargs["text"] = kwargs.pop("universal_newlines")
         self.command = command
         self.input = input
+        self.spill = spill
+        self.max_output = max_output
+        self.cache = Store() if cache is True else cache or None
+        self.under_valgrind = under_valgrind
+        self.limits = limits
+        self.expect = expect
         self.kwargs = kwargs
 
     def __call__(self, results: CompletedProcess = None) -> CompletedProcess:
         if callable(self.input):
             self.input = self.input(results)
+        previous = results.measurements if isinstance(results, CompletedProcess) else []
+        key = self.key() if self.cache is not None else None
+        metadata = self.cache.get(key) if key is not None else None
         try:
-            start = time.time()
-            results: CompletedProcess = self.run(self.command, input=self.input, **self.kwargs)
-            duration = time.time() - start
+            if metadata is not None:
+                results = self.restore(key, metadata)
+                self.judge(results)
+            else:
+                results = self.run(self.command, input=self.input, **self.kwargs)
         except TimeoutExpired:
             raise TimeoutError(f"{self.command} timed out.")
         else:
-            results.duration = duration
+            if key is not None and metadata is None and self.cacheable(results):
+                self.save(key, results)
+            results.measurements = [*previous, *results.measurements]
+            results.duration = results.measurements[-1].wall / 1e9
+            results.rerun = partial(self.run, self.command, input=self.input, **self.kwargs)
+            results.origin = self
+            if results.capture("stdout").exceeded or results.capture("stderr").exceeded:
+                results.exceeded = "output"
             return results
+
+    def files(self) -> Set[str]:
+        """ Returns the files the command refers to, including the program itself. """
+        if isinstance(self.command, str):
+            args = shlex.split(self.command)
+        else:
+            args = [os.fspath(arg) for arg in self.command]
+        cwd = self.kwargs.get("cwd") or "."
+        files = {arg for arg in args if os.path.isfile(os.path.join(cwd, arg))}
+        # Programs given by path are already included, others are found on the PATH.
+        program = shutil.which(args[0]) if not os.path.dirname(args[0]) else None
+        if program is not None:
+            files.add(program)
+        return files
+
+    def key(self) -> Optional[str]:
+        """ Returns the key results are cached under, or None if they can't be cached. """
+        input = self.input
+        if isinstance(input, os.PathLike):
+            input = {"file": hash_file(input)}
+        elif input is not None and not isinstance(input, (str, bytes)):
+            return None
+        cwd = self.kwargs.get("cwd") or "."
+        return hash_json(
+            {
+                "command": self.command,
+                "input": input,
+                # Only an explicit environment, and a relative cwd, so copies of a
+                # submission in other directories, or other shells, share results.
+                "env": self.kwargs.get("env"),
+                "cwd": os.path.normpath(cwd),
+                "files": {f: hash_file(os.path.join(cwd, f)) for f in sorted(self.files())},
+                "kwargs": {k: repr(v) for k, v in self.kwargs.items() if k not in {"env", "cwd"}},
+                "limits": self.limits or limits.suite,
+                "expect": self.expect,
+            }
+        )
+
+    def matcher(self) -> Optional[StreamMatcher]:
+        """ Returns a new StreamMatcher for expect, if it was given. """
+        if self.expect is None:
+            return None
+        expect = self.expect
+        if isinstance(expect, str):
+            expect = expect.encode(self.kwargs.get("encoding") or "utf-8")
+        return StreamMatcher(expect)
+
+    def judge(self, results: CompletedProcess) -> None:
+        """ Sets the verdict of results that weren't matched while running. """
+        matcher = self.matcher()
+        if matcher is None:
+            return
+        matcher.feed(results.capture("stdout").getvalue())
+        results.verdict = matcher.finish()
+        results.divergence = matcher.divergence
+
+    @staticmethod
+    def cacheable(results: CompletedProcess) -> bool:
+        """ Whether or not results should be stored in the cache. """
+        return True
+
+    def save(self, key: str, results: CompletedProcess) -> None:
+        """ Stores results in the cache. """
+        metadata, blobs = dump(results)
+        self.cache.put(key, metadata, blobs=blobs)
+
+    def restore(self, key: str, metadata: dict) -> CompletedProcess:
+        """ Recreates results from the cache. """
+        return load(metadata, self.cache.read(key, "stdout"), self.cache.read(key, "stderr"))
+
+    def _run(
+        self,
+        command,
+        input=None,
+        timeout=TIMEOUT,
+        check=False,
+        encoding="utf-8",
+        errors="ignore",
+        text=True,
+        matcher: Optional[StreamMatcher] = None,
+        **kwargs,
+    ) -> Tuple[Subprocess, Measurement]:
+        """ Executes command, collecting its output into Captures. """
+        if budget.suite is not None:
+            timeout = budget.suite.timeout(timeout)
+        stdout = Capture(self.spill, self.max_output, encoding, errors)
+        stderr = Capture(self.spill, self.max_output, encoding, errors)
+        stdin, input, opened = _stdin(input, encoding)
+        if stdin is not None:
+            kwargs["stdin"] = stdin
+        # Output sent elsewhere, such as to DEVNULL, is left out of the Captures.
+        kwargs.setdefault("stdout", PIPE)
+        kwargs.setdefault("stderr", PIPE)
+        self._isolate(kwargs)
+
+        start = perf_counter_ns()
+        try:
+            process = Popen(command, **kwargs)
+        finally:
+            if opened is not None:
+                opened.close()
+        with process:
+            kill = partial(self._kill, process, kwargs.get("start_new_session", False))
+            streams = [(process.stdout, stdout, matcher), (process.stderr, stderr, None)]
+            threads = [
+                Thread(target=self._drain, args=(kill, *stream), daemon=True)
+                for stream in streams
+                if stream[0] is not None
+            ]
+            if input is not None:
+                threads.append(Thread(target=self._feed, args=(process.stdin, input), daemon=True))
+            for thread in threads:
+                thread.start()
+
+            deadline = _deadline(timeout)
+            try:
+                usage = self._wait(process, timeout, kill)
+                wall = perf_counter_ns() - start
+                # Anything the command left running could keep its pipes open.
+                kill()
+                for thread in threads:
+                    thread.join(_remaining(deadline))
+                if any(thread.is_alive() for thread in threads):
+                    raise TimeoutExpired(command, timeout)
+            except BaseException:
+                # Interrupted or timed out, the command mustn't outlive the grader.
+                kill()
+                raise
+
+        if check and process.returncode:
+            raise CalledProcessError(process.returncode, command, stdout.text, stderr.text)
+        return Subprocess(command, process.returncode, stdout, stderr), _measure(wall, usage)
+
+    def _isolate(self, kwargs: dict) -> None:
+        """ Sets up kwargs so the command runs in its own process group, within its limits. """
+        if not limits.supported():
+            return
+        kwargs.setdefault("start_new_session", True)
+        applied = self.limits or limits.suite
+        if applied is not None:
+            kwargs.setdefault("preexec_fn", applied.apply)
+
+    @staticmethod
+    def _kill(process: Popen, group: bool) -> None:
+        """ Kills the process, along with its process group if it leads one. """
+        if group:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+                return
+            except (ProcessLookupError, PermissionError):
+                # The whole group has already exited.
+                pass
+        if process.returncode is None:
+            process.kill()
+
+    @staticmethod
+    def _wait(process: Popen, timeout: Optional[float], kill: Callable[[], None]):
+        """ Waits for the process to exit, returning its resource usage if available. """
+        if not hasattr(os, "wait4"):
+            process.wait(timeout)
+            return None
+
+        expired = Event()
+
+        def expire():
+            expired.set()
+            kill()
+
+        timer = Timer(timeout, expire) if timeout is not None else None
+        if timer is not None:
+            timer.start()
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+        if os.WIFSIGNALED(status):
+            process.returncode = -os.WTERMSIG(status)
+        else:
+            process.returncode = os.WEXITSTATUS(status)
+        if expired.is_set():
+            raise TimeoutExpired(process.args, timeout)
+        return usage
+
+    @staticmethod
+    def _drain(
+        kill: Callable[[], None], pipe, capture: Capture, matcher: Optional[StreamMatcher] = None
+    ) -> None:
+        """ Reads pipe into capture, killing the process if it prints too much, or diverges. """
+        try:
+            for chunk in iter(lambda: pipe.read1(CHUNK), b""):
+                if not capture.write(chunk):
+                    kill()
+                if matcher is not None and not matcher.feed(chunk):
+                    kill()
+        except (OSError, ValueError):
+            # The pipe was closed after a timeout.
+            pass
+
+    @staticmethod
+    def _feed(pipe, data: bytes) -> None:
+        """ Writes data to the process' stdin, then closes it. """
+        try:
+            pipe.write(data)
+            pipe.close()
+        except (OSError, ValueError):
+            # The process exited without reading all of its input.
+            pass
+
+
+def _stdin(input, encoding: str = "utf-8"):
+    """ Returns what to pass as stdin for input, the bytes to feed it, and any file opened. """
+    if input is None:
+        return None, None, None
+    if isinstance(input, str):
+        return PIPE, input.encode(encoding), None
+    if isinstance(input, (bytes, bytearray, memoryview)):
+        return PIPE, input, None
+    if isinstance(input, os.PathLike):
+        opened = open(input, "rb")
+        return opened, None, opened
+    # Anything else is a file, which the process can read from directly.
+    return input, None, None
+
+
+def _deadline(timeout: Optional[float]) -> Optional[float]:
+    """ Returns the monotonic time timeout seconds from now, or None if there is no timeout. """
+    return time.monotonic() + timeout if timeout is not None else None
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    """ Returns the seconds left until deadline, or None if there is no deadline. """
+    return max(0.0, deadline - time.monotonic()) if deadline is not None else None
+
+
+def perf_counter_ns() -> int:
+    """ Returns time.perf_counter in nanoseconds, as time.perf_counter_ns does from Python 3.7. """
+    return int(time.perf_counter() * 1e9)
+
+
+def _measure(wall: int, usage) -> Measurement:
+    """ Returns the Measurement of a process, from the resource usage given by wait4. """
+    if usage is None:
+        return Measurement(wall, None, None, None)
+    # ru_maxrss is measured in bytes on macOS, kilobytes elsewhere.
+    rss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return Measurement(wall, usage.ru_utime, usage.ru_stime, rss)
+
+
+class Pipe:
+    """ Runs commands at the same time, connecting each one's stdout to the next one's stdin.
+
+    Like a shell pipeline, output streams from one command to the next
+    through OS pipes, without ever being held in memory, and every command
+    runs concurrently. Only the last command's stdout is collected, along
+    with stderr from every command.
+
+    Each command is given as a Run(), whose limits, cwd and env are used.
+    Only the first Run() may have input, and spill and max_output are taken
+    from the last. The shortest timeout applies to the whole pipe.
+
+    The returncode is the last command's, or with pipefail, that of the
+    last command to fail. There is one Measurement per command.
+
+    >>> Pipeline(
+        Pipe(Run(['cat'], input=Path('big.txt')), Run(['sort']), Run(['uniq', '-c'])),
+        AssertStdoutContains(['42 lines']),
+    )()
+    """
+
+    def __init__(self, *runs: Run, pipefail: bool = False):
+        if not runs:
+            raise ValueError("Pipe needs at least one Run.")
+        if any(run.input is not None for run in runs[1:]):
+            raise ValueError("Only the first Run in a Pipe can have input.")
+        self.runs = runs
+        self.pipefail = pipefail
+
+    def __call__(self, results: CompletedProcess = None) -> CompletedProcess:
+        first = self.runs[0]
+        input = first.input(results) if callable(first.input) else first.input
+        previous = results.measurements if isinstance(results, CompletedProcess) else []
+        try:
+            results = self.run(input)
+        except TimeoutExpired:
+            raise TimeoutError(f"{self.args} timed out.")
+        results.measurements = [*previous, *results.measurements]
+        results.duration = results.measurements[-1].wall / 1e9
+        results.rerun = partial(self.run, input)
+        if results.capture("stdout").exceeded or results.capture("stderr").exceeded:
+            results.exceeded = "output"
+        return results
+
+    @property
+    def args(self) -> list:
+        return [run.command for run in self.runs]
+
+    def run(self, input=None) -> CompletedProcess:
+        """ Runs every command, returning the results of the pipe as a whole. """
+        last = self.runs[-1]
+        options = dict(last.kwargs)
+        encoding = options.get("encoding", "utf-8")
+        errors = options.get("errors", "ignore")
+        timeouts = [run.kwargs.get("timeout", TIMEOUT) for run in self.runs]
+        timeout = min((t for t in timeouts if t is not None), default=None)
+        if budget.suite is not None:
+            timeout = budget.suite.timeout(timeout)
+
+        stdout = Capture(last.spill, last.max_output, encoding, errors)
+        stderr = Capture(last.spill, last.max_output, encoding, errors)
+        stdin, data, opened = _stdin(input, encoding)
+        # Every command shares one stderr, as they would in a shell.
+        errors_read, errors_write = os.pipe()
+        processes: List[Popen] = []
+        groups: List[bool] = []
+
+        def kill():
+            for process, group in zip(processes, groups):
+                Run._kill(process, group)
+
+        def reap():
+            kill()
+            for process in processes:
+                if process.returncode is None:
+                    process.wait()
+
+        # The read end of the pipe to the next command, once it has been created.
+        read = None
+        start = perf_counter_ns()
+        try:
+            for index, run in enumerate(self.runs):
+                kwargs = {
+                    k: v
+                    for k, v in run.kwargs.items()
+                    if k not in {"timeout", "check", "encoding", "errors", "text"}
+                }
+                run._isolate(kwargs)
+                if read is not None:
+                    stdin = read
+                if index == len(self.runs) - 1:
+                    read, write = None, PIPE
+                else:
+                    read, write = os.pipe()
+                try:
+                    process = Popen(
+                        run.command, stdin=stdin, stdout=write, stderr=errors_write, **kwargs
+                    )
+                finally:
+                    # Only the processes should hold their ends of each pipe.
+                    if write is not PIPE:
+                        os.close(write)
+                    if index > 0:
+                        os.close(stdin)
+                processes.append(process)
+                groups.append(kwargs.get("start_new_session", False))
+        except BaseException:
+            reap()
+            if read is not None:
+                os.close(read)
+            os.close(errors_read)
+            raise
+        finally:
+            os.close(errors_write)
+            if opened is not None:
+                opened.close()
+
+        shared = open(errors_read, "rb")
+        threads = [
+            Thread(target=Run._drain, args=(kill, processes[-1].stdout, stdout), daemon=True),
+            Thread(target=Run._drain, args=(kill, shared, stderr), daemon=True),
+        ]
+        if data is not None:
+            threads.append(Thread(target=Run._feed, args=(processes[0].stdin, data), daemon=True))
+        for thread in threads:
+            thread.start()
+
+        deadline = _deadline(timeout)
+        measurements = []
+        try:
+            for process in processes:
+                usage = Run._wait(process, _remaining(deadline), kill)
+                measurements.append(_measure(perf_counter_ns() - start, usage))
+            kill()
+            for thread in threads:
+                thread.join(_remaining(deadline))
+            if any(thread.is_alive() for thread in threads):
+                raise TimeoutExpired(self.args, timeout)
+        except BaseException:
+            reap()
+            raise
+        finally:
+            shared.close()
+            for process in processes:
+                for pipe in (process.stdin, process.stdout):
+                    if pipe is not None:
+                        pipe.close()
+
+        returncodes = [process.returncode for process in processes]
+        returncode = returncodes[-1]
+        if self.pipefail:
+            returncode = next((r for r in reversed(returncodes) if r), 0)
+        results = CompletedProcess(
+            Subprocess(self.args, returncode, stdout, stderr), options.get("text", True)
+        )
+        results.measurements = measurements
+        return results
+
+
+class AsyncRun(Run):
+    """ Runs the given command without blocking the event loop.
+
+    Takes the same arguments as Run(), except for spill, max_output and
+    under_valgrind, but calling it returns a coroutine,
+    so it must be used within Pipeline.arun(). This allows many pipelines
+    to wait on their processes at the same time:
+
+    >>> asyncio.run(gather(*[
+        Pipeline(AsyncRun(['./a.out', case]), AssertExitSuccess())
+        for case in glob('tests/*.in')
+    ], limit=8))
+    """
+
+    def __init__(self, command, input=None, **kwargs):
+        unsupported = [k for k in ("spill", "max_output", "under_valgrind") if kwargs.get(k)]
+        if unsupported:
+            raise ValueError(f"AsyncRun doesn't support {', '.join(unsupported)}.")
+        super().__init__(command, input, **kwargs)
+
+    async def __call__(self, results: CompletedProcess = None) -> CompletedProcess:
+        input = self.input(results) if callable(self.input) else self.input
+        previous = results.measurements if isinstance(results, CompletedProcess) else []
+        key = self.key() if self.cache is not None else None
+        metadata = self.cache.get(key) if key is not None else None
+        if metadata is not None:
+            results = self.restore(key, metadata)
+            self.judge(results)
+        else:
+            results = await self._arun(input)
+            if key is not None and self.cacheable(results):
+                self.save(key, results)
+        results.measurements = [*previous, *results.measurements]
+        results.duration = results.measurements[-1].wall / 1e9
+        results.rerun = partial(self.run, self.command, input=input, **self.kwargs)
+        results.origin = self
+        return results
+
+    async def _arun(self, input) -> CompletedProcess:
+        """ Executes the command on the event loop, collecting its output. """
+        kwargs = dict(self.kwargs)
+        timeout = kwargs.pop("timeout", TIMEOUT)
+        check = kwargs.pop("check", False)
+        text = kwargs.pop("text", True)
+        encoding = kwargs.pop("encoding", "utf-8")
+        errors = kwargs.pop("errors", "ignore")
+        if budget.suite is not None:
+            timeout = budget.suite.timeout(timeout)
+        stdin, data, opened = _stdin(input, encoding)
+        if stdin is not None:
+            kwargs["stdin"] = stdin
+        kwargs.setdefault("stdout", PIPE)
+        kwargs.setdefault("stderr", PIPE)
+        self._isolate(kwargs)
+
+        start = perf_counter_ns()
+        try:
+            if kwargs.pop("shell", False):
+                process = await asyncio.create_subprocess_shell(self.command, **kwargs)
+            else:
+                process = await asyncio.create_subprocess_exec(*self.command, **kwargs)
+        finally:
+            if opened is not None:
+                opened.close()
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(data), timeout)
+        except asyncio.TimeoutError:
+            self._kill(process, kwargs.get("start_new_session", False))
+            await process.wait()
+            raise TimeoutError(f"{self.command} timed out.")
+        except BaseException:
+            # Cancelled or interrupted, the command mustn't outlive the grader.
+            self._kill(process, kwargs.get("start_new_session", False))
+            await process.wait()
+            raise
+        wall = perf_counter_ns() - start
+
+        if check and process.returncode:
+            raise CalledProcessError(process.returncode, self.command, stdout, stderr)
+        results = CompletedProcess(
+            Subprocess(
+                self.command,
+                process.returncode,
+                Capture.of(stdout or b"", encoding=encoding, errors=errors),
+                Capture.of(stderr or b"", encoding=encoding, errors=errors),
+            ),
+            text,
+        )
+        results.measurements = [Measurement(wall, None, None, None)]
+        self.judge(results)
+        applied = self.limits or limits.suite
+        if applied is not None:
+            results.exceeded = applied.exceeded(process.returncode, None, stderr or b"")
+        return results
+
+
+class CachedRun(Run):
+    """ Runs a build command, restoring its outputs from a cache when possible.
+
+    Builds are keyed on the command, the output of the compiler's --version
+    and the contents of every source file. Sources default to every file in
+    the build's cwd, along with the arguments of the command that are existing
+    files, so that builds like make, or sources that include headers, are keyed
+    on the whole submission. Outputs, like sources, are relative to cwd.
+
+    When a successful build is found in the store, its outputs are copied into
+    place and its CompletedProcess is recreated without running the command.
+
+    >>> CachedRun(['gcc', 'main.c', '-o', 'main'], outputs=['main'], sources=glob('*.[ch]'))()
+    """
+
+    def __init__(
+        self,
+        command,
+        outputs: List[str],
+        sources: List[str] = (),
+        store: Optional[Store] = None,
+        **kwargs,
+    ):
+        super().__init__(command, cache=store if store is not None else True, **kwargs)
+        self.outputs = list(outputs)
+        self.sources = list(sources)
+
+    def files(self) -> Set[str]:
+        cwd = self.kwargs.get("cwd") or "."
+        files = super().files() | set(self.sources)
+        if not self.sources:
+            files |= {path for path, _, directory in index(cwd).paths() if not directory}
+        outputs = {self._path(o) for o in self.outputs}
+        return {f for f in files if self._path(f) not in outputs}
+
+    def key(self) -> Optional[str]:
+        key = super().key()
+        if key is None:
+            return None
+        return hash_json({"run": key, "version": version(self.command), "outputs": self.outputs})
+
+    def cacheable(self, results: CompletedProcess) -> bool:
+        return results.returncode == 0 and all(os.path.exists(self._path(o)) for o in self.outputs)
+
+    def save(self, key: str, results: CompletedProcess) -> None:
+        metadata, blobs = dump(results)
+        self.cache.put(key, metadata, [self._path(o) for o in self.outputs], blobs)
+
+    def restore(self, key: str, metadata: dict) -> CompletedProcess:
+        for i, output in enumerate(self.outputs):
+            shutil.copy2(self.cache.file(key, i), self._path(output))
+        return super().restore(key, metadata)
+
+    def _path(self, path: str) -> str:
+        """ Returns path resolved against the build's cwd. """
+        return os.path.abspath(os.path.join(self.kwargs.get("cwd") or ".", os.fspath(path)))
@@ -0,0 +1,87 @@
+""" Valgrind: Memory checking for executable files.
+
+Parses the XML reports written by valgrind's memcheck into structured errors,
+and keeps a cache of verdicts so that the same binary and input is never
+checked twice.
+"""
+import os
+import shutil
+import xml.etree.ElementTree as ElementTree
+from typing import Dict, List, NamedTuple, Optional
+
+from .cache import hash_file, hash_json
+
+VALGRIND = ["valgrind", "-q", "--xml=yes"]
+
+
+class Frame(NamedTuple):
+    """ A single frame of the stack an error occurred in. """
+
+    function: Optional[str]
+    file: Optional[str]
+    line: Optional[int]
+
+    def __str__(self) -> str:
+        location = f"{self.file}:{self.line}" if self.file else "???"
+        return f"{self.function or '???'} ({location})"
+
+
+class ValgrindError(NamedTuple):
+    """ A single error reported by valgrind. """
+
+    kind: str
+    what: str
+    stack: List[Frame]
+
+    def __str__(self) -> str:
+        return "\n".join([f"{self.kind}: {self.what}", *(f"    at {f}" for f in self.stack)])
+
+
+# Verdicts of previous checks, keyed by binary, command and input.
+verdicts: Dict[str, List[ValgrindError]] = {}
+
+
+def wrap(command, xml_file: str):
+    """ Returns command, prefixed to run under valgrind with its report going to xml_file. """
+    prefix = [*VALGRIND, f"--xml-file={xml_file}"]
+    if isinstance(command, str):
+        return " ".join([*prefix, command])
+    return [*prefix, *command]
+
+
+def parse(xml_file: str) -> List[ValgrindError]:
+    """ Returns the errors contained in a valgrind XML report. """
+    try:
+        root = ElementTree.parse(xml_file).getroot()
+    except (OSError, ElementTree.ParseError) as e:
+        # Valgrind itself failed, or the process was killed before it finished.
+        return [ValgrindError("Incomplete", f"Could not read valgrind report: {e}", [])]
+
+    errors = []
+    for error in root.iter("error"):
+        what = error.findtext("what") or error.findtext("xwhat/text") or ""
+        stack = [
+            Frame(
+                frame.findtext("fn"),
+                frame.findtext("file"),
+                int(frame.findtext("line")) if frame.findtext("line") else None,
+            )
+            for frame in error.findall("stack[1]/frame")
+        ]
+        errors.append(ValgrindError(error.findtext("kind") or "Unknown", what, stack))
+    return errors
+
+
+def key(command, input=None) -> str:
+    """ Returns the key verdicts for command and input are cached under.
+
+    Input given as a path is keyed on the contents of the file.
+    """
+    program = command.split()[0] if isinstance(command, str) else command[0]
+    executable = shutil.which(program) if not os.path.dirname(program) else program
+    binary = hash_file(executable) if executable and os.path.isfile(executable) else None
+    if isinstance(input, os.PathLike):
+        input = {"file": hash_file(input)}
+    elif input is not None and not isinstance(input, (str, bytes, bytearray, memoryview)):
+        input = str(input)
+    return hash_json({"binary": binary, "command": command, "input": input})
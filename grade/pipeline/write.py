@@ -1,10 +1,32 @@
+import os
+import tempfile
 from os import path
+from typing import Union
 
 from .completedprocess import CompletedProcess
 
 
+def write_atomic(filepath: str, data: Union[str, bytes]) -> None:
+    """ Writes data to filepath, replacing the file all at once.
+
+    The data is written to a temporary file alongside filepath, which is
+    then renamed over it, so readers never see a partially written file.
+    """
+    directory, name = path.split(path.abspath(filepath))
+    fd, temp = tempfile.mkstemp(prefix=f".{name}.", dir=directory)
+    try:
+        with open(fd, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+        # Temporary files are only readable by their owner, unlike the file they replace.
+        os.chmod(temp, os.stat(filepath).st_mode if path.exists(filepath) else 0o644)
+        os.replace(temp, filepath)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
 class WriteStdout:
-    """ Writes the current stdout to the given file.
+    """ Writes the current stdout to the given file, atomically.
 
     File defaults to ./temp
     """
@@ -17,14 +39,13 @@ class WriteStdout:
         if path.exists(self.filepath) and self.overwrite is False:
             raise FileExistsError
 
-        with open(self.filepath, "w") as f:
-            f.write(results.stdout)
+        write_atomic(self.filepath, results.stdout)
 
         return results
 
 
 class WriteStderr:
-    """ Writes the current stderr to the given file.
+    """ Writes the current stderr to the given file, atomically.
 
     File defaults to ./temp
     """
@@ -37,8 +58,7 @@ class WriteStderr:
         if path.exists(self.filepath) and self.overwrite is False:
             raise FileExistsError
 
-        with open(self.filepath, "w") as f:
-            f.write(results.stderr)
+        write_atomic(self.filepath, results.stderr)
 
         return results
 
@@ -1,6 +1,61 @@
 import json
+import os
+import time
+import traceback
 import unittest
-from typing import TextIO, List, Tuple
+from functools import wraps
+from typing import Dict, NamedTuple, Optional, TextIO, List
+
+from grade.journal import Journal
+from grade.pipeline import budget
+from grade.pipeline.diff import LIMIT, truncate
+
+# Characters of output kept for each test.
+OUTPUT = 4 * LIMIT
+
+
+class Frame(NamedTuple):
+    """ A frame of a traceback, and the source of the line it was on. """
+
+    file: str
+    line: int
+    function: str
+    source: str
+
+
+class Failure(NamedTuple):
+    """ An exception raised by a test, with the frames it was raised through. """
+
+    frames: List[Frame]
+    message: str
+
+    @classmethod
+    def of(cls, err) -> "Failure":
+        """ Returns the Failure for err, as given to addFailure or addError.
+
+        Frames inside of unittest are left out, as they are from its tracebacks.
+        """
+        kind, value, tb = err
+        frames = [(f, n) for f, n in traceback.walk_tb(tb) if "__unittest" not in f.f_globals]
+        summary = traceback.StackSummary.extract(frames)
+        return cls(
+            [Frame(f.filename, f.lineno, f.name, f.line) for f in summary],
+            "; ".join(
+                line.strip()
+                for message in traceback.format_exception_only(kind, value)
+                for line in message.splitlines()
+                if line.strip()
+            ),
+        )
+
+    @property
+    def short(self) -> str:
+        """ Returns the innermost frame and the message, on one line. """
+        if not self.frames:
+            return self.message
+        frame = self.frames[-1]
+        location = f"{os.path.basename(frame.file)}, line {frame.line}, in {frame.function}"
+        return "; ".join(part for part in [location, frame.source, self.message] if part)
 
 
 class Result(unittest.TextTestResult):
@@ -16,6 +71,16 @@ class Result(unittest.TextTestResult):
             "leaderboard": [],
         }
         self._mirrorOutput = False
+        # Tests that were not run because the time budget ran out.
+        self.expired = set()
+        # Failures and errors of each test, by test id.
+        self.exceptions: Dict[str, List[Failure]] = {}
+        # Where each test's results are appended as it finishes, if anywhere.
+        self.journal: Optional[Journal] = None
+        # When the current test started, on the monotonic clock.
+        self.started: Optional[float] = None
+        # Seconds each test took, in the same order as data["tests"].
+        self.durations: List[float] = []
 
     @property
     def json(self) -> str:
@@ -55,15 +120,11 @@ class Result(unittest.TextTestResult):
         return getattr(getattr(test, test._testMethodName), attribute, default)
 
     @staticmethod
-    def parseExceptions(exceptions):
-        output = "; ".join(exceptions)
-        output = "; ".join(line.strip() for line in output.split("\n")[1:] if line)
-        # Shave output to: final python file, failures/errors
-        output = "".join([output.split(".py")[-2].split("/")[-1] + ".py", output.split('.py"')[-1]])
-        return output.strip()
+    def parseExceptions(exceptions: List[Failure]) -> str:
+        return "; ".join(failure.short for failure in exceptions)
 
-    def getExceptions(self, test) -> List[Tuple]:
-        return [m for f, m in [*self.failures, *self.errors] if f == test]
+    def getExceptions(self, test) -> List[Failure]:
+        return self.exceptions.get(test.id(), [])
 
     def getName(self, test):
         name = self.getattr(test, "__qualname__")
@@ -80,15 +141,51 @@ class Result(unittest.TextTestResult):
 
     def addError(self, test, err):
         super().addError(test, err)
+        self.exceptions.setdefault(test.id(), []).append(Failure.of(err))
         self._mirrorOutput = False
 
     def addFailure(self, test, err):
         super().addFailure(test, err)
+        self.exceptions.setdefault(test.id(), []).append(Failure.of(err))
         self._mirrorOutput = False
 
+    def startTest(self, test):
+        super().startTest(test)
+        self.started = time.monotonic()
+        if budget.suite is None:
+            return
+        if budget.suite.expired:
+            self.expire(test)
+        budget.suite.start(self.getattr(test, "_g_weight", 0))
+
+    # noinspection PyProtectedMember
+    def expire(self, test):
+        """ Replaces the test method with one that is skipped, and scores zero. """
+        method = getattr(test, test._testMethodName)
+
+        @wraps(method)
+        def expired(*args, **kwargs):
+            pass
+
+        expired.__unittest_skip__ = True
+        expired.__unittest_skip_why__ = "Time budget exhausted"
+        expired._g_score = 0
+        setattr(test, test._testMethodName, expired)
+        self.expired.add(test.id())
+
     def stopTest(self, test):
+        leaderboard = len(self.data["leaderboard"])
         self.updateTests(test)
         self.updateLeaderboard(test)
+        if self.journal is not None:
+            self.journal.append(
+                {
+                    "id": test.id(),
+                    "test": self.data["tests"][-1],
+                    "duration": self.durations[-1],
+                    "leaderboard": self.data["leaderboard"][leaderboard:],
+                }
+            )
         super().stopTest(test)
 
     def updateTests(self, test):
@@ -97,13 +194,16 @@ class Result(unittest.TextTestResult):
             "max_score": self.getattr(test, "_g_weight", 0),
             "score": self.getScore(test),
         }
+        self.durations.append(round(time.monotonic() - self.started, 6))
         # TODO: Walrus, won't need to calculate outputs if exceptions work.
         exceptions = self.getExceptions(test)
         outputs = (self._stdout_buffer.getvalue() + self._stderr_buffer.getvalue()).strip()
-        if exceptions:
-            result["output"] = self.parseExceptions(exceptions)
+        if test.id() in self.expired:
+            result["output"] = "Timed out: the suite ran out of time before this test ran."
+        elif exceptions:
+            result["output"] = truncate(self.parseExceptions(exceptions), OUTPUT)
         elif outputs:
-            result["output"] = outputs
+            result["output"] = truncate(outputs, OUTPUT)
 
         visibility = self.getattr(test, "_g_visibility")
         if visibility:
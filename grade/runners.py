@@ -1,12 +1,50 @@
 import io
+import os
 import time
-from typing import Optional, TextIO, Type
+import unittest
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from typing import Iterator, List, Optional, TextIO, Type
 from unittest import TextTestRunner
 
+from grade.journal import SYNC, Journal, records
+from grade.pipeline import budget, diff, limits
+from grade.pipeline.budget import Budget, share
+from grade.pipeline.cache import Store
+from grade.pipeline.limits import Limits
 from grade.result import Result
 
 
 class GradedRunner(TextTestRunner):
+    """ Runs a suite of tests, collecting results in Gradescope format.
+
+    When jobs is greater than one, the suite is split into its TestCase
+    classes, which are run on a pool of worker processes. setUpClass and
+    tearDownClass are still called exactly once per class, though module
+    level fixtures are called once per class that uses them.
+    Results are merged back in the order the tests were discovered.
+
+    If any Run() used a cache, its hits and misses are reported under
+    extra_data. So are the durations of the tests, in seconds, in the same
+    order as the tests.
+
+    limits are applied to every Run() in the suite that doesn't set its own.
+
+    budget is the number of seconds the whole suite may take. Each test is
+    given a share of the time that remains in proportion to its weight, and
+    every Run() in the test times out at the end of that share. Once the
+    budget runs out, the remaining tests are not run, and score zero.
+
+    If sidecars is a directory, outputs that don't match what was expected
+    are written there in full, since only a bounded diff is kept in results.
+
+    If journal is a file, each test's results are appended to it as the test
+    finishes, see grade.journal. With resume, tests already in the journal
+    are not run again, and their recorded results are used instead; results
+    are then ordered by id, as grade.journal.load orders them.
+    """
+
     def __init__(
         self,
         stream: Optional[TextIO] = io.StringIO(),
@@ -18,30 +56,183 @@ class GradedRunner(TextTestRunner):
         *,
         tb_locals: bool = False,
         visibility: "str" = "visible",
+        jobs: int = 1,
+        limits: Optional[Limits] = None,
+        budget: Optional[float] = None,
+        sidecars: Optional[str] = None,
+        journal: Optional[str] = None,
+        resume: bool = False,
+        sync: float = SYNC,
     ) -> None:
         super().__init__(
             stream, descriptions, verbosity, failfast, buffer, Result, warnings, tb_locals=tb_locals
         )
         self.visibility = visibility
+        self.jobs = jobs
+        self.limits = limits
+        self.budget = budget
+        self.sidecars = sidecars
+        self.journal = journal
+        self.resume = resume
+        self.sync = sync
+        self._journal: Optional[Journal] = None
+        # Shards leave reporting a failed setUpClass to the parent, as serial runs do.
+        self._shard = False
+
+    def _makeResult(self) -> Result:
+        result = super()._makeResult()
+        result.journal = self._journal
+        return result
 
     def run(self, test) -> Result:
         start = time.time()
-        # noinspection PyTypeChecker
-        results: Result = super().run(test)
+        recorded = {}
+        if self.journal is not None:
+            if self.resume and os.path.exists(self.journal):
+                recorded = {r["id"]: r for r in records(self.journal) if "id" in r}
+            elif not self.resume:
+                # A fresh run starts a fresh journal.
+                open(self.journal, "w").close()
+            if recorded:
+                test = unittest.TestSuite(t for t in _flatten(test) if t.id() not in recorded)
+            self._journal = Journal(self.journal, self.sync)
+        # Suites drop their tests as they run them, so they're listed beforehand.
+        cases = list(_flatten(test))
+        statistics = Counter(Store.statistics)
+        suite, limits.suite = limits.suite, self.limits
+        sidecars, diff.sidecars = diff.sidecars, self.sidecars
+        plan = budget.suite
+        if self.budget is not None:
+            weight = sum(share(Result.getattr(t, "_g_weight", 0)) for t in cases)
+            budget.suite = Budget(self.budget, weight)
+        try:
+            if self.jobs > 1:
+                results = self.runParallel(test)
+            else:
+                # noinspection PyTypeChecker
+                results: Result = super().run(test)
+        finally:
+            limits.suite = suite
+            budget.suite = plan
+            diff.sidecars = sidecars
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
         results.data["execution_time"] = round(time.time() - start)
         results.data["visibility"] = self.visibility
 
-        if len(results.data["tests"]) == 0:
+        statistics = Store.statistics - statistics
+        if statistics:
+            results.data["extra_data"] = {
+                "cache": {"hits": statistics["hits"], "misses": statistics["misses"]}
+            }
+
+        if len(results.data["tests"]) == 0 and not recorded and not self._shard:
             # setUpClass failed.
-            tests = [m for t in test for m in t.getTests()]
+            tests = {t.id(): t for t in cases}.values()
             results.data["tests"] = [
                 {
-                    "name": t.__qualname__,
+                    "name": getattr(t, t._testMethodName).__qualname__,
                     "max_score": 0,
                     "score": "0",
                     "output": ";\n".join(f"{e[0]}: {e[1]}" for e in results.errors),
                 }
-                for k, t in tests
+                for t in tests
             ]
+            results.durations = [None] * len(results.data["tests"])
+            self.record({"test": t} for t in results.data["tests"])
+
+        if recorded:
+            # Resumed results are merged in the journal, so they're ordered by id, as in load.
+            tests = sorted((r for r in records(self.journal) if "id" in r), key=lambda r: r["id"])
+            results.data["tests"] = [r["test"] for r in tests]
+            results.data["leaderboard"] = [e for r in tests for e in r.get("leaderboard", [])]
+            results.durations = [r.get("duration") for r in tests]
+        results.data.setdefault("extra_data", {})["durations"] = results.durations
+        summary = {k: v for k, v in results.data.items() if k not in ("tests", "leaderboard")}
+        self.record([{"summary": summary}])
+        return results
 
+    def record(self, entries) -> None:
+        """ Appends entries to the journal, if there is one. """
+        if self.journal is not None:
+            with Journal(self.journal, self.sync) as journal:
+                for entry in entries:
+                    journal.append(entry)
+
+    def runParallel(self, test) -> Result:
+        """ Runs each TestCase class in the suite on a pool of processes. """
+        groups = self.partition(test)
+        options = {
+            "descriptions": self.descriptions,
+            "verbosity": self.verbosity,
+            "failfast": self.failfast,
+            "buffer": self.buffer,
+            "tb_locals": self.tb_locals,
+            "visibility": self.visibility,
+            "limits": self.limits,
+            "sidecars": self.sidecars,
+            "journal": self.journal,
+            "sync": self.sync,
+        }
+        deadline = budget.suite.deadline if budget.suite is not None else None
+        with ProcessPoolExecutor(self.jobs) as pool:
+            shards = list(
+                pool.map(_runShard, groups, [options] * len(groups), [deadline] * len(groups))
+            )
+
+        results: Result = self._makeResult()
+        for group, shard in zip(groups, shards):
+            results.testsRun += shard["testsRun"]
+            results.failures += [(_resolve(group, t), tb) for t, tb in shard["failures"]]
+            results.errors += [(_resolve(group, t), tb) for t, tb in shard["errors"]]
+            results.data["tests"] += shard["data"]["tests"]
+            results.data["leaderboard"] += shard["data"]["leaderboard"]
+            results.durations += shard["durations"]
+            # Fold the workers' cache statistics into this process' totals.
+            Store.statistics.update(shard["data"].get("extra_data", {}).get("cache", {}))
         return results
+
+    @staticmethod
+    def partition(test) -> List[List[unittest.TestCase]]:
+        """ Splits a suite into lists of consecutive tests from the same class. """
+        return [list(tests) for _, tests in groupby(_flatten(test), key=type)]
+
+
+def _flatten(test) -> Iterator[unittest.TestCase]:
+    """ Yields every TestCase from arbitrarily nested TestSuites. """
+    if isinstance(test, unittest.TestSuite):
+        for t in test:
+            yield from _flatten(t)
+    else:
+        yield test
+
+
+def _resolve(group: List[unittest.TestCase], test):
+    """ Maps a test sent back by _runShard to the original test. """
+    return group[test] if isinstance(test, int) else test
+
+
+def _runShard(tests: List[unittest.TestCase], options: dict, deadline: Optional[float]) -> dict:
+    """ Runs a single group of tests in a worker process. """
+    if deadline is not None:
+        # The monotonic clock is shared by every process on the machine.
+        options = {**options, "budget": deadline - time.monotonic()}
+    runner = GradedRunner(**{**options, "journal": None})
+    runner._shard = True
+    if options["journal"] is not None:
+        # Workers append to the journal, leaving resuming and the summary to the parent.
+        runner._journal = Journal(options["journal"], options["sync"])
+    results = runner.run(unittest.TestSuite(tests))
+
+    def indexed(failures):
+        # Tests are sent back by position, fixture errors are sent as-is.
+        return [(tests.index(t) if t in tests else t, tb) for t, tb in failures]
+
+    return {
+        "data": results.data,
+        "testsRun": results.testsRun,
+        "durations": results.durations,
+        "failures": indexed(results.failures),
+        "errors": indexed(results.errors),
+    }
@@ -0,0 +1,99 @@
+""" Tests for the aggregate module.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from grade.aggregate import Cohort, markdown, name, read
+from grade.journal import Journal
+
+
+def results(scores, durations=None, leaderboard=None) -> dict:
+    data = {
+        "tests": [
+            {"name": test, "score": score, "max_score": 10} for test, score in scores.items()
+        ],
+        "leaderboard": [{"name": "Runtime", "value": leaderboard, "order": "asc"}]
+        if leaderboard is not None
+        else [],
+    }
+    if durations is not None:
+        data["extra_data"] = {"durations": durations}
+    return data
+
+
+class TestAggregate(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.write("alice.grade", results({"a": 10, "b": 10}, [0.5, 2.0], leaderboard=1.5))
+        self.write("bob.grade", results({"a": 10, "b": 0}, [0.5, 4.0], leaderboard=0.5))
+        self.write("carol.grade", results({"a": 0, "c": 5}))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, filename: str, data: dict) -> str:
+        filepath = os.path.join(self.directory, filename)
+        with open(filepath, "w") as f:
+            json.dump(data, f)
+        return filepath
+
+    def load(self, jobs=None) -> Cohort:
+        filepaths = sorted(os.path.join(self.directory, f) for f in os.listdir(self.directory))
+        return Cohort.load(filepaths, jobs)
+
+    def test_name(self):
+        self.assertEqual(name("results/alice.grade"), "alice")
+        self.assertEqual(name("submissions/bob/.grade"), "bob")
+        self.assertEqual(name("submissions/bob/.grade.jsonl"), "bob")
+
+    def test_read_journal(self):
+        filepath = os.path.join(self.directory, "dave.grade.jsonl")
+        with Journal(filepath) as journal:
+            journal.append({"id": "t.a", "test": {"name": "a", "score": 10, "max_score": 10}})
+        row = read(filepath)
+        self.assertEqual(row.submission, "dave")
+        self.assertEqual(row.tests, ("a",))
+        self.assertEqual(row.scores, (10.0,))
+
+    def test_columns(self):
+        cohort = self.load(jobs=1)
+        self.assertEqual(cohort.submissions, ["alice", "bob", "carol"])
+        self.assertEqual(cohort.tests, ["a", "b", "c"])
+        self.assertEqual(list(cohort.scores[0]), [10, 10, 0])
+        # Carol has no b, and only Carol has c.
+        self.assertEqual(str(list(cohort.scores[1])), "[10.0, 0.0, nan]")
+        self.assertEqual(str(list(cohort.scores[2])), "[nan, nan, 5.0]")
+        self.assertEqual(list(cohort.totals), [20, 10, 5])
+
+    def test_summary(self):
+        summary = self.load().summary()
+        self.assertEqual(summary["submissions"], 3)
+        self.assertEqual(summary["histogram"], [0, 0, 1, 0, 0, 1, 0, 0, 0, 1])
+        tests = {test["name"]: test for test in summary["tests"]}
+        self.assertAlmostEqual(tests["a"]["pass_rate"], 2 / 3)
+        self.assertEqual(tests["b"]["pass_rate"], 0.5)
+        self.assertEqual(tests["c"]["pass_rate"], 0)
+        self.assertEqual(tests["c"]["submissions"], 1)
+        self.assertEqual([t["name"] for t in summary["slowest"]], ["b", "a"])
+        self.assertEqual(summary["slowest"][0]["mean_duration"], 3.0)
+        self.assertEqual(
+            summary["leaderboards"]["Runtime"],
+            [{"name": "bob", "value": 0.5}, {"name": "alice", "value": 1.5}],
+        )
+        # Every statistic can be dumped as JSON, without NaN.
+        self.assertNotIn("NaN", json.dumps(summary))
+
+    def test_markdown(self):
+        report = markdown(self.load(jobs=1).summary())
+        self.assertIn("## 3 Submissions, Mean Score: 11.7/30", report)
+        self.assertIn("| b | 50% | 5/10 | 3 |", report)
+        self.assertIn("| 1 | bob | 0.5 |", report)
+
+    def test_empty(self):
+        summary = Cohort.load([]).summary()
+        self.assertEqual(summary["submissions"], 0)
+        self.assertIn("0 Submissions", markdown(summary))
@@ -0,0 +1,69 @@
+""" Tests for the journal module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from grade.journal import Journal, load, records
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.directory, "journal.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_append(self):
+        with Journal(self.filepath, sync=0) as journal:
+            journal.append({"id": "a", "test": {"name": "a", "score": 1}})
+            journal.append({"id": "b", "test": {"name": "b", "score": 2}, "leaderboard": [{}]})
+        with Journal(self.filepath) as journal:
+            journal.append({"summary": {"visibility": "visible"}})
+
+        self.assertEqual([r.get("id") for r in records(self.filepath)], ["a", "b", None])
+        self.assertEqual(
+            load(self.filepath),
+            {
+                "tests": [{"name": "a", "score": 1}, {"name": "b", "score": 2}],
+                "leaderboard": [{}],
+                "visibility": "visible",
+                "extra_data": {"durations": [None, None]},
+            },
+        )
+
+    def test_load_order(self):
+        # Tests run in parallel are journaled, and summarized, in the order they finish.
+        with Journal(self.filepath) as journal:
+            journal.append({"id": "b", "test": {"name": "b"}, "duration": 2.0})
+            journal.append({"id": "a", "test": {"name": "a"}, "duration": 1.0})
+            journal.append({"summary": {"extra_data": {"cache": {}, "durations": [2.0, 1.0]}}})
+
+        data = load(self.filepath)
+        self.assertEqual([t["name"] for t in data["tests"]], ["a", "b"])
+        self.assertEqual(data["extra_data"], {"cache": {}, "durations": [1.0, 2.0]})
+
+        with open(self.filepath, "w") as f:
+            f.write('{"id": "b", "test": {"name": "b"}, "duration": 2.0}\n')
+            f.write('{"id": "a", "test": {"name": "a"}, "duration": 1.0}\n')
+        data = load(self.filepath)
+        self.assertEqual([t["name"] for t in data["tests"]], ["a", "b"])
+        self.assertEqual(data["extra_data"]["durations"], [1.0, 2.0])
+
+    def test_torn(self):
+        with open(self.filepath, "w") as f:
+            f.write('{"id": "a"}\n{"id": "b"}\n{"id": ')
+        self.assertEqual(list(records(self.filepath)), [{"id": "a"}, {"id": "b"}])
+
+        with Journal(self.filepath) as journal:
+            journal.append({"id": "c"})
+        self.assertEqual([r["id"] for r in records(self.filepath)], ["a", "b", "c"])
+
+    def test_torn_only(self):
+        with open(self.filepath, "w") as f:
+            f.write('{"id": ')
+        Journal(self.filepath).close()
+        self.assertEqual(os.path.getsize(self.filepath), 0)
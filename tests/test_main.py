@@ -1,5 +1,8 @@
 import json
+import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 from grade.pipeline import (
@@ -13,19 +16,55 @@ from grade.pipeline import (
 )
 
 PYTHON = sys.executable
+# The repository, so grade can be imported by commands run from other directories.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MIXINS = """
+import unittest
+from grade.mixins import ScoringMixin
+from grade.decorators import weight
+
+
+class Test(ScoringMixin, unittest.TestCase):
+    @weight(1)
+    def test_a(self):
+        pass
+
+    @weight(1)
+    def test_b(self):
+        pass
+
+    def test_c(self):
+        pass
+
+    def test_d(self):
+        self.assertTrue(True)
+"""
 
 
 class TestMain(unittest.TestCase):
+    def setUp(self):
+        # grade run writes .grade and .grade.jsonl to the current directory.
+        self.directory = tempfile.mkdtemp()
+        with open(os.path.join(self.directory, "test_mixins.py"), "w") as f:
+            f.write(MIXINS)
+        self.env = {**os.environ, "PYTHONPATH": ROOT}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def grade(self, *args):
+        return Run([PYTHON, "-m", "grade", *args], cwd=self.directory, env=self.env)
+
     @staticmethod
     def test_no_arguments():
         Pipeline(
             Run([PYTHON, "-m", "grade"]), AssertExitSuccess(),
         )
 
-    @staticmethod
-    def test_successful_no_output():
+    def test_successful_no_output(self):
         Pipeline(
-            Run([PYTHON, "-m", "grade", "run", "-p", "test_mixins.py"]),
+            self.grade("run", "-p", "test_mixins.py"),
             AssertExitSuccess(),
             AssertStdoutMatches(""),
             AssertStderrMatches(""),
@@ -33,9 +72,175 @@ class TestMain(unittest.TestCase):
 
     def test_json_output(self):
         Pipeline(
-            Run([PYTHON, "-m", "grade", "run", "-p", "test_mixins.py"]),
-            Run([PYTHON, "-m", "grade", "report", "--format", "json"]),
+            self.grade("run", "-p", "test_mixins.py"),
+            self.grade("report", "--format", "json"),
             AssertExitSuccess(),
             AssertStdoutContains(["tests"]),
             Lambda(lambda results: self.assertGreater(len(json.loads(results.stdout)["tests"]), 3)),
         )()
+
+
+SUITE = """
+import unittest
+from grade.mixins import ScoringMixin
+from grade.decorators import weight
+
+
+class Test(ScoringMixin, unittest.TestCase):
+    @weight(10)
+    def test_answer(self):
+        from solution import answer
+        self.assertEqual(answer(), 42)
+"""
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.tests = os.path.join(self.directory, "tests")
+        os.makedirs(self.tests)
+        with open(os.path.join(self.tests, "test_solution.py"), "w") as f:
+            f.write(SUITE)
+        for name, answer in [("alice", 42), ("bob", 41), ("carol", 42)]:
+            os.makedirs(os.path.join(self.directory, "submissions", name))
+            with open(os.path.join(self.directory, "submissions", name, "solution.py"), "w") as f:
+                f.write(f"def answer():\n    return {answer}\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_batch(self):
+        output = os.path.join(self.directory, "results")
+        submissions = os.path.join(self.directory, "submissions")
+        Pipeline(
+            Run(
+                [
+                    PYTHON,
+                    "-m",
+                    "grade",
+                    "batch",
+                    submissions,
+                    "--tests",
+                    self.tests,
+                    "-j",
+                    "2",
+                    "--output",
+                    output,
+                ]
+            ),
+            AssertExitSuccess(),
+        )()
+        with open(os.path.join(output, "index.json")) as f:
+            index = json.load(f)
+        self.assertEqual(list(index), ["alice", "bob", "carol"])
+        self.assertEqual([s["score"] for s in index.values()], [10, 0, 10])
+        with open(os.path.join(output, "bob.grade")) as f:
+            self.assertEqual(len(json.load(f)["tests"]), 1)
+
+        results = Pipeline(
+            Run(
+                [
+                    PYTHON,
+                    "-m",
+                    "grade",
+                    "report",
+                    "--format",
+                    "json",
+                    "--aggregate",
+                    os.path.join(output, "*.grade"),
+                ]
+            ),
+            AssertExitSuccess(),
+        )()
+        summary = json.loads(results.stdout)
+        self.assertEqual(summary["submissions"], 3)
+        self.assertAlmostEqual(summary["tests"][0]["pass_rate"], 2 / 3)
+
+    def test_batch_crash(self):
+        """ A submission that kills its grading process is recorded as failed. """
+        dave = os.path.join(self.directory, "submissions", "dave")
+        os.makedirs(dave)
+        with open(os.path.join(dave, "solution.py"), "w") as f:
+            f.write("import os\nos._exit(3)\n")
+        output = os.path.join(self.directory, "results")
+        submissions = os.path.join(self.directory, "submissions")
+        Pipeline(
+            Run(
+                [
+                    PYTHON,
+                    "-m",
+                    "grade",
+                    "batch",
+                    submissions,
+                    "--tests",
+                    self.tests,
+                    "--output",
+                    output,
+                ],
+                timeout=60,
+            ),
+            AssertExitSuccess(),
+        )()
+        with open(os.path.join(output, "index.json")) as f:
+            index = json.load(f)
+        self.assertEqual([s["score"] for s in index.values()], [10, 0, 10, 0])
+        self.assertIn("Grading failed", index["dave"]["output"])
+
+
+class TestRecord(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.solution = os.path.join(self.directory, "solution.py")
+        with open(self.solution, "w") as f:
+            f.write("import sys\nprint(open(sys.argv[1]).read().upper(), end='')\n")
+        for name in ["a", "b", "c"]:
+            with open(os.path.join(self.directory, f"{name}.in"), "w") as f:
+                f.write(f"case {name}\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self) -> str:
+        cases = os.path.join(self.directory, "*.in")
+        manifest = os.path.join(self.directory, "manifest.json")
+        results = Pipeline(
+            Run(
+                [
+                    PYTHON,
+                    "-m",
+                    "grade",
+                    "record",
+                    "--cases",
+                    cases,
+                    "--manifest",
+                    manifest,
+                    "--",
+                    PYTHON,
+                    self.solution,
+                ]
+            ),
+            AssertExitSuccess(),
+        )()
+        return results.stderr
+
+    def test_record(self):
+        self.assertIn("Recording 3 testcases, 0 unchanged", self.record())
+        for name in ["a", "b", "c"]:
+            with open(os.path.join(self.directory, f"{name}.in.stdout")) as f:
+                self.assertEqual(f.read(), f"CASE {name.upper()}\n")
+            self.assertEqual(os.path.getsize(os.path.join(self.directory, f"{name}.in.stderr")), 0)
+        self.assertTrue(os.path.exists(os.path.join(self.directory, "manifest.json")))
+
+    def test_unchanged(self):
+        self.record()
+        self.assertIn("Recording 0 testcases, 3 unchanged", self.record())
+
+        with open(os.path.join(self.directory, "b.in"), "w") as f:
+            f.write("changed\n")
+        self.assertIn("Recording 1 testcases, 2 unchanged", self.record())
+        with open(os.path.join(self.directory, "b.in.stdout")) as f:
+            self.assertEqual(f.read(), "CHANGED\n")
+
+        with open(self.solution, "a") as f:
+            f.write("print()\n")
+        self.assertIn("Recording 3 testcases, 0 unchanged", self.record())
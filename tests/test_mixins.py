@@ -1,6 +1,8 @@
 """ Tests for the mixins module.
 """
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
 from grade.mixins import ScoringMixin
 
@@ -23,6 +25,52 @@ class TestScoringMixin(ScoringMixin, unittest.TestCase):
         self.assertEqual(self.getTest().__name__, "test_getTest")
         self.assertEqual(self.getTest().__qualname__, "TestScoringMixin.test_getTest")
 
+    def test_getTest_helper(self):
+        """ Is the running test found from its helpers, and its setUp? """
+
+        class Test(ScoringMixin, unittest.TestCase):
+            def setUp(self):
+                self.weight = 5
+
+            def award(self):
+                self.score = self.weight
+
+            def test_something(self):
+                self.award()
+
+        test = Test("test_something")
+        self.assertTrue(test.run().wasSuccessful())
+        self.assertEqual(test.test_something._g_score, 5)
+
+    def test_getTest_threads(self):
+        """ Do tests running at the same time keep their own scores? """
+
+        class Test(ScoringMixin, unittest.TestCase):
+            def test_a(self):
+                for i in range(1000):
+                    self.score = i
+
+            def test_b(self):
+                for i in range(1000):
+                    self.score = -i
+
+        with ThreadPoolExecutor(2) as pool:
+            results = list(pool.map(lambda name: Test(name).run(), ["test_a", "test_b"] * 4))
+        self.assertTrue(all(result.wasSuccessful() for result in results))
+        self.assertEqual(Test.test_a._g_score, 999)
+        self.assertEqual(Test.test_b._g_score, -999)
+
+    def test_getTest_cost(self):
+        """ Is reading and updating the score cheap enough to do in a loop? """
+        repeat = 10000
+        start = time.perf_counter()
+        for i in range(repeat):
+            self.score += 1
+        cost = (time.perf_counter() - start) / repeat
+        self.assertEqual(self.score, repeat)
+        # Walking inspect.stack() took hundreds of microseconds per access.
+        self.assertLess(cost, 20e-6, f"{cost * 1e6:.2f}us per access")
+
     def test_score(self):
         """ Can we modify and recall a tests score? """
 
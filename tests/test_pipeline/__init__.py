@@ -0,0 +1,12 @@
+import asyncio
+
+
+def run_async(coroutine):
+    """ Runs coroutine on a new event loop, like asyncio.run, which needs Python 3.7. """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
@@ -30,6 +30,11 @@ class TestAsserts(unittest.TestCase):
         results = Run(["ls"])()
         AssertExitSuccess()(results)
 
+    def test_exit_success_binary(self):
+        results = Run(["sh", "-c", "echo out; echo err >&2; exit 1"], text=False)()
+        with self.assertRaisesRegex(AssertionError, r"b'out\\n'.*\nb'err\\n'"):
+            AssertExitSuccess()(results)
+
     @staticmethod
     def test_exit_failure():
         results = Run(["ls", "--iamnotanarg"])()
@@ -75,6 +80,25 @@ class TestAsserts(unittest.TestCase):
     def test_faster():
         Pipeline(Run(["echo", "hello world"]), AssertFaster(10), Not(AssertFaster(0)),)()
 
+    def test_faster_benchmark(self):
+        results = Pipeline(
+            Run(["echo", "hello world"]), AssertFaster(10, repeat=5, warmup=2, confidence=2),
+        )()
+        self.assertEqual(len(results.samples), 5)
+        self.assertTrue(all(sample.wall > 0 for sample in results.samples))
+
+        with self.assertRaises(AssertionError):
+            Pipeline(Run(["sleep", "0.1"]), AssertFaster(0.05, repeat=3, statistic="min"))()
+
+    def test_faster_benchmark_cpu(self):
+        benchmark = AssertFaster(10, cpu=True, repeat=3)
+        results = benchmark(Run(["echo", "hello world"])())
+        self.assertEqual(set(benchmark.summarize(results)), {"median", "mean", "min", "stdev"})
+
+    def test_faster_unknown_statistic(self):
+        with self.assertRaises(ValueError):
+            AssertFaster(10, repeat=3, statistic="max")
+
 
 class TestAssertContains(unittest.TestCase):
     def test_stdout_contains(self):
@@ -0,0 +1,74 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from grade.pipeline import (
+    Run,
+    AssertStdoutMatches,
+    AssertStderrMatches,
+    AssertStdoutContains,
+    AssertStdoutRegex,
+)
+
+PYTHON = sys.executable
+# Bytes that are not valid UTF-8, which decoding would silently drop.
+DATA = bytes(range(256)) * 4
+WRITE = "import sys; sys.stdout.buffer.write(sys.stdin.buffer.read())"
+
+
+class TestBinary(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_bytes(self):
+        results = Run([PYTHON, "-c", WRITE], input=DATA, text=False)()
+        self.assertEqual(results.stdout, DATA)
+        self.assertEqual(results.stderr, b"")
+
+    def test_text_is_decoded_lazily(self):
+        results = Run([PYTHON, "-c", WRITE], input=DATA)()
+        self.assertEqual(results.capture("stdout").getvalue(), DATA)
+        self.assertIsInstance(results.stdout, str)
+
+    def test_matches(self):
+        results = Run([PYTHON, "-c", WRITE], input=DATA, text=False)()
+        AssertStdoutMatches(DATA)(results)
+        AssertStderrMatches(b"")(results)
+        with self.assertRaisesRegex(AssertionError, "differing from byte 1"):
+            AssertStdoutMatches(b"\x00\x02")(results)
+
+    def test_matches_spilled(self):
+        with Run([PYTHON, "-c", WRITE], input=DATA, text=False, spill=64)() as results:
+            self.assertTrue(results.capture("stdout").spilled)
+            AssertStdoutMatches(DATA)(results)
+
+    def test_matches_fixture(self):
+        case = os.path.join(self.directory, "image")
+        with open(case + ".stdout", "wb") as f:
+            f.write(DATA)
+        results = Run([PYTHON, "-c", WRITE, case], input=DATA, text=False)()
+        AssertStdoutMatches()(results)
+
+    def test_bytes_against_text_output(self):
+        results = Run(["echo", "hello"])()
+        AssertStdoutMatches(b"hello")(results)
+        with self.assertRaises(AssertionError):
+            AssertStdoutMatches(b"world")(results)
+
+    def test_contains(self):
+        results = Run([PYTHON, "-c", WRITE], input=DATA, text=False)()
+        AssertStdoutContains([b"\xfe\xff", b"\x00\x01"], patterns=[rb"\x80+"])(results)
+        with self.assertRaises(AssertionError):
+            AssertStdoutContains([b"\xff\xfe\xfd\xfe"])(results)
+
+    def test_regex(self):
+        results = Run([PYTHON, "-c", WRITE], input=DATA, text=False)()
+        AssertStdoutRegex(rb"\xfd\xfe\xff")(results)
+        AssertStdoutRegex("ABC")(results)
+        with self.assertRaises(AssertionError):
+            AssertStdoutRegex(rb"\xff\xff")(results)
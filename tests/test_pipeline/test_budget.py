@@ -0,0 +1,39 @@
+import time
+import unittest
+
+from grade.pipeline import Run, budget
+from grade.pipeline.budget import Budget
+
+
+class TestBudget(unittest.TestCase):
+    def test_shares(self):
+        plan = Budget(100, weight=4)
+        self.assertAlmostEqual(plan.start(1), 25, delta=1)
+        self.assertAlmostEqual(plan.start(3), 100, delta=1)
+
+    def test_unweighted(self):
+        plan = Budget(100, weight=4)
+        self.assertAlmostEqual(plan.start(0), 25, delta=1)
+        self.assertEqual(plan.weight, 3)
+
+    def test_expired(self):
+        plan = Budget(0)
+        self.assertTrue(plan.expired)
+        self.assertEqual(plan.timeout(60), 0)
+
+    def test_timeout(self):
+        plan = Budget(100, weight=2)
+        self.assertEqual(plan.timeout(10), 10)
+        plan.start(1)
+        self.assertLessEqual(plan.timeout(600), 50)
+        self.assertLessEqual(plan.timeout(None), 50)
+
+    def test_run(self):
+        budget.suite = Budget(1)
+        try:
+            start = time.monotonic()
+            with self.assertRaises(TimeoutError):
+                Run(["sleep", "30"])()
+        finally:
+            budget.suite = None
+        self.assertLess(time.monotonic() - start, 10)
@@ -0,0 +1,178 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from grade.pipeline import (
+    CachedRun,
+    Store,
+    Pipeline,
+    Run,
+    AssertExitSuccess,
+    AssertStdoutMatches,
+)
+
+SOURCE = '#include <stdio.h>\nint main() { printf("%s\\n", "hello"); return 0; }\n'
+
+
+@unittest.skipIf(shutil.which("gcc") is None, "Need gcc.")
+class TestCachedRun(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = Store(tempfile.mkdtemp())
+        self.source = os.path.join(self.directory, "main.c")
+        self.binary = os.path.join(self.directory, "main")
+        with open(self.source, "w") as f:
+            f.write(SOURCE)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        shutil.rmtree(self.store.directory)
+
+    def build(self):
+        command = ["gcc", "main.c", "-o", "main"]
+        return CachedRun(command, outputs=["main"], store=self.store, cwd=self.directory)()
+
+    def test_restores_outputs(self):
+        AssertExitSuccess()(self.build())
+        self.assertEqual((self.store.hits, self.store.misses), (0, 1))
+
+        os.remove(self.binary)
+        results = self.build()
+        self.assertEqual((self.store.hits, self.store.misses), (1, 1))
+        AssertExitSuccess()(results)
+        Pipeline(Run([self.binary]), AssertStdoutMatches("hello"))()
+
+    def test_source_changes(self):
+        self.build()
+        with open(self.source, "w") as f:
+            f.write(SOURCE.replace("hello", "goodbye"))
+        self.build()
+        self.assertEqual((self.store.hits, self.store.misses), (0, 2))
+        Pipeline(Run([self.binary]), AssertStdoutMatches("goodbye"))()
+
+    def test_header_changes(self):
+        with open(os.path.join(self.directory, "message.h"), "w") as f:
+            f.write('#define MESSAGE "hello"\n')
+        with open(self.source, "w") as f:
+            f.write(
+                SOURCE.replace('"hello"', "MESSAGE").replace(
+                    "<stdio.h>", '<stdio.h>\n#include "message.h"'
+                )
+            )
+        self.build()
+        with open(os.path.join(self.directory, "message.h"), "w") as f:
+            f.write('#define MESSAGE "goodbye"\n')
+        self.build()
+        self.assertEqual((self.store.hits, self.store.misses), (0, 2))
+        Pipeline(Run([self.binary]), AssertStdoutMatches("goodbye"))()
+
+    def test_failures_are_not_cached(self):
+        with open(self.source, "w") as f:
+            f.write("int main() { return }")
+        self.assertNotEqual(self.build().returncode, 0)
+        self.assertNotEqual(self.build().returncode, 0)
+        self.assertEqual(self.store.hits, 0)
+
+
+class TestRunCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = Store(os.path.join(self.directory, "cache"))
+        self.input = os.path.join(self.directory, "input.txt")
+        with open(self.input, "w") as f:
+            f.write("hello\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_replay(self):
+        first = Run(["cat", self.input], cache=self.store)()
+        second = Run(["cat", self.input], cache=self.store)()
+        self.assertEqual((self.store.hits, self.store.misses), (1, 1))
+        self.assertEqual(first.stdout, second.stdout)
+        self.assertEqual(first.returncode, second.returncode)
+        self.assertEqual(first.measurements, second.measurements)
+
+    def test_keys(self):
+        """ Changes to input, environment or files are cache misses. """
+        Run(["cat", self.input], cache=self.store)()
+        Run(["cat", self.input, "-"], input="a", cache=self.store)()
+        Run(["cat", self.input, "-"], input="b", cache=self.store)()
+        Run(["cat", self.input], env={"LANG": "C"}, cache=self.store)()
+        with open(self.input, "w") as f:
+            f.write("goodbye\n")
+        results = Run(["cat", self.input], cache=self.store)()
+        self.assertEqual((self.store.hits, self.store.misses), (0, 5))
+        self.assertEqual(results.stdout, "goodbye\n")
+
+    def test_path_args(self):
+        first = Run(["cat", Path(self.input)], cache=self.store)()
+        second = Run(["cat", Path(self.input)], cache=self.store)()
+        self.assertEqual((self.store.hits, self.store.misses), (1, 1))
+        self.assertEqual(second.stdout, first.stdout)
+        self.assertEqual(second.args, ["cat", self.input])
+
+    def test_failed_put(self):
+        """ Entries that can't be stored leave nothing behind. """
+        with self.assertRaises(TypeError):
+            self.store.put("key", {"value": object()})
+        self.assertEqual(os.listdir(self.store.directory), [])
+
+    def test_copies(self):
+        """ Copies of a submission in other directories share results. """
+        cwd = os.getcwd()
+        try:
+            for name in ("a", "b"):
+                os.mkdir(os.path.join(self.directory, name))
+                shutil.copy(self.input, os.path.join(self.directory, name))
+                # grade batch runs each submission from a directory of its own.
+                os.chdir(os.path.join(self.directory, name))
+                Run(["cat", "input.txt"], cache=self.store)()
+        finally:
+            os.chdir(cwd)
+        self.assertEqual((self.store.hits, self.store.misses), (1, 1))
+
+    def test_submissions(self):
+        """ Builds that name no sources are keyed on the files in their cwd. """
+        for name in ("a", "b"):
+            submission = os.path.join(self.directory, name)
+            os.mkdir(submission)
+            with open(os.path.join(submission, "input.txt"), "w") as f:
+                f.write(name)
+            command = ["sh", "-c", "cat *.txt > output"]
+            for _ in range(2):
+                CachedRun(command, outputs=["output"], store=self.store, cwd=submission)()
+                os.remove(os.path.join(submission, "output"))
+            CachedRun(command, outputs=["output"], store=self.store, cwd=submission)()
+            with open(os.path.join(submission, "output")) as f:
+                self.assertEqual(f.read(), name)
+        self.assertEqual((self.store.hits, self.store.misses), (4, 2))
+
+
+class TestStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_put(self):
+        store = Store(self.directory)
+        self.assertIsNone(store.get("key"))
+        store.put("key", {"value": 1})
+        self.assertEqual(store.get("key"), {"value": 1})
+        self.assertEqual((store.hits, store.misses), (1, 1))
+
+    def test_eviction(self):
+        """ The least recently used entries are evicted first. """
+        store = Store(self.directory, max_size=100)
+        store.put("first", {"value": "a" * 30})
+        store.put("second", {"value": "b" * 30})
+        os.utime(os.path.join(self.directory, "first"), (0, 0))
+        os.utime(os.path.join(self.directory, "second"), (1, 1))
+        store.put("third", {"value": "c" * 30})
+        self.assertIsNone(store.get("first"))
+        self.assertIsNotNone(store.get("second"))
+        self.assertIsNotNone(store.get("third"))
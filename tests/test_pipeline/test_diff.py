@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from grade.pipeline import AssertStdoutMatches, Run
+from grade.pipeline import diff
+
+
+class TestDiff(unittest.TestCase):
+    def test_single_line(self):
+        self.assertEqual(diff.diff("a", "b"), "--- expected\n+++ actual\n@@ -1 +1 @@\n-a\n+b")
+
+    def test_first_region(self):
+        expected = "\n".join(str(i) for i in range(1000))
+        actual = expected.replace("\n500\n", "\nfive hundred\n")
+        lines = diff.diff(expected, actual).splitlines()
+        self.assertEqual(lines[2], "@@ -498,7 +498,7 @@")
+        self.assertIn("-500", lines)
+        self.assertIn("+five hundred", lines)
+        self.assertEqual(len(lines), 3 + 8)
+
+    def test_missing_lines(self):
+        self.assertEqual(diff.diff("x\ny", "x").splitlines()[2:], ["@@ -1,2 +1 @@", " x", "-y"])
+
+    def test_bounded(self):
+        expected = "a\n" * 1_000_000
+        actual = "b\n" * 1_000_000
+        message = diff.diff(expected, actual)
+        self.assertLess(len(message), diff.LIMIT + 100)
+        self.assertTrue(message.endswith("differing lines were compared"))
+
+    def test_common_prefix(self):
+        self.assertEqual(diff.common_prefix(b"hello", b"help"), 3)
+        self.assertEqual(diff.common_prefix([1, 2, 3], [1, 2, 3, 4]), 3)
+        self.assertEqual(diff.common_suffix("testing", "resting"), 6)
+
+    def test_truncate(self):
+        self.assertEqual(diff.truncate("abc", 5), "abc")
+        self.assertEqual(diff.truncate("abcdef", 3), "abc\n... (3 more characters)")
+
+
+class TestSidecars(unittest.TestCase):
+    def setUp(self):
+        diff.sidecars = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(diff.sidecars)
+        diff.sidecars = None
+
+    def test_written(self):
+        results = Run(["echo", "hello"])()
+        with self.assertRaises(AssertionError) as error:
+            AssertStdoutMatches("goodbye")(results)
+        self.assertIn("Full stdout written to", str(error.exception))
+
+        files = sorted(os.listdir(diff.sidecars))
+        self.assertEqual(len(files), 2)
+        with open(os.path.join(diff.sidecars, files[0])) as f:
+            self.assertEqual(f.read(), "hello")
+        with open(os.path.join(diff.sidecars, files[1])) as f:
+            self.assertEqual(f.read(), "goodbye")
+
+
+class TestMessages(unittest.TestCase):
+    def test_bounded_message(self):
+        results = Run(["yes"], max_output=1 << 20)()
+        with self.assertRaises(AssertionError) as error:
+            AssertStdoutMatches("n\n" * (1 << 19))(results)
+        self.assertLess(len(str(error.exception)), 2 * diff.LIMIT)
@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from grade.pipeline import files
+from grade.pipeline.files import FileIndex
+
+
+class TestFiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        files.clear()
+        for path in [
+            "Main.py",
+            "README.md",
+            ".hidden.py",
+            "src/util.py",
+            "src/Deep/Parser.PY",
+            "node_modules/left-pad/index.py",
+            "build/out.o",
+        ]:
+            self.write(path)
+        self.index = FileIndex(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, path: str) -> str:
+        filepath = os.path.join(self.directory, path)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(filepath, "w") as f:
+            f.write(path)
+        return filepath
+
+    def test_find(self):
+        self.assertEqual(self.index.find("*.py"), ["Main.py"])
+        self.assertEqual(self.index.find("main.PY"), ["Main.py"])
+        self.assertEqual(self.index.find("src/*"), ["src/Deep", "src/util.py"])
+        self.assertEqual(self.index.find("src/*/"), ["src/Deep"])
+        self.assertEqual(self.index.find("./*.md"), ["./README.md"])
+
+    def test_find_recursive(self):
+        self.assertEqual(
+            self.index.find("**/*.py"), ["Main.py", "src/Deep/Parser.PY", "src/util.py"]
+        )
+        self.assertEqual(self.index.find("**/*.py", recursive=False), ["src/util.py"])
+        self.assertEqual(self.index.find("src/**/parser.py"), ["src/Deep/Parser.PY"])
+
+    def test_ignore(self):
+        self.assertNotIn("node_modules/left-pad/index.py", self.index.find("**/*.py"))
+        # Naming an ignored directory looks inside of it anyway.
+        self.assertEqual(
+            self.index.find(os.path.join(self.directory, "node_modules/*/index.py")),
+            [os.path.join(self.directory, "node_modules/left-pad/index.py")],
+        )
+
+        index = FileIndex(self.directory, ignore=["build"])
+        self.assertIn("node_modules/left-pad/index.py", index.find("**/*.py"))
+        self.assertEqual(index.find("**/*.o"), [])
+
+    def test_invalidated(self):
+        listing = files.listing(os.path.join(self.directory, "src"))
+        self.assertEqual(self.index.find("src/*.py"), ["src/util.py"])
+        self.assertIs(files.listing(os.path.join(self.directory, "src")), listing)
+
+        self.write("src/new.py")
+        self.assertEqual(self.index.find("src/*.py"), ["src/new.py", "src/util.py"])
+        os.remove(os.path.join(self.directory, "src/util.py"))
+        self.assertEqual(self.index.find("src/*.py"), ["src/new.py"])
+        shutil.rmtree(os.path.join(self.directory, "src/Deep"))
+        self.assertEqual(self.index.find("**/parser.py"), [])
+
+    def test_exists(self):
+        self.assertTrue(files.exists(os.path.join(self.directory, "Main.py")))
+        self.assertTrue(files.exists(os.path.join(self.directory, "src")))
+        self.assertFalse(files.exists(os.path.join(self.directory, "main.py")))
+        self.assertFalse(files.exists(os.path.join(self.directory, "missing/Main.py")))
+        self.write("missing/Main.py")
+        self.assertTrue(files.exists(os.path.join(self.directory, "missing/Main.py")))
+
+    def test_index_shared(self):
+        self.assertIs(files.index(self.directory), files.index(self.directory + "/"))
+        self.assertIsNot(files.index(self.directory), files.index(self.directory, ignore=[]))
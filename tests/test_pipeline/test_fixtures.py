@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from grade.pipeline import Run, AssertStdoutMatches, AssertStderrMatches
+from grade.pipeline import fixtures
+
+
+class TestFixtures(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        fixtures.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name: str, content: str) -> str:
+        filepath = os.path.join(self.directory, name)
+        with open(filepath, "w") as f:
+            f.write(content)
+        return filepath
+
+    def test_index(self):
+        self.write("a.in.stdout", "a")
+        self.write("a.in.stderr", "")
+        self.write("b.stdout", "b")
+        self.write("notes.txt", "")
+        index = fixtures.index(self.directory)
+        self.assertEqual(sorted(index["stdout"]), ["a.in", "b"])
+        self.assertEqual(sorted(index["stderr"]), ["a.in"])
+
+    def test_index_invalidated(self):
+        self.assertEqual(fixtures.index(self.directory)["stdout"], {})
+        self.write("case.stdout", "hello")
+        self.assertIn("case", fixtures.index(self.directory)["stdout"])
+
+    def test_infer(self):
+        stdout = self.write("case.stdout", "hello")
+        case = os.path.join(self.directory, "case")
+        self.assertEqual(fixtures.infer(["cat", case], "stdout"), [stdout])
+        self.assertEqual(fixtures.infer(["cat", case], "stderr"), [])
+
+    def test_read_cached(self):
+        filepath = self.write("case.stdout", "hello")
+        self.assertEqual(fixtures.read(filepath), "hello")
+        hits = fixtures._read.cache_info().hits
+        self.assertEqual(fixtures.read(filepath), "hello")
+        self.assertEqual(fixtures._read.cache_info().hits, hits + 1)
+
+    def test_read_changed(self):
+        filepath = self.write("case.stdout", "hello")
+        self.assertEqual(fixtures.read(filepath), "hello")
+        self.write("case.stdout", "goodbye!")
+        self.assertEqual(fixtures.read(filepath), "goodbye!")
+
+
+class TestStatelessAsserts(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name in ["one", "two", "three"]:
+            with open(os.path.join(self.directory, name), "w") as f:
+                f.write(name)
+            with open(os.path.join(self.directory, f"{name}.stdout"), "w") as f:
+                f.write(name)
+            with open(os.path.join(self.directory, f"{name}.stderr"), "w") as f:
+                f.write("")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_reused(self):
+        stdout, stderr = AssertStdoutMatches(), AssertStderrMatches()
+        for name in ["one", "two", "three"]:
+            results = Run(["cat", os.path.join(self.directory, name)])()
+            stderr(stdout(results))
+        self.assertIsNone(stdout.stdout)
+
+    def test_threads(self):
+        check = AssertStdoutMatches()
+
+        def grade(name):
+            return check(Run(["cat", os.path.join(self.directory, name)])()).stdout
+
+        with ThreadPoolExecutor(3) as pool:
+            outputs = list(pool.map(grade, ["one", "two", "three"] * 4))
+        self.assertEqual(outputs, ["one", "two", "three"] * 4)
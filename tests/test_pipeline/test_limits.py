@@ -0,0 +1,153 @@
+import asyncio
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from grade.pipeline import (
+    Run,
+    AsyncRun,
+    Pipe,
+    Pipeline,
+    Limits,
+    AssertExitSuccess,
+    AssertWithinLimits,
+)
+from grade.pipeline import limits
+from tests.test_pipeline import run_async
+
+PYTHON = sys.executable
+
+
+@unittest.skipUnless(limits.supported(), "resource limits are not supported")
+class TestLimits(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_within_limits(self):
+        Pipeline(
+            Run(["echo", "hello"], limits=Limits(cpu=5, memory=1 << 30)),
+            AssertWithinLimits(),
+            AssertExitSuccess(),
+        )()
+
+    def test_cpu(self):
+        results = Run([PYTHON, "-c", "while True: pass"], limits=Limits(cpu=1))()
+        self.assertEqual(results.exceeded, "cpu")
+        with self.assertRaises(AssertionError):
+            AssertWithinLimits()(results)
+
+    def test_memory(self):
+        results = Run([PYTHON, "-c", "x = bytearray(1 << 30)"], limits=Limits(memory=256 << 20))()
+        self.assertEqual(results.exceeded, "memory")
+
+    def test_filesize(self):
+        output = os.path.join(self.directory, "output")
+        results = Run(
+            f"head -c 1000000 /dev/zero > {output}", shell=True, limits=Limits(filesize=1000)
+        )()
+        self.assertEqual(results.exceeded, "filesize")
+        self.assertEqual(os.path.getsize(output), 1000)
+
+    def test_unrelated_failure(self):
+        results = Run([PYTHON, "-c", "exit(1)"], limits=Limits(cpu=5))()
+        self.assertEqual(results.returncode, 1)
+        self.assertIsNone(results.exceeded)
+
+    def test_suite_limits(self):
+        limits.suite = Limits(cpu=1)
+        try:
+            results = Run([PYTHON, "-c", "while True: pass"])()
+        finally:
+            limits.suite = None
+        self.assertEqual(results.exceeded, "cpu")
+
+
+def alive(pidfile: str) -> bool:
+    """ Returns whether the process whose pid is in pidfile is still running. """
+    with open(pidfile) as f:
+        pid = int(f.read())
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Orphans that were killed may not have been reaped yet.
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+    except OSError:
+        pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+@unittest.skipUnless(limits.supported(), "process groups are not supported")
+class TestProcessGroup(unittest.TestCase):
+    def test_timeout_kills_group(self):
+        start = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            Run("sleep 30 & sleep 30", shell=True, timeout=1)()
+        self.assertLess(time.monotonic() - start, 10)
+
+    def test_background_processes_killed(self):
+        start = time.monotonic()
+        results = Run("sleep 30 & echo started", shell=True, timeout=20)()
+        self.assertEqual(results.stdout, "started\n")
+        self.assertLess(time.monotonic() - start, 10)
+
+    def interrupt(self, run, pidfile: str) -> None:
+        """ Interrupts the grader while run waits on a process, which must be killed. """
+
+        def interrupted(signum, frame):
+            raise KeyboardInterrupt
+
+        handler = signal.signal(signal.SIGINT, interrupted)
+        main = threading.main_thread().ident
+        timer = threading.Timer(0.5, signal.pthread_kill, (main, signal.SIGINT))
+        start = time.monotonic()
+        timer.start()
+        try:
+            with self.assertRaises(KeyboardInterrupt):
+                run()
+        finally:
+            timer.cancel()
+            signal.signal(signal.SIGINT, handler)
+        self.assertLess(time.monotonic() - start, 5)
+
+        time.sleep(0.1)
+        self.assertFalse(alive(pidfile))
+
+    def test_interrupt_kills_group(self):
+        with tempfile.TemporaryDirectory() as directory:
+            pidfile = os.path.join(directory, "pid")
+            self.interrupt(Run(f"sleep 30 & echo $! > {pidfile}; wait", shell=True), pidfile)
+
+    def test_interrupt_kills_pipe(self):
+        with tempfile.TemporaryDirectory() as directory:
+            pidfile = os.path.join(directory, "pid")
+            sleep = Run(f"sleep 30 & echo $! > {pidfile}; wait", shell=True)
+            self.interrupt(Pipe(sleep, Run(["cat"])), pidfile)
+
+    def test_cancel_kills_async(self):
+        with tempfile.TemporaryDirectory() as directory:
+            pidfile = os.path.join(directory, "pid")
+            run = AsyncRun(f"sleep 30 & echo $! > {pidfile}; wait", shell=True)
+
+            async def cancel():
+                task = asyncio.ensure_future(run())
+                await asyncio.sleep(0.5)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+
+            run_async(cancel())
+            time.sleep(0.1)
+            self.assertFalse(alive(pidfile))
@@ -0,0 +1,82 @@
+import sys
+import time
+import unittest
+
+from grade.pipeline import Run, AssertStdoutMatches, StreamMatcher
+
+PYTHON = sys.executable
+
+
+def match(expected: bytes, *chunks: bytes) -> StreamMatcher:
+    matcher = StreamMatcher(expected)
+    for chunk in chunks:
+        if not matcher.feed(chunk):
+            break
+    matcher.finish()
+    return matcher
+
+
+class TestStreamMatcher(unittest.TestCase):
+    def test_match(self):
+        self.assertEqual(match(b"hello world", b"hello world").verdict, "match")
+
+    def test_chunks(self):
+        matcher = match(b"hello world", b"hel", b"lo w", b"", b"orld")
+        self.assertEqual(matcher.verdict, "match")
+        self.assertIsNone(matcher.divergence)
+
+    def test_whitespace(self):
+        self.assertEqual(match(b"\nhello\n", b"  \n", b" hello", b"\n\n").verdict, "match")
+
+    def test_mismatch(self):
+        matcher = match(b"hello world", b"  hello", b" wormd")
+        self.assertEqual(matcher.verdict, "mismatch")
+        self.assertEqual(matcher.divergence, 11)
+
+    def test_short(self):
+        matcher = match(b"hello world", b"hello")
+        self.assertEqual(matcher.verdict, "short")
+        self.assertEqual(matcher.divergence, 5)
+
+    def test_long(self):
+        matcher = match(b"hello", b"hello\n", b"world")
+        self.assertEqual(matcher.verdict, "long")
+        self.assertEqual(matcher.divergence, 6)
+
+    def test_trailing_whitespace(self):
+        matcher = StreamMatcher(b"hello", slack=4)
+        self.assertTrue(matcher.feed(b"hello\n\n"))
+        self.assertFalse(matcher.feed(b"\n\n\n"))
+        self.assertEqual(matcher.verdict, "long")
+
+    def test_stops_after_divergence(self):
+        matcher = StreamMatcher(b"hello")
+        self.assertFalse(matcher.feed(b"jello"))
+        self.assertFalse(matcher.feed(b"hello"))
+        self.assertEqual(matcher.divergence, 0)
+
+
+class TestRunExpect(unittest.TestCase):
+    def test_match(self):
+        results = Run(["echo", "hello"], expect="hello")()
+        self.assertEqual(results.verdict, "match")
+        AssertStdoutMatches("hello")(results)
+
+    def test_infinite_output(self):
+        start = time.monotonic()
+        results = Run(["yes"], expect="y\ny", timeout=30)()
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(results.verdict, "long")
+        self.assertEqual(results.divergence, 4)
+
+    def test_wrong_answer_then_loop(self):
+        program = "print('41', flush=True)\nwhile True: pass"
+        start = time.monotonic()
+        results = Run([PYTHON, "-c", program], expect="42", timeout=30)()
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(results.verdict, "mismatch")
+        with self.assertRaisesRegex(AssertionError, "diverged at byte 1"):
+            AssertStdoutMatches("42")(results)
+
+    def test_no_expect(self):
+        self.assertIsNone(Run(["echo", "hello"])().verdict)
@@ -60,3 +60,20 @@ class TestPartialCredit(unittest.TestCase):
         results = PartialCredit(pipelines, values)()
         logging.disable(logging.NOTSET)
         self.assertEqual(results.score, 0)
+
+    def test_workers_match_serial(self):
+        """ Threaded runs should score and log exactly like serial runs. """
+        commands = ["ls", "void", "ls", "nope", "ls"]
+        values = [10, 1, 5]
+
+        def pipelines():
+            return map(lambda t: Pipeline(Run([t]), AssertExitSuccess()), commands)
+
+        with self.assertLogs() as serial_logs:
+            serial = PartialCredit(pipelines(), values)()
+        with self.assertLogs() as threaded_logs:
+            threaded = PartialCredit(pipelines(), values, workers=4)()
+
+        self.assertEqual(serial.score, 16)
+        self.assertEqual(serial.score, threaded.score)
+        self.assertEqual(serial_logs.output, threaded_logs.output)
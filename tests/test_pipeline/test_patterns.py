@@ -0,0 +1,81 @@
+import mmap
+import tempfile
+import unittest
+
+from grade.pipeline import Run, AssertStdoutContains, AssertStderrContains, PatternSet
+from grade.pipeline import patterns
+
+KEYWORDS = [f"keyword{i:03}" for i in range(patterns.COMBINE * 2)]
+
+
+class TestPatternSet(unittest.TestCase):
+    def test_strings(self):
+        matches = PatternSet(["hello", "world", "missing"]).search("hello world")
+        self.assertEqual(matches.strings, {"hello", "world"})
+
+    def test_patterns(self):
+        found = PatternSet(patterns=[r"\d+", r"(a)\1", r"^z"]).search("aa 42")
+        self.assertEqual(found.patterns, {r"\d+", r"(a)\1"})
+
+    def test_missing(self):
+        pattern_set = PatternSet(["a", "b"], [r"\d", r"c"])
+        self.assertEqual(pattern_set.missing(pattern_set.search("a c")), ["b", r"\d"])
+
+    def test_combined(self):
+        text = " ".join(KEYWORDS[::2])
+        matches = PatternSet(KEYWORDS).search(text)
+        self.assertEqual(matches.strings, set(KEYWORDS[::2]))
+
+    def test_combined_overlapping(self):
+        # Each of these is hidden by a longer match at, or before, the same place.
+        text = "keyword001x"
+        matches = PatternSet([*KEYWORDS, "keyword00", "keyword001x", "word0"]).search(text)
+        self.assertEqual(matches.strings, {"keyword00", "keyword001", "keyword001x", "word0"})
+
+    def test_combined_straddling(self):
+        # "d01" starts inside the match of "keyword0", so is hidden by it.
+        matches = PatternSet([*KEYWORDS, "keyword0", "d01"]).search("keyword01")
+        self.assertEqual(matches.strings, {"keyword0", "d01"})
+
+    def test_hidden(self):
+        hidden = patterns._hidden(["abc", "ab", "bc", "cd", "xyz", "yz!"])
+        self.assertEqual(hidden, {"ab", "bc", "cd", "yz!"})
+        self.assertEqual(patterns._hidden([b"abc", b"c"]), {b"c"})
+
+    def test_bytes(self):
+        matches = PatternSet(KEYWORDS[:2], [r"\d{3}"]).search(b"keyword001 123")
+        self.assertEqual(matches.strings, {"keyword001"})
+        self.assertEqual(matches.patterns, {r"\d{3}"})
+
+    def test_mmap(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(" ".join(KEYWORDS).encode())
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                matches = PatternSet([*KEYWORDS, "absent"], [r"keyword\d+"]).search(data)
+        self.assertEqual(matches.strings, set(KEYWORDS))
+        self.assertEqual(matches.patterns, {r"keyword\d+"})
+
+
+class TestContainsPatterns(unittest.TestCase):
+    def test_stdout(self):
+        results = Run(["echo", "hello 42"])()
+        results = AssertStdoutContains(["hello"], patterns=[r"\d+"])(results)
+        self.assertEqual(results.matches.patterns, {r"\d+"})
+
+        with self.assertRaisesRegex(AssertionError, "world"):
+            AssertStdoutContains(["hello", "world"], patterns=[r"\d+"])(results)
+
+    def test_stderr(self):
+        results = Run(">&2 echo hello 42", shell=True)()
+        AssertStderrContains(patterns=[r"hel+o", r"\d\d"])(results)
+
+        with self.assertRaisesRegex(AssertionError, "bye"):
+            AssertStderrContains(patterns=["bye"])(results)
+
+    def test_many_keywords_spilled(self):
+        text = "\n".join(KEYWORDS)
+        with Run(["cat"], input=text, spill=16)() as results:
+            self.assertTrue(results.capture("stdout").spilled)
+            results = AssertStdoutContains(KEYWORDS)(results)
+            self.assertEqual(results.matches.strings, set(KEYWORDS))
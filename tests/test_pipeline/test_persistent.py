@@ -0,0 +1,89 @@
+import sys
+import unittest
+
+from grade.pipeline import (
+    Persistent,
+    Feed,
+    Pipeline,
+    AssertExitSuccess,
+    AssertExitFailure,
+    AssertStdoutMatches,
+)
+
+PROGRAM = """
+import sys, time
+for line in sys.stdin:
+    line = line.strip()
+    print("case", line, file=sys.stderr, flush=True)
+    if line == "crash":
+        sys.exit(3)
+    if line == "hang":
+        time.sleep(30)
+    print(int(line) * 2, flush=True)
+"""
+
+
+class TestPersistent(unittest.TestCase):
+    def setUp(self):
+        self.program = Persistent([sys.executable, "-c", PROGRAM], timeout=2)
+
+    def tearDown(self):
+        self.program.close()
+
+    def test_many_cases(self):
+        for i in range(50):
+            results = Pipeline(
+                Feed(self.program, str(i)), AssertExitSuccess(), AssertStdoutMatches(str(i * 2))
+            )()
+            self.assertEqual(results.stderr, f"case {i}\n")
+        self.assertIsNotNone(self.program.process)
+
+    def test_crash_restarts(self):
+        results = Pipeline(Feed(self.program, "crash"), AssertExitFailure())()
+        self.assertEqual(results.returncode, 3)
+        self.assertEqual(results.stderr, "case crash\n")
+        Pipeline(Feed(self.program, "4"), AssertExitSuccess(), AssertStdoutMatches("8"))()
+
+    def test_timeout_restarts(self):
+        with self.assertRaises(TimeoutError):
+            self.program("hang")
+        Pipeline(Feed(self.program, "5"), AssertStdoutMatches("10"))()
+
+    def test_stderr(self):
+        # Written right before each answer, so stderr races the response.
+        program = "\n".join(
+            [
+                "import os, sys",
+                "for line in sys.stdin:",
+                "    os.write(2, line.encode())",
+                "    print(line, end='', flush=True)",
+            ]
+        )
+        with Persistent([sys.executable, "-c", program]) as echo:
+            for i in range(500):
+                self.assertEqual(echo(str(i)).stderr, f"{i}\n")
+
+    def test_one_shot(self):
+        # Exits after each answer, often before the next testcase is written.
+        program = "n = int(input())\nprint(n * 2, flush=True)"
+        with Persistent([sys.executable, "-c", program]) as double:
+            for i in range(1, 21):
+                results = double(str(i))
+                self.assertEqual((results.stdout, results.returncode), (str(i * 2), 0))
+
+    def test_delimiter(self):
+        program = "\n".join(
+            [
+                "import sys",
+                "case = []",
+                "for line in sys.stdin:",
+                "    if line.strip() != '--':",
+                "        case.append(line.strip())",
+                "    else:",
+                "        print(' '.join(case), '--', sep='\\n', flush=True)",
+                "        case = []",
+            ]
+        )
+        with Persistent([sys.executable, "-c", program], delimiter="\n--\n") as echo:
+            self.assertEqual(echo("hello\nthere").stdout, "hello there")
+            self.assertEqual(echo("world").stdout, "world")
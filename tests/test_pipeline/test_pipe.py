@@ -0,0 +1,86 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from grade.pipeline import Pipe, Pipeline, Run, AssertExitSuccess, AssertStdoutMatches
+
+PYTHON = sys.executable
+
+
+class TestPipe(unittest.TestCase):
+    def test_pipe(self):
+        results = Pipe(Run(["printf", "b\\na\\n"]), Run(["sort"]))()
+        self.assertEqual(results.stdout, "a\nb\n")
+        self.assertEqual(len(results.measurements), 2)
+        self.assertEqual(results.args, [["printf", "b\\na\\n"], ["sort"]])
+
+    def test_in_pipeline(self):
+        Pipeline(
+            Pipe(Run(["cat"], input="hello\nworld\n"), Run(["grep", "world"])),
+            AssertExitSuccess(),
+            AssertStdoutMatches("world"),
+        )()
+
+    def test_streams(self):
+        program = "import sys\nfor _ in range(1000): sys.stdout.write('x' * 10000)"
+        results = Pipe(Run([PYTHON, "-c", program]), Run(["wc", "-c"]))()
+        self.assertEqual(results.stdout.strip(), "10000000")
+
+    def test_three_stages(self):
+        results = Pipe(Run(["printf", "c\\na\\nb\\na\\n"]), Run(["sort"]), Run(["uniq", "-c"]))()
+        self.assertEqual(results.stdout.split(), ["2", "a", "1", "b", "1", "c"])
+
+    def test_stderr(self):
+        results = Pipe(Run("echo one >&2", shell=True), Run("cat; echo two >&2", shell=True))()
+        self.assertEqual(sorted(results.stderr.split()), ["one", "two"])
+
+    def test_returncode(self):
+        self.assertEqual(Pipe(Run(["false"]), Run(["cat"]))().returncode, 0)
+        self.assertEqual(Pipe(Run(["false"]), Run(["cat"]), pipefail=True)().returncode, 1)
+        self.assertEqual(Pipe(Run(["true"]), Run(["false"]))().returncode, 1)
+
+    def test_timeout(self):
+        start = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            Pipe(Run(["sleep", "30"]), Run(["cat"], timeout=1))()
+        self.assertLess(time.monotonic() - start, 10)
+
+    def test_no_timeout(self):
+        results = Pipe(Run(["echo", "hello"], timeout=None), Run(["cat"], timeout=None))()
+        self.assertEqual(results.stdout, "hello\n")
+
+    def test_input_on_later_run(self):
+        with self.assertRaises(ValueError):
+            Pipe(Run(["cat"]), Run(["cat"], input="hello"))
+
+    def test_missing_program(self):
+        with self.assertRaises(FileNotFoundError):
+            Pipe(Run(["echo", "hello"]), Run(["idonotexist"]))()
+
+
+class TestFileInput(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "input")
+        with open(self.path, "w") as f:
+            f.write("hello\n" * 100000)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_path(self):
+        results = Run(["wc", "-l"], input=Path(self.path))()
+        self.assertEqual(results.stdout.strip(), "100000")
+
+    def test_file(self):
+        with open(self.path, "rb") as f:
+            results = Run(["wc", "-l"], input=f)()
+        self.assertEqual(results.stdout.strip(), "100000")
+
+    def test_pipe_path(self):
+        results = Pipe(Run(["cat"], input=Path(self.path)), Run(["wc", "-l"]))()
+        self.assertEqual(results.stdout.strip(), "100000")
@@ -1,9 +1,11 @@
 """ Tests for the pipeline module.
 """
 
+import time
 import unittest
 
 from grade.pipeline import (
+    AsyncRun,
     Lambda,
     Pipeline,
     Run,
@@ -12,7 +14,9 @@ from grade.pipeline import (
     AssertValgrindSuccess,
     WriteOutputs,
     CompletedProcess,
+    gather,
 )
+from tests.test_pipeline import run_async
 
 
 class TestPipeline(unittest.TestCase):
@@ -43,6 +47,30 @@ class TestPipeline(unittest.TestCase):
         self.assertEqual(len(pipeline), 4)
 
 
+class TestAsyncPipeline(unittest.TestCase):
+    def test_arun(self):
+        """ Both Run and AsyncRun can be used in an async pipeline. """
+        results = run_async(Pipeline(Run(["ls"]), AsyncRun(["ls"]), AssertExitSuccess()).arun())
+        self.assertIsInstance(results, CompletedProcess)
+
+    def test_arun_fails(self):
+        with self.assertRaises(AssertionError):
+            run_async(Pipeline(AsyncRun(["ls"]), AssertExitFailure()).arun())
+
+    def test_gather(self):
+        """ Pipelines should overlap, and results should stay in order. """
+        pipelines = [Pipeline(AsyncRun(["sh", "-c", f"sleep 0.5; echo {i}"])) for i in range(4)]
+        start = time.time()
+        results = run_async(gather(*pipelines, limit=4))
+        self.assertLess(time.time() - start, 1.5)
+        self.assertEqual([r.stdout for r in results], [f"{i}\n" for i in range(4)])
+
+    def test_gather_exceptions(self):
+        pipelines = [Pipeline(AsyncRun(["ls"]), AssertExitFailure()) for _ in range(2)]
+        results = run_async(gather(*pipelines, limit=1, return_exceptions=True))
+        self.assertTrue(all(isinstance(r, AssertionError) for r in results))
+
+
 class TestLambda(unittest.TestCase):
     def test_simple(self):
         """ Lambda that does return completedprocess. """
@@ -1,11 +1,27 @@
+import os
+import re
+import shutil
+import sys
+import tempfile
 import unittest
+from pathlib import Path
+from subprocess import DEVNULL, STDOUT
 
 from grade.pipeline import (
+    AsyncRun,
     Run,
     Pipeline,
     AssertExitSuccess,
     AssertStdoutMatches,
+    AssertStdoutContains,
+    AssertStdoutRegex,
+    AssertFaster,
+    Not,
+    Store,
 )
+from tests.test_pipeline import run_async
+
+PYTHON = sys.executable
 
 
 class TestRun(unittest.TestCase):
@@ -14,6 +30,11 @@ class TestRun(unittest.TestCase):
         self.assertEqual(results.returncode, 0)
         self.assertGreater(results.duration, 0)
 
+    def test_no_timeout(self):
+        results = Run(["echo", "hello"], timeout=None)()
+        self.assertEqual(results.stdout, "hello\n")
+        self.assertIsNotNone(results.cpu_time)
+
     def test_nonexistant(self):
         with self.assertRaises(FileNotFoundError):
             Run(["idonotexist"])()
@@ -42,3 +63,136 @@ class TestRun(unittest.TestCase):
         Pipeline(
             Run(["python", "-c", "x = input(); print(x)"], input="5"), AssertStdoutMatches("5")
         )()
+
+
+class TestMeasurements(unittest.TestCase):
+    def test_measurement(self):
+        results = Run([PYTHON, "-c", "sum(range(10 ** 7))"])()
+        self.assertEqual(len(results.measurements), 1)
+        measurement = results.measurements[0]
+        self.assertGreater(measurement.wall, 0)
+        self.assertGreater(measurement.cpu, 0)
+        self.assertGreater(measurement.rss, 0)
+        self.assertEqual(results.cpu_time, measurement.cpu)
+        self.assertAlmostEqual(results.duration, measurement.wall / 1e9)
+
+    def test_stack(self):
+        """ Each Run in a pipeline adds to the stack of measurements. """
+        results = Pipeline(
+            Run(["echo", "hello"]), Run(["cat"], input=lambda r: r.stdout), Run(["ls"]),
+        )()
+        self.assertEqual(len(results.measurements), 3)
+
+    def test_faster_cpu(self):
+        Pipeline(Run(["sleep", "0.5"]), AssertFaster(0.25, cpu=True), Not(AssertFaster(0.25)))()
+
+
+class TestCapture(unittest.TestCase):
+    def test_output_options(self):
+        results = Run(["echo", "hello"], universal_newlines=True)()
+        self.assertEqual(results.stdout, "hello\n")
+        results = Run(["sh", "-c", "echo out; echo err >&2"], stdout=DEVNULL)()
+        self.assertEqual((results.stdout, results.stderr), ("", "err\n"))
+        results = Run(["sh", "-c", "echo out; echo err >&2"], stderr=STDOUT)()
+        self.assertEqual((results.stdout, results.stderr), ("out\nerr\n", ""))
+
+    def test_in_memory(self):
+        results = Run(["echo", "hello"], spill=1024)()
+        self.assertFalse(results.capture("stdout").spilled)
+        self.assertEqual(results.stdout, "hello\n")
+
+    def test_spilled(self):
+        program = "print('x' * 100000); print('needle')"
+        with Run([PYTHON, "-c", program], spill=1024)() as results:
+            capture = results.capture("stdout")
+            self.assertTrue(capture.spilled)
+            self.assertEqual(len(capture.head), 1024)
+            self.assertEqual(len(capture), 100008)
+
+            AssertStdoutContains(["needle"])(results)
+            AssertStdoutRegex(r"x+\nneedle")(results)
+            with self.assertRaises(AssertionError):
+                AssertStdoutContains(["haystack"])(results)
+            with self.assertRaises(AssertionError):
+                AssertStdoutRegex(r"hay")(results)
+            AssertStdoutRegex(re.compile(r"NEEDLE", re.IGNORECASE))(results)
+            AssertStdoutMatches("x" * 100000 + "\nneedle")(results)
+            with self.assertRaisesRegex(AssertionError, "differing from byte 100002"):
+                AssertStdoutMatches("x" * 100000 + "\nnoodle")(results)
+            # Matching spilled output doesn't decode it.
+            self.assertIsNone(capture._text)
+            self.assertEqual(results.stdout, "x" * 100000 + "\nneedle\n")
+        self.assertTrue(capture.file.closed)
+
+    def test_max_output(self):
+        with Run(["yes"], spill=1024, max_output=100000)() as results:
+            self.assertEqual(results.exceeded, "output")
+            self.assertNotEqual(results.returncode, 0)
+            self.assertEqual(len(results.capture("stdout")), 100000)
+
+    def test_within_max_output(self):
+        results = Run(["echo", "hello"], max_output=100)()
+        self.assertIsNone(results.exceeded)
+        self.assertEqual(results.returncode, 0)
+
+
+class TestAsyncRun(unittest.TestCase):
+    def test_valid_program(self):
+        results = run_async(AsyncRun(["ls"])())
+        self.assertEqual(results.returncode, 0)
+        self.assertGreater(results.duration, 0)
+
+    def test_shell_command(self):
+        results = run_async(AsyncRun("echo test | grep test", shell=True)())
+        self.assertEqual(results.returncode, 0)
+        self.assertEqual(results.stdout, "test\n")
+
+    def test_timeout(self):
+        with self.assertRaises(TimeoutError):
+            run_async(AsyncRun(["sleep", "30"], timeout=1)())
+
+    @staticmethod
+    def test_input():
+        run_async(
+            Pipeline(
+                AsyncRun(["cat", "README.md"]),
+                AsyncRun(["grep", "Setup"], input=lambda r: r.stdout),
+                AssertStdoutMatches("## Setup"),
+            ).arun()
+        )
+
+    def test_input_types(self):
+        results = run_async(AsyncRun(["cat"], input=b"bytes", text=False)())
+        self.assertEqual(results.stdout, b"bytes")
+        results = run_async(AsyncRun(["cat"], input=Path("README.md"))())
+        self.assertIn("## Setup", results.stdout)
+
+    def test_text_options(self):
+        results = run_async(AsyncRun(["echo", "caf\xe9"], encoding="latin-1", errors="strict")())
+        self.assertEqual(results.stdout, "caf\xc3\xa9\n")
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            AsyncRun(["ls"], under_valgrind=True)
+
+    def test_rerun(self):
+        results = run_async(AsyncRun(["echo", "again"])())
+        self.assertIsInstance(results.origin, AsyncRun)
+        self.assertEqual(results.rerun().stdout, "again\n")
+
+    def test_cache(self):
+        directory = tempfile.mkdtemp()
+        try:
+            store = Store(os.path.join(directory, "cache"))
+            first = run_async(AsyncRun(["echo", "cached"], cache=store)())
+            second = run_async(AsyncRun(["echo", "cached"], cache=store)())
+            self.assertEqual((store.hits, store.misses), (1, 1))
+            self.assertEqual(first.stdout, second.stdout)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_faster_cpu(self):
+        results = run_async(AsyncRun(["ls"])())
+        AssertFaster(10)(results)
+        with self.assertRaisesRegex(AssertionError, "no CPU time"):
+            AssertFaster(10, cpu=True)(results)
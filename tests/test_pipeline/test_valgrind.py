@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from grade.pipeline import (
+    Run,
+    Pipeline,
+    AssertExitSuccess,
+    AssertStdoutMatches,
+    AssertValgrindSuccess,
+)
+from grade.pipeline import valgrind
+
+REPORT = """<?xml version="1.0"?>
+<valgrindoutput>
+<protocolversion>4</protocolversion>
+<error>
+  <unique>0x0</unique>
+  <tid>1</tid>
+  <kind>InvalidRead</kind>
+  <what>Invalid read of size 4</what>
+  <stack>
+    <frame><ip>0x1</ip><fn>main</fn><dir>/tmp</dir><file>main.c</file><line>5</line></frame>
+    <frame><ip>0x2</ip><fn>__libc_start_main</fn></frame>
+  </stack>
+  <auxwhat>Address 0x0 is not stack'd, malloc'd or (recently) free'd</auxwhat>
+  <stack>
+    <frame><ip>0x3</ip><fn>elsewhere</fn></frame>
+  </stack>
+</error>
+<error>
+  <unique>0x1</unique>
+  <tid>1</tid>
+  <kind>Leak_DefinitelyLost</kind>
+  <xwhat><text>4 bytes in 1 blocks are definitely lost</text></xwhat>
+  <stack>
+    <frame><ip>0x4</ip><fn>malloc</fn></frame>
+  </stack>
+</error>
+</valgrindoutput>
+"""
+
+
+class TestParse(unittest.TestCase):
+    def setUp(self):
+        fd, self.report = tempfile.mkstemp(suffix=".xml")
+        with os.fdopen(fd, "w") as f:
+            f.write(REPORT)
+
+    def tearDown(self):
+        os.remove(self.report)
+
+    def test_parse(self):
+        errors = valgrind.parse(self.report)
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(errors[0].kind, "InvalidRead")
+        self.assertEqual(errors[0].what, "Invalid read of size 4")
+        self.assertEqual(errors[0].stack[0], valgrind.Frame("main", "main.c", 5))
+        self.assertEqual(len(errors[0].stack), 2)
+        self.assertEqual(errors[1].what, "4 bytes in 1 blocks are definitely lost")
+        self.assertIn("main (main.c:5)", str(errors[0]))
+
+    def test_incomplete(self):
+        with open(self.report, "w") as f:
+            f.write("<valgrindoutput><error>")
+        self.assertEqual(valgrind.parse(self.report)[0].kind, "Incomplete")
+
+    def test_wrap(self):
+        self.assertEqual(valgrind.wrap(["ls"], "r.xml")[-2:], ["--xml-file=r.xml", "ls"])
+        self.assertTrue(valgrind.wrap("ls -l", "r.xml").endswith("--xml-file=r.xml ls -l"))
+
+
+class TestVerdicts(unittest.TestCase):
+    def tearDown(self):
+        valgrind.verdicts.clear()
+
+    def test_cached_verdict(self):
+        """ Verdicts are reused, keyed by binary and input. """
+        results = Run(["cat"], input="hello")()
+        valgrind.verdicts[valgrind.key(["cat"], "hello")] = []
+        AssertValgrindSuccess()(results)
+
+        error = valgrind.ValgrindError("InvalidRead", "Invalid read of size 4", [])
+        valgrind.verdicts[valgrind.key(["cat"], "hello")] = [error]
+        with self.assertRaises(AssertionError):
+            AssertValgrindSuccess()(results)
+
+    def test_path_input(self):
+        """ Input files are keyed on their contents. """
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "input")
+            path.write_text("hello")
+            first = valgrind.key(["cat"], path)
+            path.write_text("goodbye")
+            self.assertNotEqual(valgrind.key(["cat"], path), first)
+
+    def test_errors_on_results(self):
+        results = Run(["ls"])()
+        results.valgrind = [valgrind.ValgrindError("InvalidRead", "Invalid read", [])]
+        with self.assertRaises(AssertionError):
+            AssertValgrindSuccess()(results)
+
+
+@unittest.skipIf(shutil.which("valgrind") is None, "Need valgrind.")
+class TestUnderValgrind(unittest.TestCase):
+    def test_single_execution(self):
+        results = Pipeline(
+            Run(["cat"], input="hello", under_valgrind=True),
+            AssertExitSuccess(),
+            AssertStdoutMatches("hello"),
+            AssertValgrindSuccess(),
+        )()
+        self.assertEqual(results.valgrind, [])
+        self.assertEqual(results.args, ["cat"])
@@ -8,6 +8,7 @@ from grade.pipeline import (
     WriteStderr,
     WriteOutputs,
 )
+from grade.pipeline.write import write_atomic
 
 
 class TestWrite(unittest.TestCase):
@@ -48,3 +49,13 @@ class TestWrite(unittest.TestCase):
         with open("temp.stderr", "r") as f:
             self.assertEqual(results.stderr, f.read())
         os.remove("temp.stderr")
+
+    def test_atomic(self):
+        write_atomic("temp", "first")
+        os.chmod("temp", 0o640)
+        write_atomic("temp", b"second")
+        with open("temp", "rb") as f:
+            self.assertEqual(f.read(), b"second")
+        self.assertEqual(os.stat("temp").st_mode & 0o777, 0o640)
+        self.assertEqual([f for f in os.listdir(".") if f.startswith(".temp.")], [])
+        os.remove("temp")
@@ -1,8 +1,58 @@
 """ Tests for the result module.
 """
 
+import io
+import sys
 import unittest
 
+from grade.result import Failure, Frame, Result
+
 
 class TestResult(unittest.TestCase):
-    pass
+    def run_tests(self, *methods) -> Result:
+        class Test(unittest.TestCase):
+            pass
+
+        for method in methods:
+            setattr(Test, method.__name__, method)
+        result = Result(io.StringIO(), True, 0)
+        result.buffer = True
+        unittest.defaultTestLoader.loadTestsFromTestCase(Test).run(result)
+        return result
+
+    def test_exceptions(self):
+        def test_fails(self):
+            self.assertEqual(1, 2, "main.py is wrong")
+
+        def test_errors(self):
+            raise ValueError("bad\nvalue")
+
+        def test_passes(self):
+            pass
+
+        result = self.run_tests(test_fails, test_errors, test_passes)
+        self.assertEqual(len(result.exceptions), 2)
+        outputs = {test["name"].split(".")[-1]: test.get("output") for test in result.data["tests"]}
+        self.assertRegex(
+            outputs["test_fails"],
+            r"^test_result\.py, line \d+, in test_fails; "
+            r'self\.assertEqual\(1, 2, "main\.py is wrong"\); '
+            r"AssertionError: 1 != 2 : main\.py is wrong$",
+        )
+        self.assertTrue(outputs["test_errors"].endswith("ValueError: bad; value"))
+        self.assertIsNone(outputs["test_passes"])
+
+    def test_failure(self):
+        def inner():
+            raise KeyError("missing")
+
+        try:
+            inner()
+        except KeyError:
+            failure = Failure.of(sys.exc_info())
+
+        self.assertEqual(failure.message, "KeyError: 'missing'")
+        self.assertEqual([frame.function for frame in failure.frames], ["test_failure", "inner"])
+        self.assertIsInstance(failure.frames[-1], Frame)
+        self.assertEqual(failure.frames[-1].source, 'raise KeyError("missing")')
+        self.assertRegex(failure.short, r"^test_result\.py, line \d+, in inner; raise KeyError")
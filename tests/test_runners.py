@@ -2,10 +2,17 @@
 """
 
 import json
+import os
+import shutil
+import sys
+import tempfile
+import time
 import unittest
 
 from grade.decorators import weight, leaderboard, visibility
+from grade.journal import load, records
 from grade.mixins import ScoringMixin
+from grade.pipeline import Run, Store, Limits, limits
 from grade.runners import GradedRunner
 
 
@@ -102,6 +109,22 @@ class TestRunner(unittest.TestCase):
         results = results.markdown
         self.assertIsInstance(results, str)
 
+    def test_parallel(self):
+        """ Parallel runs should produce the same results as serial ones. """
+        load = unittest.TestLoader().loadTestsFromTestCase
+        serial = GradedRunner().run(
+            unittest.TestSuite([load(self.TestPassing), load(self.TestFailing)])
+        )
+        parallel = GradedRunner(jobs=2).run(
+            unittest.TestSuite([load(self.TestPassing), load(self.TestFailing)])
+        )
+
+        self.assertEqual(serial.data["tests"], parallel.data["tests"])
+        self.assertEqual(serial.data["leaderboard"], parallel.data["leaderboard"])
+        self.assertEqual(serial.testsRun, parallel.testsRun)
+        self.assertEqual(len(serial.failures), len(parallel.failures))
+        self.assertEqual(len(serial.errors), len(parallel.errors))
+
     class TestFailing(ScoringMixin, unittest.TestCase):
         def setUp(self):
             self.require("thingsthatshallnotbe")
@@ -145,3 +168,181 @@ class TestClassSetupFails(unittest.TestCase):
         self.assertEqual(len(results["tests"]), 1)
         self.assertIsInstance(results["tests"][0]["output"], str)
         self.assertNotEqual(results["tests"][0]["output"], "")
+
+    class Other(ScoringMixin, unittest.TestCase):
+        def test_true(self):
+            self.assertTrue(True)
+
+    def test_parallel(self):
+        """ Parallel runs report a failed setUpClass as serial ones do. """
+        load = unittest.TestLoader().loadTestsFromTestCase
+        for suite in [[self.Test], [self.Test, self.Other]]:
+            serial = GradedRunner().run(unittest.TestSuite(map(load, suite)))
+            parallel = GradedRunner(jobs=2).run(unittest.TestSuite(map(load, suite)))
+            self.assertEqual(serial.data["tests"], parallel.data["tests"])
+            self.assertEqual(len(serial.errors), len(parallel.errors))
+
+
+class TestCacheStatistics(unittest.TestCase):
+    directory = None
+
+    class Test(ScoringMixin, unittest.TestCase):
+        def test_cached(self):
+            store = Store(TestCacheStatistics.directory)
+            Run(["echo", "hello"], cache=store)()
+            Run(["echo", "hello"], cache=store)()
+
+    def setUp(self):
+        TestCacheStatistics.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(TestCacheStatistics.directory)
+
+    def test_results(self):
+        suite = unittest.TestLoader().loadTestsFromTestCase(self.Test)
+        results = GradedRunner().run(suite)
+        self.assertEqual(results.data["extra_data"]["cache"], {"hits": 1, "misses": 1})
+
+    def test_parallel_results(self):
+        suite = unittest.TestLoader().loadTestsFromTestCase(self.Test)
+        results = GradedRunner(jobs=2).run(suite)
+        self.assertEqual(results.data["extra_data"]["cache"], {"hits": 1, "misses": 1})
+
+
+class TestSuiteLimits(unittest.TestCase):
+    class Test(ScoringMixin, unittest.TestCase):
+        def test_spins(self):
+            results = Run([sys.executable, "-c", "while True: pass"])()
+            self.assertEqual(results.exceeded, "cpu")
+
+    @unittest.skipUnless(limits.supported(), "resource limits are not supported")
+    def test_results(self):
+        suite = unittest.TestLoader().loadTestsFromTestCase(self.Test)
+        results = GradedRunner(limits=Limits(cpu=1)).run(suite)
+        self.assertTrue(results.wasSuccessful())
+        self.assertIsNone(limits.suite)
+
+
+class TestBudget(unittest.TestCase):
+    class Test(ScoringMixin, unittest.TestCase):
+        @weight(1)
+        def test_a_hangs(self):
+            Run(["sleep", "30"])()
+
+        @weight(1)
+        def test_b_hangs(self):
+            Run(["sleep", "30"])()
+
+        @weight(2)
+        def test_c_overruns(self):
+            # Not bounded by Run, so it uses up the rest of the budget.
+            time.sleep(2)
+
+        @weight(1)
+        def test_d_never_runs(self):
+            pass
+
+    def test_results(self):
+        suite = unittest.TestLoader().loadTestsFromTestCase(self.Test)
+        start = time.monotonic()
+        results = GradedRunner(budget=2).run(suite)
+        self.assertLess(time.monotonic() - start, 10)
+
+        self.assertEqual([t["score"] for t in results.data["tests"]], [0, 0, 2, 0])
+        self.assertIn("ran out of time", results.data["tests"][-1]["output"])
+        self.assertIn("timed out", results.data["tests"][0]["output"])
+
+    def test_parallel_results(self):
+        suite = unittest.TestLoader().loadTestsFromTestCase(self.Test)
+        start = time.monotonic()
+        results = GradedRunner(budget=2, jobs=2).run(suite)
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(results.score, 2)
+
+
+class TestJournal(unittest.TestCase):
+    runs = []
+
+    class Test(ScoringMixin, unittest.TestCase):
+        @weight(1)
+        def test_a(self):
+            TestJournal.runs.append("a")
+
+        @weight(2)
+        @leaderboard("a")
+        def test_b(self):
+            TestJournal.runs.append("b")
+            self.leaderboardScore = 3
+
+        @weight(3)
+        def test_c(self):
+            TestJournal.runs.append("c")
+            self.fail("wrong")
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.journal = os.path.join(self.directory, "journal.jsonl")
+        TestJournal.runs = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_suite(self, **kwargs):
+        suite = unittest.TestLoader().loadTestsFromTestCase(self.Test)
+        return GradedRunner(journal=self.journal, sync=0, **kwargs).run(suite)
+
+    def test_journal(self):
+        results = self.run_suite()
+        tests = [r for r in records(self.journal) if "id" in r]
+        self.assertEqual([r["id"].split(".")[-1] for r in tests], ["test_a", "test_b", "test_c"])
+        self.assertEqual([r["test"] for r in tests], results.data["tests"])
+        self.assertEqual(load(self.journal), results.data)
+
+        # Running again starts a new journal.
+        results = self.run_suite()
+        self.assertEqual(load(self.journal), results.data)
+
+    def test_resume(self):
+        expected = self.run_suite().data
+        # Keep the first two tests, as if the grader was killed while writing the third.
+        with open(self.journal) as f:
+            lines = f.readlines()[:2]
+        with open(self.journal, "w") as f:
+            f.writelines(lines)
+            f.write('{"id": "tests.test_runners')
+
+        TestJournal.runs = []
+        results = self.run_suite(resume=True)
+        self.assertEqual(TestJournal.runs, ["c"])
+        self.assertEqual(results.data["tests"], expected["tests"])
+        self.assertEqual(results.data["leaderboard"], expected["leaderboard"])
+        self.assertEqual(load(self.journal)["tests"], expected["tests"])
+        durations = results.data["extra_data"]["durations"]
+        self.assertEqual(durations[:2], expected["extra_data"]["durations"][:2])
+        self.assertEqual(len(durations), 3)
+
+        TestJournal.runs = []
+        self.run_suite(resume=True)
+        self.assertEqual(TestJournal.runs, [])
+
+    def test_resume_order(self):
+        expected = self.run_suite().data
+        # Keep only the last test, as if the tests had finished out of order.
+        with open(self.journal) as f:
+            lines = f.readlines()[2:3]
+        with open(self.journal, "w") as f:
+            f.writelines(lines)
+
+        TestJournal.runs = []
+        results = self.run_suite(resume=True, jobs=2)
+        self.assertEqual(results.data["tests"], expected["tests"])
+        self.assertEqual(load(self.journal)["tests"], results.data["tests"])
+        self.assertEqual(
+            load(self.journal)["extra_data"]["durations"], results.data["extra_data"]["durations"]
+        )
+
+    def test_parallel(self):
+        results = self.run_suite(jobs=2)
+        # The tests ran in a worker process, which appended to the journal.
+        self.assertEqual(TestJournal.runs, [])
+        self.assertEqual(load(self.journal)["tests"], results.data["tests"])